@@ -0,0 +1,120 @@
+from datetime import date
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from apps.asignaciones.models import OperarioCertificacion
+from apps.certificaciones.models import Certificacion
+from apps.inspecciones.models import ConfiguracionInspecciones
+from apps.operarios.models import Operario
+from .views import ErrorPeticion, codificar_cursor, decodificar_cursor
+
+
+class CursorTests(TestCase):
+    def test_ida_y_vuelta(self):
+        for pk in (1, 42, 10 ** 12):
+            with self.subTest(pk=pk):
+                cursor = codificar_cursor(pk)
+                self.assertNotIn('=', cursor)
+                self.assertEqual(decodificar_cursor(cursor), pk)
+
+    def test_cursor_no_valido(self):
+        for cursor in ('%%%', 'abc', codificar_cursor('x'), 'eyJwayI6IDF9'):
+            with self.subTest(cursor=cursor):
+                with self.assertRaises(ErrorPeticion):
+                    decodificar_cursor(cursor)
+
+
+class ListadoTests(TestCase):
+    """Paginación por cursor, selección de campos y errores de /api/v1/"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user(username='calidad', password='clave')
+        ConfiguracionInspecciones.objects.create(numero_dias_laborales_req=180, inspecciones_minimas=29)
+        certificacion = Certificacion.objects.create(nombre='Pulido')
+        cls.asignaciones = [
+            OperarioCertificacion.objects.create(
+                operario=Operario.objects.create(nombre=nombre, apellidos='López'),
+                certificacion=certificacion,
+                fecha_asignacion=date(2026, 10, 1),
+            )
+            for nombre in ('Ana', 'Eva', 'Luis', 'Marta', 'Pablo')
+        ]
+        cls.ids = [asignacion.pk for asignacion in cls.asignaciones]
+
+    def setUp(self):
+        ConfiguracionInspecciones.invalidar_cache()
+        self.client.force_login(self.usuario)
+
+    def get(self, parametros=None, nombre='api:asignaciones'):
+        return self.client.get(reverse(nombre), parametros or {})
+
+    def test_paginas_por_cursor(self):
+        vistos = []
+        response = self.get({'limite': 2, 'activa': '1'})
+        while True:
+            self.assertEqual(response.status_code, 200)
+            datos = response.json()
+            vistos += [fila['id'] for fila in datos['resultados']]
+            if not datos['siguiente']:
+                break
+            siguiente = urlparse(datos['siguiente'])
+            parametros = parse_qs(siguiente.query)
+            # El enlace conserva los filtros y el límite de la petición
+            self.assertEqual(parametros['activa'], ['1'])
+            self.assertEqual(parametros['limite'], ['2'])
+            self.assertEqual(decodificar_cursor(parametros['cursor'][0]), vistos[-1])
+            response = self.client.get(f'{siguiente.path}?{siguiente.query}')
+
+        self.assertEqual(vistos, self.ids)
+
+    def test_cursor_filtra_por_pk(self):
+        response = self.get({'cursor': codificar_cursor(self.ids[2])})
+        datos = response.json()
+        self.assertEqual([fila['id'] for fila in datos['resultados']], self.ids[3:])
+        self.assertIsNone(datos['siguiente'])
+
+    def test_campos(self):
+        datos = self.get({'fields': 'operario_nombre,certificacion_nombre'}).json()
+        self.assertEqual(datos['campos'], ['id', 'operario_nombre', 'certificacion_nombre'])
+        self.assertEqual(datos['resultados'][0], {
+            'id': self.ids[0], 'operario_nombre': 'Ana', 'certificacion_nombre': 'Pulido',
+        })
+
+    def test_campos_desconocidos(self):
+        response = self.get({'fields': 'id,contrasena,operario_nombre,clave'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], 'Campos desconocidos: contrasena, clave')
+
+    def test_limite_acotado(self):
+        self.assertEqual(len(self.get({'limite': 0}).json()['resultados']), 1)
+        self.assertEqual(len(self.get({'limite': -5}).json()['resultados']), 1)
+        with mock.patch('apps.api.views.LIMITE_MAXIMO', 3):
+            datos = self.get({'limite': 5000}).json()
+        self.assertEqual(len(datos['resultados']), 3)
+        self.assertIsNotNone(datos['siguiente'])
+
+    def test_parametros_no_validos(self):
+        casos = [
+            ('api:asignaciones', {'cursor': 'no-es-un-cursor'}),
+            ('api:asignaciones', {'limite': 'muchos'}),
+            ('api:asignaciones', {'operario': 'Ana'}),
+            ('api:asignaciones', {'activa': 'quizá'}),
+            ('api:inspecciones', {'fecha_desde': '19/10/2026'}),
+        ]
+        for nombre, parametros in casos:
+            with self.subTest(vista=nombre, parametros=parametros):
+                response = self.get(parametros, nombre)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('error', response.json())
+
+    def test_anonimo_recibe_401_en_json(self):
+        self.client.logout()
+        for nombre in ('api:indice', 'api:inspecciones', 'api:periodos', 'api:asignaciones'):
+            with self.subTest(vista=nombre):
+                response = self.client.get(reverse(nombre))
+                self.assertEqual(response.status_code, 401)
+                self.assertEqual(response['Content-Type'], 'application/json')
+                self.assertEqual(response.json(), {'error': 'Autenticación requerida'})
@@ -0,0 +1,11 @@
+from django.urls import path
+from . import views
+
+app_name = 'api'
+
+urlpatterns = [
+    path('v1/', views.indice, name='indice'),
+    path('v1/inspecciones/', views.listado, {'recurso': 'inspecciones'}, name='inspecciones'),
+    path('v1/periodos/', views.listado, {'recurso': 'periodos'}, name='periodos'),
+    path('v1/asignaciones/', views.listado, {'recurso': 'asignaciones'}, name='asignaciones'),
+]
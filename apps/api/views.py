@@ -0,0 +1,295 @@
+"""
+API JSON de solo lectura (v1) para integraciones (MES, BI).
+
+Cada recurso declara los campos que expone (nombre público -> ruta del ORM), los que
+devuelve por defecto y sus filtros. ?fields= elige los campos y se traduce a values(),
+así solo se hacen los JOIN de los campos pedidos. La paginación es por cursor sobre la
+clave primaria (WHERE id > cursor ORDER BY id LIMIT n): cada página cuesta lo mismo
+sin importar lo lejos que esté, y no se repiten ni se saltan filas si se insertan otras
+mientras se recorre. La respuesta se serializa con orjson si está instalado.
+"""
+import base64
+import binascii
+import json
+from datetime import date
+from functools import wraps
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+
+from apps.asignaciones.models import OperarioCertificacion
+from apps.inspecciones.busqueda import filtrar_por_texto
+from apps.inspecciones.models import InspeccionProducto, PeriodoValidacionCertificacion
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependencia opcional
+    orjson = None
+
+VERSION = 1
+LIMITE_POR_DEFECTO = 100
+LIMITE_MAXIMO = 1000
+
+
+class ErrorPeticion(Exception):
+    """Parámetro no válido en la petición (respuesta 400)"""
+
+
+def entero(valor):
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        raise ErrorPeticion(f"'{valor}' no es un número entero")
+
+
+def fecha(valor):
+    try:
+        return date.fromisoformat(valor)
+    except (TypeError, ValueError):
+        raise ErrorPeticion(f"'{valor}' no es una fecha AAAA-MM-DD")
+
+
+def booleano(valor):
+    if valor.lower() in ('1', 'true', 'si', 'sí'):
+        return True
+    if valor.lower() in ('0', 'false', 'no'):
+        return False
+    raise ErrorPeticion(f"'{valor}' no es un valor booleano (1/0, true/false)")
+
+
+CAMPOS_OPERARIO = {
+    'operario_codigo': 'operario__codigo',
+    'operario_nombre': 'operario__nombre',
+    'operario_apellidos': 'operario__apellidos',
+    'certificacion_nombre': 'certificacion__nombre',
+}
+
+
+def _a_traves_de(prefijo, campos):
+    """Los mismos campos vistos desde otro modelo (p. ej. a través de operario_certificacion)"""
+    return {nombre: f'{prefijo}__{ruta}' for nombre, ruta in campos.items()}
+
+
+class Recurso:
+    """Modelo expuesto por la API con sus campos, campos por defecto y filtros"""
+
+    def __init__(self, modelo, campos, por_defecto, filtros, texto=None):
+        self.modelo = modelo
+        self.campos = campos          # nombre público -> ruta del ORM
+        self.por_defecto = por_defecto
+        self.filtros = filtros        # parámetro -> (lookup del ORM, conversor)
+        self.texto = texto            # función (queryset, texto) para ?q=, si el recurso lo admite
+
+    def seleccionar_campos(self, parametro):
+        if not parametro:
+            return list(self.por_defecto)
+        nombres = [nombre.strip() for nombre in parametro.split(',') if nombre.strip()]
+        desconocidos = [nombre for nombre in nombres if nombre not in self.campos]
+        if desconocidos:
+            raise ErrorPeticion(f"Campos desconocidos: {', '.join(desconocidos)}")
+        # El id siempre se devuelve: es el cursor de la paginación
+        return list(dict.fromkeys(['id'] + nombres))
+
+    def queryset(self, parametros, campos):
+        queryset = self.modelo.objects.all()
+        for parametro, (lookup, conversor) in self.filtros.items():
+            valor = parametros.get(parametro, '').strip()
+            if valor:
+                queryset = queryset.filter(**{lookup: conversor(valor)})
+        texto = parametros.get('q', '').strip()
+        if texto and self.texto:
+            queryset = self.texto(queryset, texto)
+
+        directos = [nombre for nombre in campos if self.campos[nombre] == nombre]
+        alias = {nombre: F(self.campos[nombre]) for nombre in campos if self.campos[nombre] != nombre}
+        return queryset.order_by('pk').values(*directos, **alias)
+
+    def describir(self):
+        return {
+            'campos': list(self.campos),
+            'por_defecto': self.por_defecto,
+            'filtros': list(self.filtros) + (['q'] if self.texto else []),
+        }
+
+
+RECURSOS = {
+    'inspecciones': Recurso(
+        InspeccionProducto,
+        campos={
+            'id': 'id',
+            'fecha_inspeccion': 'fecha_inspeccion',
+            'piezas_auditadas': 'piezas_auditadas',
+            'resultado_inspeccion': 'resultado_inspeccion',
+            'observaciones': 'observaciones',
+            'numero_orden': 'numero_orden',
+            'asignacion_id': 'operario_certificacion_id',
+            'periodo_id': 'periodo_validacion_id',
+            'periodo_numero': 'periodo_validacion__numero_periodo',
+            'operario_id': 'operario_certificacion__operario_id',
+            'certificacion_id': 'operario_certificacion__certificacion_id',
+            **_a_traves_de('operario_certificacion', CAMPOS_OPERARIO),
+            'auditoria_id': 'auditoria_producto_id',
+            'auditoria_nombre': 'auditoria_producto__nombre',
+            'auditor_id': 'auditor_id',
+            'auditor_nombre': 'auditor__nombre',
+            'auditor_apellidos': 'auditor__apellidos',
+            'fecha_creacion': 'fecha_creacion',
+            'fecha_actualizacion': 'fecha_actualizacion',
+        },
+        por_defecto=[
+            'id', 'fecha_inspeccion', 'piezas_auditadas', 'resultado_inspeccion', 'numero_orden',
+            'asignacion_id', 'periodo_id', 'auditoria_id', 'auditor_id',
+        ],
+        filtros={
+            # Los mismos filtros que lista_inspecciones, más rangos de fecha y resultado
+            'operario': ('operario_certificacion__operario_id', entero),
+            'certificacion': ('operario_certificacion__certificacion_id', entero),
+            'asignacion': ('operario_certificacion_id', entero),
+            'periodo': ('periodo_validacion_id', entero),
+            'fecha_desde': ('fecha_inspeccion__gte', fecha),
+            'fecha_hasta': ('fecha_inspeccion__lte', fecha),
+            'resultado': ('resultado_inspeccion', str),
+        },
+        texto=filtrar_por_texto,
+    ),
+    'periodos': Recurso(
+        PeriodoValidacionCertificacion,
+        campos={
+            'id': 'id',
+            'asignacion_id': 'operario_certificacion_id',
+            'numero_periodo': 'numero_periodo',
+            'fecha_inicio_periodo': 'fecha_inicio_periodo',
+            'fecha_fin_periodo': 'fecha_fin_periodo',
+            'numero_dias_laborales_req': 'numero_dias_laborales_req',
+            'inspecciones_requeridas': 'inspecciones_requeridas',
+            'inspecciones_realizadas': 'inspecciones_realizadas',
+            'esta_completado': 'esta_completado',
+            'fecha_completado': 'fecha_completado',
+            'esta_vigente': 'esta_vigente',
+            'operario_id': 'operario_certificacion__operario_id',
+            'certificacion_id': 'operario_certificacion__certificacion_id',
+            **_a_traves_de('operario_certificacion', CAMPOS_OPERARIO),
+            'fecha_creacion': 'fecha_creacion',
+            'fecha_actualizacion': 'fecha_actualizacion',
+        },
+        por_defecto=[
+            'id', 'asignacion_id', 'numero_periodo', 'fecha_inicio_periodo', 'fecha_fin_periodo',
+            'inspecciones_requeridas', 'inspecciones_realizadas', 'esta_completado', 'esta_vigente',
+        ],
+        filtros={
+            'operario': ('operario_certificacion__operario_id', entero),
+            'certificacion': ('operario_certificacion__certificacion_id', entero),
+            'asignacion': ('operario_certificacion_id', entero),
+            'vigente': ('esta_vigente', booleano),
+            'completado': ('esta_completado', booleano),
+        },
+    ),
+    'asignaciones': Recurso(
+        OperarioCertificacion,
+        campos={
+            'id': 'id',
+            'operario_id': 'operario_id',
+            'certificacion_id': 'certificacion_id',
+            'fecha_asignacion': 'fecha_asignacion',
+            'esta_activa': 'esta_activa',
+            'fecha_caducidad': 'fecha_caducidad',
+            'observaciones': 'observaciones',
+            # Resumen del periodo vigente guardado en la asignación (sin JOIN con periodos)
+            'periodo_actual_id': 'periodo_actual_id',
+            'periodo_actual_numero': 'periodo_actual_numero',
+            'periodo_actual_piezas_realizadas': 'periodo_actual_piezas_realizadas',
+            'periodo_actual_piezas_requeridas': 'periodo_actual_piezas_requeridas',
+            'periodo_actual_fecha_fin': 'periodo_actual_fecha_fin',
+            **CAMPOS_OPERARIO,
+            'fecha_creacion': 'fecha_creacion',
+            'fecha_actualizacion': 'fecha_actualizacion',
+        },
+        por_defecto=['id', 'operario_id', 'certificacion_id', 'fecha_asignacion', 'esta_activa', 'fecha_caducidad'],
+        filtros={
+            'operario': ('operario_id', entero),
+            'certificacion': ('certificacion_id', entero),
+            'activa': ('esta_activa', booleano),
+        },
+    ),
+}
+
+
+def serializar(data):
+    """JSON en bytes: orjson si está disponible (bastante más rápido en listas grandes)"""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, cls=DjangoJSONEncoder, separators=(',', ':')).encode('utf-8')
+
+
+def respuesta_json(data, status=200):
+    return HttpResponse(serializar(data), content_type='application/json', status=status)
+
+
+def codificar_cursor(pk):
+    return base64.urlsafe_b64encode(json.dumps({'id': pk}).encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor):
+    try:
+        relleno = '=' * (-len(cursor) % 4)
+        return int(json.loads(base64.urlsafe_b64decode(cursor + relleno))['id'])
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise ErrorPeticion('Cursor no válido')
+
+
+def api_login_required(vista):
+    """Como login_required, pero responde 401 en JSON en lugar de redirigir al login"""
+    @wraps(vista)
+    def envoltura(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return respuesta_json({'error': 'Autenticación requerida'}, status=401)
+        return vista(request, *args, **kwargs)
+    return envoltura
+
+
+@require_GET
+@api_login_required
+def indice(request):
+    """Recursos disponibles con sus campos y filtros"""
+    return respuesta_json({
+        'version': VERSION,
+        'recursos': {nombre: recurso.describir() for nombre, recurso in RECURSOS.items()},
+    })
+
+
+@require_GET
+@api_login_required
+def listado(request, recurso):
+    """
+    Listado paginado por cursor de un recurso.
+    Parámetros: fields (campos separados por comas), limite, cursor y los filtros del recurso.
+    """
+    definicion = RECURSOS[recurso]
+    try:
+        campos = definicion.seleccionar_campos(request.GET.get('fields', ''))
+        limite = min(max(entero(request.GET.get('limite', LIMITE_POR_DEFECTO)), 1), LIMITE_MAXIMO)
+        queryset = definicion.queryset(request.GET, campos)
+        cursor = request.GET.get('cursor')
+        if cursor:
+            queryset = queryset.filter(pk__gt=decodificar_cursor(cursor))
+    except ErrorPeticion as e:
+        return respuesta_json({'error': str(e)}, status=400)
+
+    # Se pide una fila de más para saber si hay página siguiente sin hacer COUNT(*)
+    resultados = list(queryset[:limite + 1])
+    siguiente = None
+    if len(resultados) > limite:
+        resultados = resultados[:limite]
+        parametros = request.GET.copy()
+        parametros['cursor'] = codificar_cursor(resultados[-1]['id'])
+        siguiente = request.build_absolute_uri(f'{request.path}?{parametros.urlencode()}')
+
+    return respuesta_json({
+        'version': VERSION,
+        'recurso': recurso,
+        'campos': campos,
+        'resultados': resultados,
+        'siguiente': siguiente,
+    })
@@ -0,0 +1,200 @@
+"""
+Matriz de cobertura: qué certificaciones tiene cada operario y en qué estado.
+
+Las asignaciones se leen en una sola consulta agrupada por (operario, certificación)
+sobre el resumen del periodo vigente que ya guarda cada asignación (periodo_actual_*),
+así que no hace falta el JOIN con la tabla de periodos. El resultado se pivota en
+memoria a una lista de filas (operarios) × columnas (certificaciones) y se guarda en la
+caché con un número de versión que se renueva al cambiar asignaciones, operarios o
+certificaciones, al cambiar el periodo vigente de una asignación y, al registrar
+inspecciones, solo si la celda cambia de estado o de % de piezas (ver cambia_celda); se
+guarda junto con el HTML de las filas: las celdas se pintan en Python una vez, no con
+bucles de plantilla en cada petición, para que una matriz de miles de operarios se
+muestre al momento. Leyendo de la copia analítica, la clave incluye además la fecha de
+la copia.
+"""
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max, Q
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.html import format_html
+from django.utils.safestring import mark_safe
+
+from apps.certificaciones.models import Certificacion
+from apps.operarios.models import Operario
+from inspecciones_zimvie.routers import marca_copia_analitica
+
+from .models import OperarioCertificacion
+
+CLAVE_VERSION = 'asignaciones:cobertura:version'
+CLAVE_MATRIZ = 'asignaciones:cobertura:{}:{}:{}'
+RETENCION_MATRIZ = 24 * 60 * 60
+
+# Umbrales de estado de una certificación activa: días restantes del periodo vigente y
+# retraso de las piezas respecto al tiempo transcurrido (puntos porcentuales)
+DIAS_CRITICO = 15
+DIAS_RIESGO = 30
+RETRASO_CRITICO = 40
+RETRASO_RIESGO = 15
+
+# Estado -> (clase CSS de la celda, definida en asignaciones/cobertura.html, y nombre)
+ESTADOS = {
+    'ok': ('c-ok', 'Al día'),
+    'riesgo': ('c-riesgo', 'En riesgo'),
+    'critico': ('c-critico', 'Crítico'),
+    'sin_periodo': ('c-sin', 'Activa sin periodo vigente'),
+    'caducada': ('c-caducada', 'Caducada'),
+}
+
+
+def version_cobertura():
+    version = cache.get(CLAVE_VERSION)
+    if version is None:
+        cache.add(CLAVE_VERSION, uuid.uuid4().hex, None)
+        version = cache.get(CLAVE_VERSION)
+    return version
+
+
+def invalidar_cobertura():
+    """Descarta la matriz cacheada cuando se confirme la transacción"""
+    transaction.on_commit(lambda: cache.set(CLAVE_VERSION, uuid.uuid4().hex, None))
+
+
+def estado_celda(grupo, hoy):
+    """
+    (estado, porcentaje de piezas, días restantes) de una certificación de un operario,
+    a partir de la fila agrupada de sus asignaciones.
+    """
+    if not grupo['activas']:
+        return ('caducada', None, None)
+    if grupo['fecha_fin'] is None or not grupo['requeridas']:
+        return ('sin_periodo', None, None)
+
+    porcentaje = min(round(grupo['realizadas'] / grupo['requeridas'] * 100), 100)
+    dias_restantes = (grupo['fecha_fin'] - hoy).days
+    dias_totales = max((grupo['fecha_fin'] - grupo['fecha_inicio']).days, 1)
+    porcentaje_tiempo = min(max((hoy - grupo['fecha_inicio']).days, 0) / dias_totales * 100, 100)
+    retraso = porcentaje_tiempo - porcentaje
+
+    if porcentaje >= 100:
+        estado = 'ok'
+    elif dias_restantes <= DIAS_CRITICO or retraso >= RETRASO_CRITICO:
+        estado = 'critico'
+    elif dias_restantes <= DIAS_RIESGO or retraso >= RETRASO_RIESGO:
+        estado = 'riesgo'
+    else:
+        estado = 'ok'
+    return (estado, porcentaje, dias_restantes)
+
+
+def cambia_celda(periodo, delta, hoy=None):
+    """
+    True si haber sumado `delta` piezas al periodo vigente (ya incluidas en
+    periodo.inspecciones_realizadas) cambia su celda de la matriz: estado o % de piezas.
+    """
+    hoy = hoy or timezone.now().date()
+    grupo = {
+        'activas': 1,
+        'requeridas': periodo.inspecciones_requeridas,
+        'fecha_inicio': periodo.fecha_inicio_periodo,
+        'fecha_fin': periodo.fecha_fin_periodo,
+    }
+    antes = estado_celda({**grupo, 'realizadas': periodo.inspecciones_realizadas - delta}, hoy)
+    return antes != estado_celda({**grupo, 'realizadas': periodo.inspecciones_realizadas}, hoy)
+
+
+def pivotar(operarios, certificaciones, grupos, hoy):
+    """
+    Coloca las filas agrupadas en una matriz densa operarios × certificaciones.
+    operarios y certificaciones son listas de tuplas cuyo primer elemento es el id;
+    las celdas sin asignación quedan a None.
+    """
+    fila_de = {operario[0]: indice for indice, operario in enumerate(operarios)}
+    columna_de = {certificacion[0]: indice for indice, certificacion in enumerate(certificaciones)}
+    celdas = [[None] * len(certificaciones) for _ in operarios]
+
+    for grupo in grupos:
+        fila = fila_de.get(grupo['operario_id'])
+        columna = columna_de.get(grupo['certificacion_id'])
+        if fila is not None and columna is not None:
+            celdas[fila][columna] = estado_celda(grupo, hoy)
+    return celdas
+
+
+def calcular_matriz(hoy):
+    """Operarios y certificaciones activos con la matriz de estados, cacheada hasta el próximo cambio"""
+    clave = CLAVE_MATRIZ.format(version_cobertura(), hoy.isoformat(), marca_copia_analitica())
+    matriz = cache.get(clave)
+    if matriz is not None:
+        return matriz
+
+    operarios = list(Operario.objects.filter(activo=True).order_by(
+        'nombre', 'apellidos', 'pk'
+    ).values_list('pk', 'codigo', 'nombre', 'apellidos'))
+    certificaciones = list(Certificacion.objects.filter(activa=True).order_by('nombre', 'pk').values_list('pk', 'nombre'))
+
+    # Una fila por (operario, certificación); el resumen del periodo vigente solo existe en
+    # la asignación activa, por eso basta con Max filtrado sobre las activas
+    activa = Q(esta_activa=True)
+    grupos = OperarioCertificacion.objects.values('operario_id', 'certificacion_id').annotate(
+        activas=Count('id', filter=activa),
+        realizadas=Max('periodo_actual_piezas_realizadas', filter=activa),
+        requeridas=Max('periodo_actual_piezas_requeridas', filter=activa),
+        fecha_inicio=Max('periodo_actual_fecha_inicio', filter=activa),
+        fecha_fin=Max('periodo_actual_fecha_fin', filter=activa),
+    ).order_by()
+
+    matriz = {
+        'operarios': operarios,
+        'certificaciones': certificaciones,
+        'celdas': pivotar(operarios, certificaciones, grupos, hoy),
+    }
+    # El HTML de las filas se guarda con los datos: en caliente la vista no pinta nada
+    matriz['filas'], matriz['totales'] = filas_html(matriz)
+    cache.set(clave, matriz, RETENCION_MATRIZ)
+    return matriz
+
+
+def _celda_html(celda):
+    if celda is None:
+        return '<td></td>'
+    estado, porcentaje, dias_restantes = celda
+    clase, titulo = ESTADOS[estado]
+    if porcentaje is None:
+        return f'<td class="{clase}" title="{titulo}">{"—" if estado == "caducada" else "?"}</td>'
+    return f'<td class="{clase}" title="{porcentaje}% de piezas, {dias_restantes} días">{porcentaje}</td>'
+
+
+def filas_html(matriz):
+    """
+    HTML de cada fila de la matriz (una cadena por operario, ya escapada) y los totales
+    de celdas por estado.
+    """
+    filas = []
+    totales = dict.fromkeys(ESTADOS, 0)
+    for (pk, codigo, nombre, apellidos), celdas in zip(matriz['operarios'], matriz['celdas']):
+        for celda in celdas:
+            if celda is not None:
+                totales[celda[0]] += 1
+        operario = format_html(
+            '<th><a href="{}">{}</a> <span>{}</span></th>',
+            reverse('operarios:detalle', args=[pk]),
+            nombre + (f' {apellidos}' if apellidos else ''),
+            codigo or '',
+        )
+        filas.append(mark_safe(operario + ''.join(_celda_html(celda) for celda in celdas)))
+    return filas, totales
+
+
+def texto_celda(celda):
+    """Contenido de una celda en la exportación"""
+    if celda is None:
+        return ''
+    estado, porcentaje, dias_restantes = celda
+    if porcentaje is None:
+        return ESTADOS[estado][1]
+    return f'{ESTADOS[estado][1]} {porcentaje}% ({dias_restantes} d)'
+
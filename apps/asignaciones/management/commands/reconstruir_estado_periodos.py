@@ -0,0 +1,53 @@
+"""
+Comando de gestión para reconstruir el resumen del periodo vigente guardado en cada asignación.
+Uso: python manage.py reconstruir_estado_periodos [--verificar]
+
+Los signals de periodos mantienen el resumen (periodo_actual_*) al día; este comando lo
+recalcula desde la tabla de periodos tras cambios hechos sin pasar por ellos (admin,
+cargas masivas, SQL directo). Con --verificar solo informa de las diferencias.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.asignaciones.models import CAMPOS_ESTADO_PERIODO, OperarioCertificacion
+from apps.inspecciones.models import PeriodoValidacionCertificacion
+
+
+class Command(BaseCommand):
+    help = 'Recalcula el resumen del periodo vigente de cada asignación desde la tabla de periodos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verificar', action='store_true', help='Solo informa de las asignaciones desincronizadas, sin modificarlas')
+
+    def handle(self, *args, **options):
+        desincronizadas = self.desincronizadas()
+        for asignacion_id, campos in desincronizadas:
+            self.stdout.write(f'  Asignación {asignacion_id}: {", ".join(campos)}')
+
+        if options['verificar']:
+            if desincronizadas:
+                raise CommandError(f'{len(desincronizadas)} asignación(es) con el resumen desincronizado')
+            self.stdout.write(self.style.SUCCESS('Todos los resúmenes están sincronizados'))
+            return
+
+        with transaction.atomic():
+            total = OperarioCertificacion.sincronizar_estado_periodo()
+        self.stdout.write(self.style.SUCCESS(
+            f'Resumen recalculado en {total} asignaciones ({len(desincronizadas)} estaban desincronizadas)'
+        ))
+
+    def desincronizadas(self):
+        """Lista de (asignacion_id, campos distintos) comparando el resumen con los periodos vigentes"""
+        vigentes = {
+            periodo.operario_certificacion_id: OperarioCertificacion.estado_periodo(periodo)
+            for periodo in PeriodoValidacionCertificacion.objects.filter(esta_vigente=True).order_by()
+        }
+        vacio = OperarioCertificacion.estado_periodo(None)
+
+        resultado = []
+        for fila in OperarioCertificacion.objects.order_by('pk').values('pk', *CAMPOS_ESTADO_PERIODO):
+            esperado = vigentes.get(fila['pk'], vacio)
+            campos = [campo for campo in CAMPOS_ESTADO_PERIODO if fila[campo] != esperado[campo]]
+            if campos:
+                resultado.append((fila['pk'], campos))
+        return resultado
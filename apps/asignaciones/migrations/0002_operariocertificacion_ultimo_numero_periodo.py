@@ -0,0 +1,33 @@
+# Generated by Django 6.0 on 2026-10-19 09:12
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def rellenar_ultimo_numero_periodo(apps, schema_editor):
+    OperarioCertificacion = apps.get_model('asignaciones', 'OperarioCertificacion')
+    PeriodoValidacionCertificacion = apps.get_model('inspecciones', 'PeriodoValidacionCertificacion')
+
+    ultimo = PeriodoValidacionCertificacion.objects.filter(
+        operario_certificacion=OuterRef('pk')
+    ).order_by('-numero_periodo').values('numero_periodo')[:1]
+
+    OperarioCertificacion.objects.update(ultimo_numero_periodo=Coalesce(Subquery(ultimo), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('asignaciones', '0001_initial'),
+        ('inspecciones', '0002_inspeccionproducto_numero_orden_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='operariocertificacion',
+            name='ultimo_numero_periodo',
+            field=models.IntegerField(default=0, help_text='Secuencia de periodos de la asignación (se incrementa al crear cada periodo)', verbose_name='Último número de periodo'),
+        ),
+        migrations.RunPython(rellenar_ultimo_numero_periodo, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0 on 2026-10-19 10:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('asignaciones', '0002_operariocertificacion_ultimo_numero_periodo'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='operariocertificacion',
+            index=models.Index(fields=['operario', 'esta_activa'], name='asignacion_operario_activa_idx'),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 6.0 on 2026-10-19 16:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def rellenar_estado_periodo(apps, schema_editor):
+    OperarioCertificacion = apps.get_model('asignaciones', 'OperarioCertificacion')
+    PeriodoValidacionCertificacion = apps.get_model('inspecciones', 'PeriodoValidacionCertificacion')
+
+    vigente = PeriodoValidacionCertificacion.objects.filter(
+        operario_certificacion=OuterRef('pk'), esta_vigente=True
+    )
+    columnas = {
+        'periodo_actual_id': 'pk',
+        'periodo_actual_numero': 'numero_periodo',
+        'periodo_actual_piezas_realizadas': 'inspecciones_realizadas',
+        'periodo_actual_piezas_requeridas': 'inspecciones_requeridas',
+        'periodo_actual_fecha_inicio': 'fecha_inicio_periodo',
+        'periodo_actual_fecha_fin': 'fecha_fin_periodo',
+    }
+    OperarioCertificacion.objects.update(**{
+        campo: Subquery(vigente.values(columna)[:1]) for campo, columna in columnas.items()
+    })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('asignaciones', '0003_indices_consultas'),
+        ('inspecciones', '0005_numero_orden_normalizado'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='operariocertificacion',
+            name='periodo_actual',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='inspecciones.periodovalidacioncertificacion', verbose_name='Periodo vigente'),
+        ),
+        migrations.AddField(
+            model_name='operariocertificacion',
+            name='periodo_actual_numero',
+            field=models.IntegerField(blank=True, editable=False, null=True, verbose_name='Número del periodo vigente'),
+        ),
+        migrations.AddField(
+            model_name='operariocertificacion',
+            name='periodo_actual_piezas_realizadas',
+            field=models.IntegerField(blank=True, editable=False, null=True, verbose_name='Piezas realizadas del periodo vigente'),
+        ),
+        migrations.AddField(
+            model_name='operariocertificacion',
+            name='periodo_actual_piezas_requeridas',
+            field=models.IntegerField(blank=True, editable=False, null=True, verbose_name='Piezas requeridas del periodo vigente'),
+        ),
+        migrations.AddField(
+            model_name='operariocertificacion',
+            name='periodo_actual_fecha_inicio',
+            field=models.DateField(blank=True, editable=False, null=True, verbose_name='Inicio del periodo vigente'),
+        ),
+        migrations.AddField(
+            model_name='operariocertificacion',
+            name='periodo_actual_fecha_fin',
+            field=models.DateField(blank=True, editable=False, null=True, verbose_name='Fin del periodo vigente'),
+        ),
+        migrations.RunPython(rellenar_estado_periodo, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models import F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
 from django.utils import timezone
 from django.core.exceptions import ValidationError
@@ -6,6 +8,15 @@ from apps.operarios.models import Operario
 from apps.certificaciones.models import Certificacion
 from .utils import calcular_fecha_fin_periodo, siguiente_dia_laborable
 
+CAMPOS_ESTADO_PERIODO = [
+    'periodo_actual_id',
+    'periodo_actual_numero',
+    'periodo_actual_piezas_realizadas',
+    'periodo_actual_piezas_requeridas',
+    'periodo_actual_fecha_inicio',
+    'periodo_actual_fecha_fin',
+]
+
 
 class OperarioCertificacion(models.Model):
     operario = models.ForeignKey(
@@ -24,6 +35,24 @@ class OperarioCertificacion(models.Model):
     esta_activa = models.BooleanField(default=True, verbose_name="Está activa")
     fecha_caducidad = models.DateField(blank=True, null=True, verbose_name="Fecha de caducidad")
     observaciones = models.TextField(blank=True, null=True, verbose_name="Observaciones")
+    ultimo_numero_periodo = models.IntegerField(default=0, verbose_name="Último número de periodo",
+                                                help_text="Secuencia de periodos de la asignación (se incrementa al crear cada periodo)")
+    # Resumen del periodo vigente (copia desnormalizada que mantienen los signals de periodos,
+    # ver guardar_estado_periodo); todos a None si la asignación no tiene periodo vigente
+    periodo_actual = models.ForeignKey(
+        'inspecciones.PeriodoValidacionCertificacion',
+        on_delete=models.SET_NULL,
+        related_name='+',
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="Periodo vigente"
+    )
+    periodo_actual_numero = models.IntegerField(null=True, blank=True, editable=False, verbose_name="Número del periodo vigente")
+    periodo_actual_piezas_realizadas = models.IntegerField(null=True, blank=True, editable=False, verbose_name="Piezas realizadas del periodo vigente")
+    periodo_actual_piezas_requeridas = models.IntegerField(null=True, blank=True, editable=False, verbose_name="Piezas requeridas del periodo vigente")
+    periodo_actual_fecha_inicio = models.DateField(null=True, blank=True, editable=False, verbose_name="Inicio del periodo vigente")
+    periodo_actual_fecha_fin = models.DateField(null=True, blank=True, editable=False, verbose_name="Fin del periodo vigente")
     fecha_creacion = models.DateTimeField(default=timezone.now, verbose_name="Fecha de creación")
     usuario_creacion = models.ForeignKey(
         User,
@@ -47,11 +76,114 @@ class OperarioCertificacion(models.Model):
         verbose_name = "Asignación Operario-Certificación"
         verbose_name_plural = "Asignaciones Operario-Certificación"
         unique_together = [['operario', 'certificacion', 'fecha_asignacion']]
+        indexes = [
+            # Asignaciones activas de un operario (peticiones AJAX del formulario de inspección)
+            models.Index(fields=['operario', 'esta_activa'], name='asignacion_operario_activa_idx'),
+        ]
         ordering = ['-fecha_asignacion']
 
     def __str__(self):
         return f"{self.operario.nombre_completo} - {self.certificacion.nombre} ({self.fecha_asignacion})"
 
+    def reservar_numero_periodo(self):
+        """
+        Incrementa la secuencia de periodos de la asignación y retorna el número reservado.
+        El UPDATE sobre F() bloquea la fila hasta el final de la transacción, por lo que dos
+        cambios de periodo concurrentes nunca obtienen el mismo número.
+        """
+        OperarioCertificacion.objects.filter(pk=self.pk).update(
+            ultimo_numero_periodo=F('ultimo_numero_periodo') + 1
+        )
+        self.ultimo_numero_periodo = OperarioCertificacion.objects.filter(
+            pk=self.pk
+        ).values_list('ultimo_numero_periodo', flat=True).get()
+        return self.ultimo_numero_periodo
+
+    @classmethod
+    def sincronizar_numeros_periodo(cls, queryset=None):
+        """
+        Recalcula la secuencia de periodos a partir del mayor número de periodo existente.
+        Útil tras crear periodos manualmente (datos de demo, cargas históricas).
+        """
+        from apps.inspecciones.models import PeriodoValidacionCertificacion
+
+        ultimo = PeriodoValidacionCertificacion.objects.filter(
+            operario_certificacion=OuterRef('pk')
+        ).order_by('-numero_periodo').values('numero_periodo')[:1]
+
+        if queryset is None:
+            queryset = cls.objects.all()
+        return queryset.update(ultimo_numero_periodo=Coalesce(Subquery(ultimo), Value(0)))
+
+    @staticmethod
+    def estado_periodo(periodo):
+        """Valores del resumen del periodo vigente para el periodo dado (o vacío si es None)"""
+        if periodo is None:
+            return {campo: None for campo in CAMPOS_ESTADO_PERIODO}
+        return {
+            'periodo_actual_id': periodo.pk,
+            'periodo_actual_numero': periodo.numero_periodo,
+            'periodo_actual_piezas_realizadas': periodo.inspecciones_realizadas,
+            'periodo_actual_piezas_requeridas': periodo.inspecciones_requeridas,
+            'periodo_actual_fecha_inicio': periodo.fecha_inicio_periodo,
+            'periodo_actual_fecha_fin': periodo.fecha_fin_periodo,
+        }
+
+    @classmethod
+    def guardar_estado_periodo(cls, asignacion_id, periodo=None, invalidar=True):
+        """
+        Guarda en la asignación el resumen de su periodo vigente (o lo vacía si periodo es None)
+        con un único UPDATE. Lo llaman los signals cada vez que cambia el periodo vigente.
+        Con invalidar=False no se descarta la matriz de cobertura cacheada (la celda no cambia).
+        """
+        from .cobertura import invalidar_cobertura
+
+        if invalidar:
+            invalidar_cobertura()
+        return cls.objects.filter(pk=asignacion_id).update(**cls.estado_periodo(periodo))
+
+    @classmethod
+    def sincronizar_estado_periodo(cls, queryset=None):
+        """
+        Recalcula el resumen del periodo vigente desde la tabla de periodos.
+        Útil tras modificar periodos sin pasar por los signals (datos de demo, admin, cargas).
+        """
+        from apps.inspecciones.models import PeriodoValidacionCertificacion
+        from .cobertura import invalidar_cobertura
+
+        vigente = PeriodoValidacionCertificacion.objects.filter(
+            operario_certificacion=OuterRef('pk'), esta_vigente=True
+        )
+        columnas = {
+            'periodo_actual_id': 'pk',
+            'periodo_actual_numero': 'numero_periodo',
+            'periodo_actual_piezas_realizadas': 'inspecciones_realizadas',
+            'periodo_actual_piezas_requeridas': 'inspecciones_requeridas',
+            'periodo_actual_fecha_inicio': 'fecha_inicio_periodo',
+            'periodo_actual_fecha_fin': 'fecha_fin_periodo',
+        }
+
+        invalidar_cobertura()
+        if queryset is None:
+            queryset = cls.objects.all()
+        return queryset.update(**{
+            campo: Subquery(vigente.values(columna)[:1]) for campo, columna in columnas.items()
+        })
+
+    @property
+    def periodo_dias_restantes(self):
+        """Días hasta el fin del periodo vigente (None si no tiene)"""
+        if self.periodo_actual_fecha_fin is None:
+            return None
+        return (self.periodo_actual_fecha_fin - timezone.now().date()).days
+
+    @property
+    def periodo_porcentaje_piezas(self):
+        """Porcentaje de piezas del periodo vigente (None si no tiene)"""
+        if not self.periodo_actual_piezas_requeridas:
+            return None
+        return min(round(self.periodo_actual_piezas_realizadas / self.periodo_actual_piezas_requeridas * 100), 100)
+
     def clean(self):
         if self.fecha_caducidad and self.fecha_asignacion:
             if self.fecha_caducidad < self.fecha_asignacion:
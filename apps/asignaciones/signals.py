@@ -1,9 +1,14 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.db import transaction
 from .models import OperarioCertificacion
+from .cobertura import invalidar_cobertura
+from apps.certificaciones.models import Certificacion
+from apps.operarios.models import Operario
 from apps.inspecciones.models import PeriodoValidacionCertificacion, ConfiguracionInspecciones
 from .utils import calcular_fecha_fin_periodo
+from apps.usuarios.dashboard import notificar_periodo
+from apps.inspecciones.prevision import programar_actualizacion
 
 
 @receiver(post_save, sender=OperarioCertificacion)
@@ -13,7 +18,7 @@ def crear_periodo_inicial(sender, instance, created, **kwargs):
     se crea automáticamente el periodo de validación nº1.
     """
     if created and instance.esta_activa:
-        config = ConfiguracionInspecciones.get_activa()
+        config = ConfiguracionInspecciones.get_para_fecha(instance.fecha_asignacion)
         if not config:
             # Valores por defecto si no hay configuración
             dias_laborables = 180
@@ -24,9 +29,9 @@ def crear_periodo_inicial(sender, instance, created, **kwargs):
 
         fecha_fin = calcular_fecha_fin_periodo(instance.fecha_asignacion, dias_laborables)
         
-        PeriodoValidacionCertificacion.objects.create(
+        periodo = PeriodoValidacionCertificacion.objects.create(
             operario_certificacion=instance,
-            numero_periodo=1,
+            numero_periodo=instance.reservar_numero_periodo(),
             fecha_inicio_periodo=instance.fecha_asignacion,
             fecha_fin_periodo=fecha_fin,
             numero_dias_laborales_req=dias_laborables,
@@ -36,3 +41,17 @@ def crear_periodo_inicial(sender, instance, created, **kwargs):
             esta_vigente=True,
             usuario_creacion=instance.usuario_creacion
         )
+        OperarioCertificacion.guardar_estado_periodo(instance.pk, periodo)
+        programar_actualizacion(instance.pk)
+        notificar_periodo(periodo.pk)
+
+
+@receiver(post_save, sender=OperarioCertificacion)
+@receiver(post_delete, sender=OperarioCertificacion)
+@receiver(post_save, sender=Operario)
+@receiver(post_delete, sender=Operario)
+@receiver(post_save, sender=Certificacion)
+@receiver(post_delete, sender=Certificacion)
+def invalidar_matriz_cobertura(sender, **kwargs):
+    """La matriz de cobertura cambia con las asignaciones, los operarios y las certificaciones"""
+    invalidar_cobertura()
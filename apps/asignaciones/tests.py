@@ -1,3 +1,42 @@
+from django.core.cache import cache
 from django.test import TestCase
+from apps.inspecciones.datos_prueba import DatosInspeccionMixin
+from apps.operarios.models import Operario
+from .cobertura import version_cobertura
+from .models import OperarioCertificacion
 
-# Create your tests here.
+
+class InvalidacionCoberturaTests(DatosInspeccionMixin, TestCase):
+    """La matriz de cobertura cacheada solo se descarta si cambia alguna celda"""
+
+    piezas_requeridas = 1000
+    dias_asignacion = 5
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def registrar(self, piezas):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.inspeccion(piezas)
+
+    def test_sin_cambio_de_celda_no_invalida(self):
+        version = version_cobertura()
+        # 2 de 1000 piezas: la celda sigue en el 0 %
+        self.registrar(2)
+        self.assertEqual(version_cobertura(), version)
+
+    def test_cambio_de_porcentaje_invalida(self):
+        version = version_cobertura()
+        self.registrar(50)
+        self.assertNotEqual(version_cobertura(), version)
+
+    def test_nueva_asignacion_invalida(self):
+        version = version_cobertura()
+        with self.captureOnCommitCallbacks(execute=True):
+            OperarioCertificacion.objects.create(
+                operario=Operario.objects.create(nombre='Eva', apellidos='Ruiz'),
+                certificacion=self.certificacion,
+                fecha_asignacion=self.hoy
+            )
+        self.assertNotEqual(version_cobertura(), version)
@@ -7,5 +7,8 @@ urlpatterns = [
     path('', views.lista_asignaciones, name='lista'),
     path('crear/', views.crear_asignacion, name='crear'),
     path('<int:pk>/', views.detalle_asignacion, name='detalle'),
+    path('cobertura/', views.matriz_cobertura, name='cobertura'),
+    path('cobertura/csv/', views.matriz_cobertura_csv, name='cobertura_csv'),
+    path('api/periodos/<int:periodo_id>/inspecciones/', views.obtener_inspecciones_periodo, name='api_inspecciones_periodo'),
     path('api/certificaciones-disponibles/', views.obtener_certificaciones_disponibles, name='api_certificaciones_disponibles'),
 ]
@@ -19,6 +19,19 @@ def siguiente_dia_laborable(fecha):
     return fecha
 
 
+def dias_laborables_entre(inicio, fin):
+    """
+    Retorna el número de días laborables en el intervalo [inicio, fin] (0 si fin < inicio).
+    """
+    dias = (fin - inicio).days + 1
+    semanas, resto = divmod(max(dias, 0), 7)
+    total = semanas * 5
+    for desplazamiento in range(resto):
+        if es_dia_laborable(inicio + timedelta(days=semanas * 7 + desplazamiento)):
+            total += 1
+    return total
+
+
 def calcular_fecha_fin_periodo(fecha_inicio, dias_laborables=180):
     """
     Calcula la fecha de fin de un periodo sumando días laborables.
@@ -1,34 +1,88 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.core.paginator import Paginator, PageNotAnInteger, EmptyPage
 from django.db import transaction
+from django.db.models import Count, F, Max, Min, Q, Sum
+from django.db.models.functions import Coalesce
 from .models import OperarioCertificacion
 from .forms import OperarioCertificacionForm
+from .cobertura import ESTADOS, calcular_matriz, texto_celda
 from apps.operarios.models import Operario
+from apps.certificaciones.models import Certificacion
 from apps.inspecciones.signals import verificar_caducidades_pendientes
+from inspecciones_zimvie.routers import vista_analitica
+
+INSPECCIONES_POR_PAGINA_PERIODO = 20
 
 
 @login_required
 def lista_asignaciones(request):
-    """Lista de asignaciones"""
+    """Lista paginada de asignaciones con el avance del periodo vigente"""
     # Verificar caducidades pendientes al acceder a la lista
     verificar_caducidades_pendientes()
     
+    # El avance del periodo vigente viene del resumen guardado en la asignación (sin JOIN con periodos)
     asignaciones = OperarioCertificacion.objects.select_related(
         'operario', 'certificacion'
-    ).all().order_by('-fecha_asignacion')
+    ).order_by('-fecha_asignacion', '-pk')
+    
+    # Filtros: operario, certificación y estado (activa / caducada)
+    operario_id = request.GET.get('operario', '').strip()
+    certificacion_id = request.GET.get('certificacion', '').strip()
+    
+    operario_filtro = None
+    certificacion_filtro = None
     
-    # Filtro por operario si se proporciona
-    operario_id = request.GET.get('operario')
     if operario_id:
-        asignaciones = asignaciones.filter(operario_id=operario_id)
+        try:
+            operario_filtro = int(operario_id)
+            asignaciones = asignaciones.filter(operario_id=operario_filtro)
+        except (ValueError, TypeError):
+            operario_filtro = None
+    
+    if certificacion_id:
+        try:
+            certificacion_filtro = int(certificacion_id)
+            asignaciones = asignaciones.filter(certificacion_id=certificacion_filtro)
+        except (ValueError, TypeError):
+            certificacion_filtro = None
+    
+    estado = request.GET.get('estado', '')
+    if estado == 'activa':
+        asignaciones = asignaciones.filter(esta_activa=True)
+    elif estado == 'caducada':
+        asignaciones = asignaciones.filter(esta_activa=False)
+    else:
+        estado = ''
     
     operarios = Operario.objects.filter(activo=True).order_by('nombre', 'apellidos')
+    certificaciones = Certificacion.objects.filter(activa=True).order_by('nombre')
+    
+    # Paginación: la página se obtiene en una consulta más el COUNT
+    paginator = Paginator(asignaciones, 25)
+    page = request.GET.get('page', 1)
+    
+    try:
+        asignaciones_paginadas = paginator.page(page)
+    except PageNotAnInteger:
+        asignaciones_paginadas = paginator.page(1)
+    except EmptyPage:
+        asignaciones_paginadas = paginator.page(paginator.num_pages)
+    
+    # Construir query params para mantener filtros en la paginación
+    query_params = request.GET.copy()
+    if 'page' in query_params:
+        del query_params['page']
     
     return render(request, 'asignaciones/lista.html', {
-        'asignaciones': asignaciones,
+        'asignaciones': asignaciones_paginadas,
         'operarios': operarios,
-        'operario_filtro': int(operario_id) if operario_id else None
+        'certificaciones': certificaciones,
+        'operario_filtro': operario_filtro,
+        'certificacion_filtro': certificacion_filtro,
+        'estado_filtro': estado,
+        'query_string': query_params.urlencode(),
     })
 
 
@@ -58,7 +112,16 @@ def detalle_asignacion(request, pk):
         OperarioCertificacion.objects.select_related('operario', 'certificacion'),
         pk=pk
     )
-    periodos = asignacion.periodos.all().order_by('-numero_periodo')
+    # Resumen de inspecciones por periodo en una sola consulta agrupada; el detalle de
+    # cada periodo se pide bajo demanda a obtener_inspecciones_periodo
+    periodos = asignacion.periodos.annotate(
+        total_inspecciones=Count('inspecciones'),
+        total_piezas=Coalesce(Sum('inspecciones__piezas_auditadas'), 0),
+        inspecciones_ok=Count('inspecciones', filter=Q(inspecciones__resultado_inspeccion='OK')),
+        inspecciones_no_ok=Count('inspecciones', filter=Q(inspecciones__resultado_inspeccion='NO OK')),
+        primera_inspeccion=Min('inspecciones__fecha_inspeccion'),
+        ultima_inspeccion=Max('inspecciones__fecha_inspeccion'),
+    ).order_by('-numero_periodo')
     
     return render(request, 'asignaciones/detalle.html', {
         'asignacion': asignacion,
@@ -67,8 +130,54 @@ def detalle_asignacion(request, pk):
 
 
 @login_required
-def obtener_certificaciones_disponibles(request):
-    """Vista AJAX para obtener certificaciones disponibles (no asignadas) para un operario"""
+def obtener_inspecciones_periodo(request, periodo_id):
+    """Vista AJAX: inspecciones de un periodo, paginadas (parámetro page)"""
+    from django.http import JsonResponse
+    from apps.inspecciones.models import InspeccionProducto
+    
+    inspecciones = InspeccionProducto.objects.filter(
+        periodo_validacion_id=periodo_id
+    ).order_by('-fecha_inspeccion', '-fecha_creacion').values(
+        'id',
+        'fecha_inspeccion',
+        'piezas_auditadas',
+        'resultado_inspeccion',
+        'numero_orden',
+        auditoria=F('auditoria_producto__nombre'),
+        auditor_nombre=F('auditor__nombre'),
+        auditor_apellidos=F('auditor__apellidos'),
+    )
+    
+    paginator = Paginator(inspecciones, INSPECCIONES_POR_PAGINA_PERIODO)
+    try:
+        pagina = paginator.page(request.GET.get('page', 1))
+    except PageNotAnInteger:
+        pagina = paginator.page(1)
+    except EmptyPage:
+        pagina = paginator.page(paginator.num_pages)
+    
+    return JsonResponse({
+        'inspecciones': [
+            {
+                'id': inspeccion['id'],
+                'fecha': inspeccion['fecha_inspeccion'].strftime('%d/%m/%Y'),
+                'piezas': inspeccion['piezas_auditadas'],
+                'resultado': inspeccion['resultado_inspeccion'] or '',
+                'numero_orden': inspeccion['numero_orden'] or '',
+                'auditoria': inspeccion['auditoria'] or '',
+                'auditor': ' '.join(filter(None, [inspeccion['auditor_nombre'], inspeccion['auditor_apellidos']])),
+            }
+            for inspeccion in pagina
+        ],
+        'pagina': pagina.number,
+        'paginas': paginator.num_pages,
+        'total': paginator.count,
+    })
+
+
+@login_required
+async def obtener_certificaciones_disponibles(request):
+    """Vista AJAX (asíncrona) para obtener certificaciones disponibles (no asignadas) para un operario"""
     from django.http import JsonResponse
     from apps.certificaciones.models import Certificacion
     
@@ -97,14 +206,53 @@ def obtener_certificaciones_disponibles(request):
         # Obtener certificaciones disponibles (activas y no asignadas)
         certificaciones = Certificacion.objects.filter(
             activa=True
-        ).exclude(id__in=certificaciones_ids).order_by('nombre')
+        ).exclude(id__in=certificaciones_ids).order_by('nombre').values('id', 'nombre')
         
         data = {
-            'certificaciones': [
-                {'id': c.id, 'nombre': c.nombre} for c in certificaciones
-            ]
+            'certificaciones': [c async for c in certificaciones]
         }
         
         return JsonResponse(data)
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
+
+
+@login_required
+@vista_analitica
+def matriz_cobertura(request):
+    """Matriz operarios × certificaciones con el estado de cada certificación"""
+    from django.utils import timezone
+
+    matriz = calcular_matriz(timezone.now().date())
+    leyenda = [
+        {'clase': clase, 'nombre': nombre, 'total': matriz['totales'][estado]}
+        for estado, (clase, nombre) in ESTADOS.items()
+    ]
+    return render(request, 'asignaciones/cobertura.html', {
+        'certificaciones': matriz['certificaciones'],
+        'filas': matriz['filas'],
+        'leyenda': leyenda,
+    })
+
+
+@login_required
+@vista_analitica
+def matriz_cobertura_csv(request):
+    """Exporta la matriz de cobertura a CSV (separado por ';' para abrirlo en Excel)"""
+    import csv
+    from django.http import HttpResponse
+    from django.utils import timezone
+
+    hoy = timezone.now().date()
+    matriz = calcular_matriz(hoy)
+
+    response = HttpResponse(content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="cobertura_{hoy:%Y%m%d}.csv"'
+    response.write('\ufeff')
+    writer = csv.writer(response, delimiter=';')
+    writer.writerow(['Código', 'Operario'] + [nombre for _, nombre in matriz['certificaciones']])
+    for (_, codigo, nombre, apellidos), celdas in zip(matriz['operarios'], matriz['celdas']):
+        writer.writerow(
+            [codigo, f"{nombre} {apellidos or ''}".strip()] + [texto_celda(celda) for celda in celdas]
+        )
+    return response
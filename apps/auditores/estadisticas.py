@@ -0,0 +1,231 @@
+"""
+Estadísticas de inspección por auditor sobre todos los operarios.
+
+Cada métrica sale de una sola consulta agrupada por auditor (no de recorrer los operarios
+con Operario.estadisticas_por_auditor). De la serie mensual de los últimos meses se guardan
+en la caché los meses ya cerrados, con un número de versión que los signals de inspecciones
+renuevan solo cuando se crea, edita o borra una inspección de un mes cerrado (igual que la
+configuración de inspecciones); el mes en curso, que cambia con cada inspección, se consulta
+siempre. Leyendo de la copia analítica, la clave incluye además la fecha de la copia.
+"""
+import uuid
+from datetime import date
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max, Min, Q, Sum
+from django.db.models.functions import TruncMonth
+
+from django.utils import timezone
+
+from apps.inspecciones.models import InspeccionArchivada, InspeccionProducto
+from inspecciones_zimvie.routers import marca_copia_analitica
+
+from .models import Auditor
+
+CLAVE_VERSION = 'auditores:estadisticas:version'
+CLAVE_SERIES = 'auditores:estadisticas:series:{}:{}:{}:{}'
+# Segundos que se conservan los meses cerrados aunque no cambie nada (la clave incluye además el mes)
+RETENCION_SERIES = 24 * 60 * 60
+
+# Un auditor es "indulgente" si su tasa de OK supera la global en UMBRAL_TASA_OK puntos
+# con al menos MIN_INSPECCIONES; la carga está desequilibrada fuera de [0.5, 1.5] × la media
+UMBRAL_TASA_OK = 10
+MIN_INSPECCIONES = 20
+CARGA_MINIMA = 0.5
+CARGA_MAXIMA = 1.5
+
+MESES_ESP = {
+    1: 'Ene', 2: 'Feb', 3: 'Mar', 4: 'Abr', 5: 'May', 6: 'Jun',
+    7: 'Jul', 8: 'Ago', 9: 'Sep', 10: 'Oct', 11: 'Nov', 12: 'Dic'
+}
+
+
+def version_estadisticas():
+    version = cache.get(CLAVE_VERSION)
+    if version is None:
+        cache.add(CLAVE_VERSION, uuid.uuid4().hex, None)
+        version = cache.get(CLAVE_VERSION)
+    return version
+
+
+def invalidar_estadisticas(*fechas):
+    """
+    Descarta las series cacheadas cuando se confirme la transacción, si alguna de las
+    fechas de inspección es de un mes ya cerrado (sin fechas, siempre)
+    """
+    inicio_mes = timezone.now().date().replace(day=1)
+    if fechas and all(fecha is None or fecha >= inicio_mes for fecha in fechas):
+        return
+    transaction.on_commit(lambda: cache.set(CLAVE_VERSION, uuid.uuid4().hex, None))
+
+
+def _tasa(ok, total):
+    return round(ok / total * 100, 2) if total > 0 else 0
+
+
+def _agrupar_por_auditor(modelo, desde, hasta):
+    inspecciones = modelo.objects.filter(auditor__isnull=False)
+    if desde:
+        inspecciones = inspecciones.filter(fecha_inspeccion__gte=desde)
+    if hasta:
+        inspecciones = inspecciones.filter(fecha_inspeccion__lte=hasta)
+
+    return inspecciones.values(
+        'auditor_id', 'auditor__nombre', 'auditor__apellidos', 'auditor__activo'
+    ).annotate(
+        total_inspecciones=Count('id'),
+        total_piezas=Sum('piezas_auditadas'),
+        ok=Count('id', filter=Q(resultado_inspeccion='OK')),
+        no_ok=Count('id', filter=Q(resultado_inspeccion='NO OK')),
+        dias_con_inspecciones=Count('fecha_inspeccion', distinct=True),
+        operarios=Count('operario_certificacion__operario', distinct=True),
+        primera_inspeccion=Min('fecha_inspeccion'),
+        ultima_inspeccion=Max('fecha_inspeccion'),
+    ).order_by('-total_inspecciones')
+
+
+def _sumar_archivo(resultados, desde, hasta):
+    """
+    Añade a las filas de la tabla principal las del archivo histórico. Los totales se suman;
+    los días y operarios distintos se recuentan sobre las dos tablas juntas.
+    """
+    from apps.inspecciones.archivo import contar_distintos_por_auditor
+
+    por_auditor = {r['auditor_id']: r for r in resultados}
+    for r in _agrupar_por_auditor(InspeccionArchivada, desde, hasta):
+        actual = por_auditor.get(r['auditor_id'])
+        if actual is None:
+            por_auditor[r['auditor_id']] = r
+            continue
+        for campo in ('total_inspecciones', 'ok', 'no_ok'):
+            actual[campo] += r[campo]
+        actual['total_piezas'] = (actual['total_piezas'] or 0) + (r['total_piezas'] or 0)
+        actual['primera_inspeccion'] = min(actual['primera_inspeccion'], r['primera_inspeccion'])
+        actual['ultima_inspeccion'] = max(actual['ultima_inspeccion'], r['ultima_inspeccion'])
+
+    dias = contar_distintos_por_auditor('fecha_inspeccion', desde, hasta)
+    operarios = contar_distintos_por_auditor('operario_certificacion__operario_id', desde, hasta)
+    for auditor_id, r in por_auditor.items():
+        r['dias_con_inspecciones'] = dias[auditor_id]
+        r['operarios'] = operarios[auditor_id]
+    return sorted(por_auditor.values(), key=lambda r: -r['total_inspecciones'])
+
+
+def resumen_por_auditor(desde=None, hasta=None, historico=False):
+    """
+    Métricas de cada auditor en el rango de fechas (ambos extremos incluidos), en una
+    consulta agrupada. Con historico=True se incluye el archivo histórico. Retorna
+    (filas, globales); los auditores sin inspecciones en el rango no aparecen.
+    """
+    resultados = list(_agrupar_por_auditor(InspeccionProducto, desde, hasta))
+    if historico:
+        resultados = _sumar_archivo(resultados, desde, hasta)
+
+    total = sum(r['total_inspecciones'] for r in resultados)
+    total_ok = sum(r['ok'] for r in resultados)
+    tasa_global = _tasa(total_ok, total)
+    media = total / len(resultados) if resultados else 0
+
+    filas = []
+    for r in resultados:
+        nombre_completo = r['auditor__nombre']
+        if r['auditor__apellidos']:
+            nombre_completo += f" {r['auditor__apellidos']}"
+        tasa_exito = _tasa(r['ok'], r['total_inspecciones'])
+        carga = round(r['total_inspecciones'] / media, 2) if media else 0
+        filas.append({
+            'auditor_id': r['auditor_id'],
+            'auditor_nombre': nombre_completo,
+            'activo': r['auditor__activo'],
+            'total_inspecciones': r['total_inspecciones'],
+            'total_piezas': r['total_piezas'] or 0,
+            'ok': r['ok'],
+            'no_ok': r['no_ok'],
+            'tasa_exito': tasa_exito,
+            'diferencia_tasa': round(tasa_exito - tasa_global, 2),
+            'dias_con_inspecciones': r['dias_con_inspecciones'],
+            'piezas_por_dia': round((r['total_piezas'] or 0) / r['dias_con_inspecciones'], 1),
+            'operarios': r['operarios'],
+            'primera_inspeccion': r['primera_inspeccion'],
+            'ultima_inspeccion': r['ultima_inspeccion'],
+            'cuota': _tasa(r['total_inspecciones'], total),
+            'carga': carga,
+            'indulgente': (r['total_inspecciones'] >= MIN_INSPECCIONES
+                           and tasa_exito - tasa_global >= UMBRAL_TASA_OK),
+            'desequilibrado': not (CARGA_MINIMA <= carga <= CARGA_MAXIMA),
+        })
+
+    globales = {
+        'auditores': len(filas),
+        'total_inspecciones': total,
+        'total_piezas': sum(f['total_piezas'] for f in filas),
+        'tasa_exito': tasa_global,
+        'media_inspecciones': round(media, 1),
+    }
+    return filas, globales
+
+
+def meses_hasta(hoy, meses):
+    """Primer día de cada uno de los `meses` últimos meses, hasta el de `hoy` incluido"""
+    anio, mes = hoy.year, hoy.month
+    inicios = []
+    for _ in range(meses):
+        inicios.append(date(anio, mes, 1))
+        anio, mes = (anio, mes - 1) if mes > 1 else (anio - 1, 12)
+    return inicios[::-1]
+
+
+def _filas_mensuales(desde, hasta=None):
+    """Inspecciones, piezas y OK por auditor y mes desde `desde` (hasta `hasta` excluido)"""
+    inspecciones = InspeccionProducto.objects.filter(auditor__isnull=False, fecha_inspeccion__gte=desde)
+    if hasta:
+        inspecciones = inspecciones.filter(fecha_inspeccion__lt=hasta)
+    return list(inspecciones.annotate(mes=TruncMonth('fecha_inspeccion')).values('auditor_id', 'mes').annotate(
+        inspecciones=Count('id'),
+        piezas=Sum('piezas_auditadas'),
+        ok=Count('id', filter=Q(resultado_inspeccion='OK')),
+    ).order_by())
+
+
+def series_mensuales(hoy, meses=12):
+    """
+    Serie mensual de cada auditor en los últimos `meses` meses, con una consulta agrupada
+    por auditor y mes para el mes en curso y otra para los meses cerrados (cacheada hasta
+    que cambie una inspección de esos meses). Retorna
+    {'labels': [...], 'auditores': {auditor_id: {'inspecciones', 'piezas', 'tasa_exito'}}},
+    con todos los meses (a cero los que no tienen inspecciones).
+    """
+    inicios = meses_hasta(hoy, meses)
+    clave = CLAVE_SERIES.format(version_estadisticas(), meses, inicios[-1].isoformat(), marca_copia_analitica())
+    cerrados = cache.get(clave)
+    if cerrados is None:
+        cerrados = _filas_mensuales(inicios[0], inicios[-1])
+        cache.set(clave, cerrados, RETENCION_SERIES)
+
+    posicion = {inicio: indice for indice, inicio in enumerate(inicios)}
+    por_auditor = {}
+    for fila in cerrados + _filas_mensuales(inicios[-1]):
+        indice = posicion.get(fila['mes'])
+        if indice is None:
+            # Inspecciones con fecha futura: fuera de la serie
+            continue
+        serie = por_auditor.setdefault(fila['auditor_id'], {
+            'inspecciones': [0] * meses,
+            'piezas': [0] * meses,
+            'tasa_exito': [0] * meses,
+        })
+        serie['inspecciones'][indice] = fila['inspecciones']
+        serie['piezas'][indice] = fila['piezas'] or 0
+        serie['tasa_exito'][indice] = _tasa(fila['ok'], fila['inspecciones'])
+
+    return {
+        'labels': [f"{MESES_ESP[inicio.month]} {inicio.year}" for inicio in inicios],
+        'auditores': por_auditor,
+    }
+
+
+def auditores_sin_inspecciones(filas):
+    """Auditores activos que no aparecen en el resumen (sin inspecciones en el rango)"""
+    con_inspecciones = [f['auditor_id'] for f in filas]
+    return list(Auditor.objects.filter(activo=True).exclude(pk__in=con_inspecciones).order_by('nombre', 'apellidos'))
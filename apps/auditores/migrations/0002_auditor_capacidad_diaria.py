@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-19 17:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auditores', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auditor',
+            name='capacidad_diaria',
+            field=models.PositiveIntegerField(default=10, help_text='Piezas que puede auditar en un día laborable (para el plan de inspecciones)', verbose_name='Capacidad diaria'),
+        ),
+    ]
@@ -8,6 +8,8 @@ class Auditor(models.Model):
     apellidos = models.CharField(max_length=100, blank=True, null=True, verbose_name="Apellidos")
     codigo = models.CharField(max_length=50, blank=True, null=True, verbose_name="Código")
     activo = models.BooleanField(default=True, verbose_name="Activo")
+    capacidad_diaria = models.PositiveIntegerField(default=10, verbose_name="Capacidad diaria",
+                                                   help_text="Piezas que puede auditar en un día laborable (para el plan de inspecciones)")
     fecha_creacion = models.DateTimeField(default=timezone.now, verbose_name="Fecha de creación")
     usuario_creacion = models.ForeignKey(
         User,
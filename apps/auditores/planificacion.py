@@ -0,0 +1,140 @@
+"""
+Plan de inspecciones: qué operario debe auditar cada auditor cada día laborable.
+
+Entran los periodos vigentes con piezas pendientes y los auditores activos con su
+capacidad diaria. Cada día del plan los periodos se ordenan por urgencia (piezas que
+faltan por cada día laborable que le queda al periodo) en un montículo, y los auditores
+en otro por capacidad libre: el periodo más urgente se asigna al auditor más libre, con
+un máximo de PIEZAS_POR_VISITA piezas, hasta agotar periodos o capacidad. Un periodo
+recibe como mucho una visita al día. Es un reparto voraz, sin óptimo garantizado, pero
+cuesta O(P log P) por día y resuelve miles de periodos en milisegundos.
+"""
+import heapq
+
+from django.db.models import F
+
+from apps.asignaciones.utils import dias_laborables_entre, es_dia_laborable, siguiente_dia_laborable
+from apps.inspecciones.models import PeriodoValidacionCertificacion
+
+from .models import Auditor
+
+# Máximo de piezas de un mismo periodo en una visita (un día)
+PIEZAS_POR_VISITA = 5
+# Días laborables del plan por defecto y máximo admitido en la vista
+DIAS_PLAN = 10
+MAX_DIAS_PLAN = 60
+
+
+def dias_del_plan(desde, dias):
+    """Los `dias` primeros días laborables a partir de `desde` (incluido si es laborable)"""
+    fecha = desde if es_dia_laborable(desde) else siguiente_dia_laborable(desde)
+    fechas = []
+    for _ in range(dias):
+        fechas.append(fecha)
+        fecha = siguiente_dia_laborable(fecha)
+    return fechas
+
+
+def cargar_periodos(desde):
+    """Periodos vigentes con piezas pendientes que siguen abiertos en `desde`, en una consulta"""
+    return list(PeriodoValidacionCertificacion.objects.filter(
+        esta_vigente=True,
+        esta_completado=False,
+        fecha_fin_periodo__gte=desde,
+        inspecciones_realizadas__lt=F('inspecciones_requeridas'),
+    ).order_by().values(
+        'id', 'numero_periodo', 'fecha_fin_periodo', 'inspecciones_requeridas', 'inspecciones_realizadas',
+        'operario_certificacion_id',
+        operario_codigo=F('operario_certificacion__operario__codigo'),
+        operario_nombre=F('operario_certificacion__operario__nombre'),
+        operario_apellidos=F('operario_certificacion__operario__apellidos'),
+        certificacion_nombre=F('operario_certificacion__certificacion__nombre'),
+    ))
+
+
+def cargar_auditores():
+    """Auditores activos con capacidad, en una consulta"""
+    return list(Auditor.objects.filter(activo=True, capacidad_diaria__gt=0).order_by('nombre', 'apellidos'))
+
+
+def planificar(periodos, auditores, fechas):
+    """
+    Reparte las piezas pendientes de `periodos` entre `auditores` en los días `fechas`.
+
+    periodos: dicts con 'id', 'fecha_fin_periodo', 'inspecciones_requeridas' e 'inspecciones_realizadas'
+    auditores: Auditor (o cualquier objeto con capacidad_diaria)
+    Retorna (visitas, pendientes): la lista de visitas en orden de día y prioridad, y las
+    piezas que quedan por periodo al terminar el plan.
+    """
+    if not fechas:
+        return [], {p['id']: p['inspecciones_requeridas'] - p['inspecciones_realizadas'] for p in periodos}
+
+    por_id = {p['id']: p for p in periodos}
+    pendientes = {}
+    # Días laborables que le quedan a cada periodo contando el día del plan; como el plan
+    # solo recorre días laborables, basta con restar uno por día
+    restantes = {}
+    for p in periodos:
+        pendientes[p['id']] = p['inspecciones_requeridas'] - p['inspecciones_realizadas']
+        restantes[p['id']] = dias_laborables_entre(fechas[0], p['fecha_fin_periodo'])
+
+    visitas = []
+    for fecha in fechas:
+        cola = [
+            (-(pendientes[pk] / restantes[pk]), por_id[pk]['fecha_fin_periodo'], pk)
+            for pk in pendientes
+            if pendientes[pk] > 0 and restantes[pk] > 0
+        ]
+        heapq.heapify(cola)
+        libres = [(-auditor.capacidad_diaria, indice) for indice, auditor in enumerate(auditores)]
+        heapq.heapify(libres)
+
+        while cola and libres:
+            urgencia, _, pk = heapq.heappop(cola)
+            libre, indice = heapq.heappop(libres)
+            piezas = min(pendientes[pk], PIEZAS_POR_VISITA, -libre)
+            pendientes[pk] -= piezas
+            visitas.append({
+                'fecha': fecha,
+                'auditor': auditores[indice],
+                'periodo': por_id[pk],
+                'piezas': piezas,
+                'pendientes': pendientes[pk],
+                'dias_restantes': restantes[pk],
+                'urgencia': round(-urgencia, 2),
+            })
+            if -libre > piezas:
+                heapq.heappush(libres, (libre + piezas, indice))
+
+        for pk in restantes:
+            restantes[pk] -= 1
+
+    return visitas, pendientes
+
+
+def calcular_plan(desde, dias=DIAS_PLAN):
+    """
+    Plan de inspecciones de `dias` días laborables a partir de `desde`, con su resumen.
+    Los periodos que terminan dentro del plan y aun así no se completan son los que no
+    llegan a tiempo con la capacidad actual.
+    """
+    fechas = dias_del_plan(desde, dias)
+    periodos = cargar_periodos(desde)
+    auditores = cargar_auditores()
+    visitas, pendientes = planificar(periodos, auditores, fechas)
+
+    ultimo_dia = fechas[-1] if fechas else desde
+    sin_cubrir = sorted(
+        (p for p in periodos if pendientes[p['id']] > 0 and p['fecha_fin_periodo'] <= ultimo_dia),
+        key=lambda p: p['fecha_fin_periodo']
+    )
+    return {
+        'fechas': fechas,
+        'visitas': visitas,
+        'auditores': auditores,
+        'sin_cubrir': [{'periodo': p, 'pendientes': pendientes[p['id']]} for p in sin_cubrir],
+        'total_periodos': len(periodos),
+        'piezas_pendientes': sum(p['inspecciones_requeridas'] - p['inspecciones_realizadas'] for p in periodos),
+        'piezas_planificadas': sum(visita['piezas'] for visita in visitas),
+        'capacidad_total': sum(auditor.capacidad_diaria for auditor in auditores) * len(fechas),
+    }
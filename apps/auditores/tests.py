@@ -1,3 +1,170 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from types import SimpleNamespace
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from apps.asignaciones.models import OperarioCertificacion
+from apps.certificaciones.models import Certificacion
+from apps.inspecciones.datos_prueba import DatosInspeccionMixin
+from apps.inspecciones.models import ConfiguracionInspecciones
+from apps.operarios.models import Operario
+from .estadisticas import series_mensuales, version_estadisticas
+from .models import Auditor
+from .planificacion import PIEZAS_POR_VISITA, calcular_plan, dias_del_plan, planificar
 
-# Create your tests here.
+
+class SeriesMensualesTests(DatosInspeccionMixin, TestCase):
+    """Caché de los meses cerrados de la serie mensual por auditor"""
+
+    piezas_requeridas = 1000
+    # Más de 40 días antes del último día del mes pasado, sea cual sea hoy
+    dias_asignacion = 75
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.mes_pasado = cls.hoy.replace(day=1) - timedelta(days=1)
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def registrar(self, fecha):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.inspeccion(5, fecha=fecha)
+
+    def test_el_mes_en_curso_no_invalida_los_meses_cerrados(self):
+        self.registrar(self.mes_pasado)
+        version = version_estadisticas()
+        series_mensuales(self.hoy)
+
+        self.registrar(self.hoy)
+        self.assertEqual(version_estadisticas(), version)
+        serie = series_mensuales(self.hoy)['auditores'][self.auditor.pk]['inspecciones']
+        self.assertEqual(serie[-2:], [1, 1])
+
+    def test_editar_un_mes_cerrado_invalida(self):
+        inspeccion = self.registrar(self.mes_pasado)
+        series_mensuales(self.hoy)
+        version = version_estadisticas()
+
+        inspeccion.piezas_auditadas = 8
+        with self.captureOnCommitCallbacks(execute=True):
+            inspeccion.save()
+        self.assertNotEqual(version_estadisticas(), version)
+        self.assertEqual(series_mensuales(self.hoy)['auditores'][self.auditor.pk]['piezas'][-2], 8)
+
+    def test_mover_al_mes_en_curso_invalida(self):
+        inspeccion = self.registrar(self.mes_pasado)
+        version = version_estadisticas()
+
+        inspeccion.fecha_inspeccion = self.hoy
+        with self.captureOnCommitCallbacks(execute=True):
+            inspeccion.save()
+        self.assertNotEqual(version_estadisticas(), version)
+
+
+class PlanificarTests(SimpleTestCase):
+    """Reparto voraz de planificar() sobre casos pequeños calculados a mano"""
+
+    # Lunes; el plan de dos días cubre el lunes 19 y el martes 20
+    lunes = date(2026, 10, 19)
+
+    def periodo(self, pk, pendientes, fin):
+        return {
+            'id': pk, 'fecha_fin_periodo': fin,
+            'inspecciones_requeridas': 29, 'inspecciones_realizadas': 29 - pendientes,
+        }
+
+    def auditores(self, *capacidades):
+        return [SimpleNamespace(nombre=f'A{i}', capacidad_diaria=c) for i, c in enumerate(capacidades)]
+
+    def resumen(self, visitas):
+        return [(v['fecha'].day, v['auditor'].nombre, v['periodo']['id'], v['piezas']) for v in visitas]
+
+    def test_una_visita_por_periodo_y_dia(self):
+        fechas = dias_del_plan(self.lunes, 2)
+        visitas, pendientes = planificar([self.periodo(1, 20, date(2026, 12, 31))], self.auditores(100), fechas)
+
+        # Aunque sobra capacidad, el periodo solo recibe una visita (de 5 piezas) cada día
+        self.assertEqual(self.resumen(visitas), [(19, 'A0', 1, 5), (20, 'A0', 1, 5)])
+        self.assertEqual(pendientes, {1: 10})
+
+    def test_capacidad_consumida_por_auditor(self):
+        fin = date(2026, 12, 31)
+        periodos = [self.periodo(1, 10, fin), self.periodo(2, 9, fin), self.periodo(3, 8, fin)]
+
+        visitas, pendientes = planificar(periodos, self.auditores(7, 3), [self.lunes])
+
+        # El periodo más urgente va al auditor más libre (A0: 7 -> 2), el siguiente a A1
+        # (3 -> 0) y el tercero a lo que le queda a A0
+        self.assertEqual(self.resumen(visitas), [(19, 'A0', 1, 5), (19, 'A1', 2, 3), (19, 'A0', 3, 2)])
+        self.assertEqual(pendientes, {1: 5, 2: 6, 3: 6})
+
+    def test_prioridad_por_piezas_y_dias_restantes(self):
+        periodos = [
+            self.periodo(1, 10, date(2026, 10, 30)),  # 10 piezas en 10 días laborables: 1,0
+            self.periodo(2, 4, date(2026, 10, 20)),   # 4 piezas en 2 días: 2,0
+            self.periodo(3, 20, date(2026, 12, 11)),  # 20 piezas en 40 días: 0,5
+        ]
+
+        visitas, pendientes = planificar(periodos, self.auditores(5), [self.lunes])
+
+        self.assertEqual(self.resumen(visitas), [(19, 'A0', 2, 4), (19, 'A0', 1, 1)])
+        self.assertEqual([v['urgencia'] for v in visitas], [2.0, 1.0])
+        self.assertEqual([v['dias_restantes'] for v in visitas], [2, 10])
+        self.assertEqual(pendientes, {1: 9, 2: 0, 3: 20})
+
+    def test_piezas_por_visita_limitadas_por_capacidad_y_pendientes(self):
+        fin = date(2026, 12, 31)
+        casos = [
+            # (capacidad, pendientes, piezas de la visita)
+            (3, 10, 3),
+            (12, 10, PIEZAS_POR_VISITA),
+            (12, 2, 2),
+        ]
+        for capacidad, pendientes, piezas in casos:
+            with self.subTest(capacidad=capacidad, pendientes=pendientes):
+                visitas, _ = planificar([self.periodo(1, pendientes, fin)], self.auditores(capacidad), [self.lunes])
+                self.assertEqual([v['piezas'] for v in visitas], [piezas])
+
+    def test_periodo_terminado_no_se_visita(self):
+        fechas = dias_del_plan(self.lunes, 2)
+        visitas, pendientes = planificar([self.periodo(1, 20, self.lunes)], self.auditores(10), fechas)
+
+        self.assertEqual(self.resumen(visitas), [(19, 'A0', 1, 5)])
+        self.assertEqual(pendientes, {1: 15})
+
+
+class CalcularPlanTests(TestCase):
+    """Periodos que terminan dentro del plan sin completarse"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.lunes = date(2026, 10, 19)
+        ConfiguracionInspecciones.objects.create(numero_dias_laborales_req=180, inspecciones_minimas=29)
+        certificacion = Certificacion.objects.create(nombre='Pulido')
+        Auditor.objects.create(nombre='Luis', capacidad_diaria=5)
+        cls.asignaciones = [
+            OperarioCertificacion.objects.create(
+                operario=Operario.objects.create(nombre=nombre, apellidos='López'),
+                certificacion=certificacion,
+                fecha_asignacion=cls.lunes - timedelta(days=7)
+            )
+            for nombre in ('Ana', 'Eva')
+        ]
+        # El periodo de Ana termina el martes, dentro del plan
+        cls.asignaciones[0].periodos.filter(esta_vigente=True).update(fecha_fin_periodo=cls.lunes + timedelta(days=1))
+
+    def setUp(self):
+        ConfiguracionInspecciones.invalidar_cache()
+
+    def test_sin_cubrir(self):
+        plan = calcular_plan(self.lunes, dias=2)
+
+        # Ana es más urgente (29 piezas en 2 días) y se lleva las dos visitas: quedan 19
+        self.assertEqual(plan['piezas_planificadas'], 10)
+        self.assertEqual(plan['capacidad_total'], 10)
+        self.assertEqual(
+            [(fila['periodo']['operario_certificacion_id'], fila['pendientes']) for fila in plan['sin_cubrir']],
+            [(self.asignaciones[0].pk, 19)]
+        )
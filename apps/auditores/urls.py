@@ -7,4 +7,7 @@ urlpatterns = [
     path('', views.lista_auditores, name='lista'),
     path('crear/', views.crear_auditor, name='crear'),
     path('<int:pk>/editar/', views.editar_auditor, name='editar'),
+    path('plan/', views.plan_inspecciones, name='plan'),
+    path('plan/csv/', views.plan_inspecciones_csv, name='plan_csv'),
+    path('estadisticas/', views.estadisticas_auditores, name='estadisticas'),
 ]
@@ -1,8 +1,12 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.utils import timezone
 from .models import Auditor
 from .forms import AuditorForm
+from .estadisticas import auditores_sin_inspecciones, resumen_por_auditor, series_mensuales
+from .planificacion import DIAS_PLAN, MAX_DIAS_PLAN, calcular_plan
+from inspecciones_zimvie.routers import vista_analitica
 
 
 @login_required
@@ -46,3 +50,107 @@ def editar_auditor(request, pk):
         form = AuditorForm(instance=auditor)
     
     return render(request, 'auditores/form.html', {'form': form, 'titulo': 'Editar Auditor', 'auditor': auditor})
+
+
+def _dias_plan(request):
+    """Días laborables del plan pedidos en ?dias= (por defecto DIAS_PLAN, como mucho MAX_DIAS_PLAN)"""
+    try:
+        dias = int(request.GET.get('dias', DIAS_PLAN))
+    except (TypeError, ValueError):
+        dias = DIAS_PLAN
+    return min(max(dias, 1), MAX_DIAS_PLAN)
+
+
+@login_required
+def plan_inspecciones(request):
+    """Plan de inspecciones por día y auditor para los periodos vigentes"""
+    dias = _dias_plan(request)
+    plan = calcular_plan(timezone.now().date(), dias)
+
+    # Visitas agrupadas por día (ya vienen ordenadas por día y prioridad)
+    por_dia = {fecha: [] for fecha in plan['fechas']}
+    for visita in plan['visitas']:
+        por_dia[visita['fecha']].append(visita)
+    plan['dias'] = [
+        {'fecha': fecha, 'visitas': visitas, 'piezas': sum(v['piezas'] for v in visitas)}
+        for fecha, visitas in por_dia.items()
+    ]
+
+    return render(request, 'auditores/plan.html', {'plan': plan, 'dias': dias})
+
+
+@login_required
+def plan_inspecciones_csv(request):
+    """Exporta el plan de inspecciones a CSV (separado por ';' para abrirlo en Excel)"""
+    import csv
+    from django.http import HttpResponse
+
+    dias = _dias_plan(request)
+    hoy = timezone.now().date()
+    plan = calcular_plan(hoy, dias)
+
+    response = HttpResponse(content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="plan_inspecciones_{hoy:%Y%m%d}.csv"'
+    response.write('\ufeff')
+    writer = csv.writer(response, delimiter=';')
+    writer.writerow([
+        'Fecha', 'Auditor', 'Código operario', 'Operario', 'Certificación', 'Periodo',
+        'Piezas', 'Pendientes tras la visita', 'Fin del periodo', 'Días laborables restantes', 'Urgencia',
+    ])
+    for visita in plan['visitas']:
+        periodo = visita['periodo']
+        writer.writerow([
+            visita['fecha'].isoformat(),
+            visita['auditor'].nombre_completo,
+            periodo['operario_codigo'],
+            f"{periodo['operario_nombre']} {periodo['operario_apellidos'] or ''}".strip(),
+            periodo['certificacion_nombre'],
+            periodo['numero_periodo'],
+            visita['piezas'],
+            visita['pendientes'],
+            periodo['fecha_fin_periodo'].isoformat(),
+            visita['dias_restantes'],
+            str(visita['urgencia']).replace('.', ','),
+        ])
+    return response
+
+
+@login_required
+@vista_analitica
+def estadisticas_auditores(request):
+    """Inspecciones, tasa de OK y piezas por día de cada auditor, con su serie mensual"""
+    import json
+    from datetime import date
+
+    desde = hasta = None
+    try:
+        desde = date.fromisoformat(request.GET.get('desde', ''))
+    except ValueError:
+        pass
+    try:
+        hasta = date.fromisoformat(request.GET.get('hasta', ''))
+    except ValueError:
+        pass
+
+    # ?historico=1 incluye las inspecciones archivadas (archivar_historico)
+    historico = request.GET.get('historico') == '1'
+
+    filas, globales = resumen_por_auditor(desde, hasta, historico)
+    series = series_mensuales(timezone.now().date())
+    grafico = {
+        'labels': series['labels'],
+        'datasets': [
+            {'label': fila['auditor_nombre'], 'data': series['auditores'][fila['auditor_id']]['inspecciones']}
+            for fila in filas if fila['auditor_id'] in series['auditores']
+        ],
+    }
+
+    return render(request, 'auditores/estadisticas.html', {
+        'filas': filas,
+        'globales': globales,
+        'sin_inspecciones': auditores_sin_inspecciones(filas),
+        'grafico': json.dumps(grafico, ensure_ascii=False) if grafico['datasets'] else None,
+        'desde': desde,
+        'hasta': hasta,
+        'historico': historico,
+    })
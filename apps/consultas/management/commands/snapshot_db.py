@@ -0,0 +1,58 @@
+"""
+Comando de gestión para refrescar la copia analítica de la base de datos.
+Uso: python manage.py snapshot_db [--paginas 1024] [--pausa 0.05] [--intervalo 0]
+
+Copia 'default' sobre el alias 'analitica' con la API de copia en línea de SQLite:
+la copia se hace por bloques de páginas, así que las escrituras sobre 'default' no
+quedan bloqueadas mientras dura, y se escribe sobre el mismo fichero destino para que
+las conexiones persistentes de las vistas analíticas vean los datos nuevos.
+Con --intervalo N se repite cada N segundos (para ejecutarlo como servicio en lugar de cron).
+"""
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from inspecciones_zimvie.routers import ALIAS_ANALITICA, ruta_sqlite
+
+
+class Command(BaseCommand):
+    help = 'Refresca la copia de solo lectura usada por las vistas analíticas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--paginas', type=int, default=1024, help='Páginas copiadas por paso (1024 por defecto)')
+        parser.add_argument('--pausa', type=float, default=0.05, help='Segundos de espera entre pasos si la base está ocupada (0.05 por defecto)')
+        parser.add_argument('--intervalo', type=int, default=0, help='Repetir cada N segundos (0 = una sola copia)')
+
+    def handle(self, *args, **options):
+        origen = settings.DATABASES['default']
+        destino = settings.DATABASES.get(ALIAS_ANALITICA)
+        if not destino:
+            raise CommandError(f"No hay un alias '{ALIAS_ANALITICA}' en DATABASES")
+        if not (origen['ENGINE'].endswith('sqlite3') and destino['ENGINE'].endswith('sqlite3')):
+            raise CommandError(
+                'snapshot_db solo copia bases SQLite; con PostgreSQL el alias '
+                f"'{ALIAS_ANALITICA}' debe apuntar a una réplica mantenida por la replicación nativa"
+            )
+
+        # El alias abre la copia en solo lectura (URI mode=ro); aquí se escribe sobre el fichero
+        ruta_destino = ruta_sqlite(destino)
+        while True:
+            segundos = self.copiar(str(origen['NAME']), str(ruta_destino), options['paginas'], options['pausa'])
+            self.stdout.write(self.style.SUCCESS(f"Copia analítica actualizada en {segundos:.2f} s: {ruta_destino}"))
+            if not options['intervalo']:
+                break
+            time.sleep(options['intervalo'])
+
+    def copiar(self, ruta_origen, ruta_destino, paginas, pausa):
+        inicio = time.perf_counter()
+        origen = sqlite3.connect(ruta_origen)
+        # La copia se escribe con su propia conexión; las de las vistas son de solo lectura
+        destino = sqlite3.connect(ruta_destino, timeout=20)
+        try:
+            origen.backup(destino, pages=paginas, sleep=pausa)
+        finally:
+            destino.close()
+            origen.close()
+        return time.perf_counter() - inicio
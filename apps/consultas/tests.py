@@ -1,3 +1,63 @@
+import sqlite3
+import tempfile
+from pathlib import Path
+from unittest import mock
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection
 from django.test import TestCase
+from django.urls import reverse
+from inspecciones_zimvie import routers
 
-# Create your tests here.
+
+class CopiaAnaliticaTests(TestCase):
+    """Cuándo se lee de la copia analítica y cuándo se vuelve a 'default'"""
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.ruta = Path(directorio.name) / 'copia.sqlite3'
+        # El alias apunta a self.ruta en solo lectura, como en settings
+        nombre = self.ruta.resolve().as_uri() + '?mode=ro'
+        parche = mock.patch.dict(settings.DATABASES['analitica'], {'NAME': nombre})
+        parche.start()
+        self.addCleanup(parche.stop)
+        routers._copias_validadas.clear()
+        self.addCleanup(routers._copias_validadas.clear)
+
+    def escribir_migraciones(self, sin_las_ultimas=0):
+        """Copia con la tabla django_migrations de 'default', sin sus últimas migraciones si se pide"""
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT app, name, applied FROM django_migrations ORDER BY id')
+            filas = cursor.fetchall()
+        filas = filas[:len(filas) - sin_las_ultimas]
+        conexion = sqlite3.connect(self.ruta)
+        conexion.execute('CREATE TABLE IF NOT EXISTS django_migrations (id INTEGER PRIMARY KEY, app, name, applied)')
+        conexion.execute('DELETE FROM django_migrations')
+        conexion.executemany('INSERT INTO django_migrations (app, name, applied) VALUES (?, ?, ?)', filas)
+        conexion.commit()
+        conexion.close()
+
+    def test_sin_copia_las_vistas_leen_de_default(self):
+        self.client.force_login(User.objects.create_user(username='calidad', password='clave'))
+
+        response = self.client.get(reverse('asignaciones:cobertura'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(routers.alias_analitica_disponible())
+        self.assertFalse(self.ruta.exists())
+
+    def test_copia_vacia(self):
+        self.ruta.touch()
+        self.assertIn('vacía', routers.validar_copia_analitica())
+        self.assertFalse(routers.alias_analitica_disponible())
+
+    def test_copia_anterior_al_ultimo_migrate(self):
+        self.escribir_migraciones()
+        self.assertIsNone(routers.validar_copia_analitica())
+        self.assertTrue(routers.alias_analitica_disponible())
+
+        # Copia tomada antes de aplicar la última migración
+        self.escribir_migraciones(sin_las_ultimas=1)
+        self.assertIn('migraciones', routers.validar_copia_analitica())
+        self.assertFalse(routers.alias_analitica_disponible())
@@ -2,25 +2,48 @@ from django.shortcuts import render, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from apps.operarios.models import Operario
 from apps.asignaciones.models import OperarioCertificacion
+from apps.inspecciones.models import PeriodoArchivado
 from apps.inspecciones.signals import verificar_caducidades_pendientes
+from inspecciones_zimvie.routers import usar_analitica
 
 
 @login_required
 def detalle_operario_completo(request, pk):
     """Vista completa del operario con todas sus certificaciones, periodos e inspecciones"""
     # Verificar caducidades pendientes antes de mostrar el detalle
+    # (escribe, así que lee de la base principal y no de la copia analítica)
     verificar_caducidades_pendientes()
     
-    operario = get_object_or_404(Operario, pk=pk)
-    
-    asignaciones = OperarioCertificacion.objects.filter(
-        operario=operario
-    ).select_related('certificacion').prefetch_related(
-        'periodos__inspecciones__auditoria_producto',
-        'periodos__inspecciones__auditor'
-    ).order_by('-fecha_asignacion')
-    
-    return render(request, 'consultas/detalle_operario.html', {
-        'operario': operario,
-        'asignaciones': asignaciones
-    })
+    # ?historico=1 añade los periodos archivados (archivar_historico) a los de la tabla principal
+    historico = request.GET.get('historico') == '1'
+
+    with usar_analitica():
+        operario = get_object_or_404(Operario, pk=pk)
+        
+        asignaciones = OperarioCertificacion.objects.filter(
+            operario=operario
+        ).select_related('certificacion').prefetch_related(
+            'periodos__inspecciones__auditoria_producto',
+            'periodos__inspecciones__auditor'
+        ).order_by('-fecha_asignacion')
+        if historico:
+            asignaciones = asignaciones.prefetch_related(
+                'periodos_archivados__inspecciones__auditoria_producto',
+                'periodos_archivados__inspecciones__auditor'
+            )
+
+        asignaciones = list(asignaciones)
+        for asignacion in asignaciones:
+            periodos = list(asignacion.periodos.all())
+            if historico:
+                periodos = sorted(periodos + list(asignacion.periodos_archivados.all()), key=lambda p: p.numero_periodo)
+            asignacion.historial = periodos
+
+        return render(request, 'consultas/detalle_operario.html', {
+            'operario': operario,
+            'asignaciones': asignaciones,
+            'historico': historico,
+            'periodos_archivados': 0 if historico else PeriodoArchivado.objects.filter(
+                operario_certificacion__operario=operario
+            ).count(),
+        })
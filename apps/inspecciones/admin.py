@@ -1,10 +1,13 @@
 from django.contrib import admin
-from .models import ConfiguracionInspecciones, PeriodoValidacionCertificacion, InspeccionProducto
+from .models import (
+    ConfiguracionInspecciones, InspeccionArchivada, InspeccionProducto, PeriodoArchivado,
+    PeriodoValidacionCertificacion, PrevisionPeriodo,
+)
 
 
 @admin.register(ConfiguracionInspecciones)
 class ConfiguracionInspeccionesAdmin(admin.ModelAdmin):
-    list_display = ['numero_dias_laborales_req', 'inspecciones_minimas', 'esta_activo', 'fecha_inicio_vigencia']
+    list_display = ['numero_dias_laborales_req', 'inspecciones_minimas', 'esta_activo', 'fecha_inicio_vigencia', 'fecha_fin_vigencia']
     list_filter = ['esta_activo']
     search_fields = []
 
@@ -24,3 +27,26 @@ class InspeccionProductoAdmin(admin.ModelAdmin):
     list_filter = ['fecha_inspeccion', 'resultado_inspeccion']
     search_fields = ['operario_certificacion__operario__nombre', 'auditor__nombre']
     date_hierarchy = 'fecha_inspeccion'
+
+
+@admin.register(PrevisionPeriodo)
+class PrevisionPeriodoAdmin(admin.ModelAdmin):
+    list_display = ['periodo', 'ritmo_diario', 'piezas_faltantes', 'fecha_prevista', 'dias_retraso', 'en_riesgo', 'fecha_calculo']
+    list_filter = ['en_riesgo']
+    search_fields = ['periodo__operario_certificacion__operario__nombre', 'periodo__operario_certificacion__certificacion__nombre']
+
+
+@admin.register(PeriodoArchivado)
+class PeriodoArchivadoAdmin(admin.ModelAdmin):
+    list_display = ['id', 'anio', 'operario_certificacion', 'numero_periodo', 'fecha_inicio_periodo', 'fecha_fin_periodo',
+                    'inspecciones_realizadas', 'inspecciones_requeridas', 'esta_completado', 'fecha_archivo']
+    list_filter = ['anio', 'esta_completado']
+    search_fields = ['operario_certificacion__operario__nombre', 'operario_certificacion__certificacion__nombre']
+
+
+@admin.register(InspeccionArchivada)
+class InspeccionArchivadaAdmin(admin.ModelAdmin):
+    list_display = ['id', 'fecha_inspeccion', 'operario_certificacion', 'auditoria_producto', 'auditor',
+                    'piezas_auditadas', 'resultado_inspeccion']
+    list_filter = ['anio', 'resultado_inspeccion']
+    search_fields = ['operario_certificacion__operario__nombre', 'auditor__nombre', 'numero_orden']
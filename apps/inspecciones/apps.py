@@ -7,3 +7,5 @@ class InspeccionesConfig(AppConfig):
 
     def ready(self):
         import apps.inspecciones.signals
+        # PRAGMAs de SQLite por conexión según el perfil de base de datos
+        import inspecciones_zimvie.sqlite
@@ -0,0 +1,190 @@
+"""
+Archivo histórico de periodos cerrados y sus inspecciones.
+
+Los periodos no vigentes que terminaron antes del horizonte (INSPECCIONES_ARCHIVO_ANIOS
+años, 2 por defecto) ya no se editan, pero sus inspecciones siguen ocupando los índices
+y las consultas de la tabla principal. archivar() los traslada, por lotes y cada lote en
+una transacción, a PeriodoArchivado e InspeccionArchivada (particionadas por año en la
+columna anio) con el mismo id. Un periodo se archiva siempre con todas sus inspecciones,
+así los contadores de piezas de ambos lados siguen cuadrando.
+
+Las filas se borran de las tablas principales con DELETE directo y no con delete() del
+ORM: los signals de borrado de inspecciones descontarían las piezas del periodo y lo
+reabrirían. Los triggers de la búsqueda de texto (FTS5) sí se ejecutan.
+
+Las vistas leen solo las tablas principales salvo que se pida el histórico completo
+(?historico=1); entonces suman el archivo con las funciones de este módulo.
+"""
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import Count, Max, Min, Q, Sum
+from django.utils import timezone
+
+from apps.asignaciones.models import OperarioCertificacion
+
+from .models import (
+    InspeccionArchivada, InspeccionProducto, PeriodoArchivado, PeriodoValidacionCertificacion, PrevisionPeriodo,
+)
+
+ANIOS_POR_DEFECTO = 2
+LOTE_POR_DEFECTO = 500
+
+CAMPOS_PERIODO = [
+    'id', 'operario_certificacion_id', 'numero_periodo', 'fecha_inicio_periodo', 'fecha_fin_periodo',
+    'numero_dias_laborales_req', 'inspecciones_requeridas', 'inspecciones_realizadas', 'esta_completado',
+    'fecha_completado', 'fecha_creacion', 'usuario_creacion_id',
+]
+CAMPOS_INSPECCION = [
+    'id', 'operario_certificacion_id', 'periodo_validacion_id', 'auditoria_producto_id', 'auditor_id',
+    'fecha_inspeccion', 'piezas_auditadas', 'resultado_inspeccion', 'observaciones', 'numero_orden',
+    'numero_orden_normalizado', 'fecha_creacion', 'usuario_creacion_id', 'fecha_actualizacion',
+]
+
+
+def fecha_corte(hoy=None, anios=None):
+    """Se archivan los periodos terminados antes de esta fecha (hoy menos `anios` años)"""
+    hoy = hoy or timezone.now().date()
+    if anios is None:
+        anios = getattr(settings, 'INSPECCIONES_ARCHIVO_ANIOS', ANIOS_POR_DEFECTO)
+    try:
+        return hoy.replace(year=hoy.year - anios)
+    except ValueError:
+        # 29 de febrero
+        return hoy.replace(year=hoy.year - anios, day=28)
+
+
+def periodos_archivables(corte):
+    """Periodos cerrados (no vigentes) que terminaron antes de `corte`"""
+    return PeriodoValidacionCertificacion.objects.filter(esta_vigente=False, fecha_fin_periodo__lt=corte)
+
+
+def resumen_archivables(corte):
+    """{año: (periodos, inspecciones)} de lo que archivaría archivar(corte)"""
+    periodos = periodos_archivables(corte)
+    resumen = defaultdict(lambda: [0, 0])
+    for fila in periodos.values('fecha_fin_periodo__year').annotate(total=Count('id')).order_by():
+        resumen[fila['fecha_fin_periodo__year']][0] += fila['total']
+    for fila in InspeccionProducto.objects.filter(
+        periodo_validacion__in=periodos
+    ).values('fecha_inspeccion__year').annotate(total=Count('id')).order_by():
+        resumen[fila['fecha_inspeccion__year']][1] += fila['total']
+    return {anio: tuple(totales) for anio, totales in sorted(resumen.items())}
+
+
+def _borrar_sin_signals(modelo, ids, connection):
+    tabla = connection.ops.quote_name(modelo._meta.db_table)
+    with connection.cursor() as cursor:
+        for inicio in range(0, len(ids), LOTE_POR_DEFECTO):
+            bloque = ids[inicio:inicio + LOTE_POR_DEFECTO]
+            cursor.execute(f"DELETE FROM {tabla} WHERE id IN ({', '.join(['%s'] * len(bloque))})", bloque)
+
+
+def archivar_lote(periodo_ids):
+    """
+    Traslada al archivo los periodos indicados y sus inspecciones en una transacción.
+    Retorna (periodos, inspecciones) archivados.
+    """
+    alias = router.db_for_write(InspeccionProducto)
+    ahora = timezone.now()
+    with transaction.atomic(using=alias):
+        # Se vuelve a filtrar dentro de la transacción por si algún periodo ha cambiado
+        periodos = list(PeriodoValidacionCertificacion.objects.filter(
+            pk__in=periodo_ids, esta_vigente=False
+        ).values(*CAMPOS_PERIODO))
+        ids = [periodo['id'] for periodo in periodos]
+        inspecciones = list(InspeccionProducto.objects.filter(
+            periodo_validacion_id__in=ids
+        ).order_by().values(*CAMPOS_INSPECCION))
+
+        PeriodoArchivado.objects.bulk_create([
+            PeriodoArchivado(anio=periodo['fecha_fin_periodo'].year, fecha_archivo=ahora, **periodo)
+            for periodo in periodos
+        ], batch_size=LOTE_POR_DEFECTO)
+        InspeccionArchivada.objects.bulk_create([
+            InspeccionArchivada(anio=inspeccion['fecha_inspeccion'].year, fecha_archivo=ahora, **inspeccion)
+            for inspeccion in inspecciones
+        ], batch_size=LOTE_POR_DEFECTO)
+
+        connection = connections[alias]
+        PrevisionPeriodo.objects.filter(periodo_id__in=ids).delete()
+        # El resumen de la asignación solo apunta al periodo vigente; por si quedara alguno antiguo
+        OperarioCertificacion.objects.filter(periodo_actual_id__in=ids).update(**OperarioCertificacion.estado_periodo(None))
+        _borrar_sin_signals(InspeccionProducto, [inspeccion['id'] for inspeccion in inspecciones], connection)
+        _borrar_sin_signals(PeriodoValidacionCertificacion, ids, connection)
+    return len(periodos), len(inspecciones)
+
+
+def archivar(corte, lote=LOTE_POR_DEFECTO):
+    """
+    Archiva por lotes los periodos cerrados antes de `corte`.
+    Genera (periodos, inspecciones) de cada lote para informar del avance.
+    """
+    from apps.auditores.estadisticas import invalidar_estadisticas
+
+    ids = list(periodos_archivables(corte).order_by('fecha_fin_periodo', 'pk').values_list('pk', flat=True))
+    for inicio in range(0, len(ids), lote):
+        yield archivar_lote(ids[inicio:inicio + lote])
+    if ids:
+        invalidar_estadisticas()
+
+
+def resumen_archivo_operario(operario):
+    """Totales de las inspecciones archivadas de un operario, en una consulta"""
+    return InspeccionArchivada.objects.filter(operario_certificacion__operario=operario).aggregate(
+        total=Count('id'),
+        piezas=Sum('piezas_auditadas'),
+        ok=Count('id', filter=Q(resultado_inspeccion='OK')),
+        no_ok=Count('id', filter=Q(resultado_inspeccion='NO OK')),
+        primera=Min('fecha_inspeccion'),
+        ultima=Max('fecha_inspeccion'),
+    )
+
+
+def combinar_totales_operario(estadisticas, archivo):
+    """
+    Suma el archivo a los totales generales del detalle de operario (los del periodo
+    reciente y los gráficos no cambian: el archivo solo contiene años anteriores).
+    """
+    total = estadisticas['total_inspecciones'] + archivo['total']
+    piezas = estadisticas['total_piezas_auditadas'] + (archivo['piezas'] or 0)
+    ok = estadisticas['inspecciones_ok'] + archivo['ok']
+    no_ok = estadisticas['inspecciones_no_ok'] + archivo['no_ok']
+    primeras = [fecha for fecha in (estadisticas['primera_inspeccion'], archivo['primera']) if fecha]
+
+    estadisticas.update({
+        'total_inspecciones': total,
+        'total_piezas_auditadas': piezas,
+        'promedio_piezas': round(piezas / total, 2) if total else 0,
+        'primera_inspeccion': min(primeras) if primeras else None,
+        'inspecciones_ok': ok,
+        'inspecciones_no_ok': no_ok,
+        'inspecciones_sin_resultado': total - ok - no_ok,
+        'tasa_exito': round(ok / total * 100, 2) if total else 0,
+        'tasa_no_conformidad': round(no_ok / total * 100, 2) if total else 0,
+        'inspecciones_archivadas': archivo['total'],
+    })
+    return estadisticas
+
+
+def contar_distintos_por_auditor(campo, desde=None, hasta=None):
+    """
+    {auditor_id: valores distintos de `campo`} sobre la tabla principal y el archivo juntos
+    (UNION elimina los pares repetidos entre ambas tablas).
+    """
+    consultas = []
+    for modelo in (InspeccionProducto, InspeccionArchivada):
+        queryset = modelo.objects.filter(auditor__isnull=False)
+        if desde:
+            queryset = queryset.filter(fecha_inspeccion__gte=desde)
+        if hasta:
+            queryset = queryset.filter(fecha_inspeccion__lte=hasta)
+        consultas.append(queryset.order_by().values_list('auditor_id', campo))
+    return Counter(auditor_id for auditor_id, _ in consultas[0].union(consultas[1]))
+
+
+def anios_archivados():
+    """Años con inspecciones en el archivo y su número de inspecciones"""
+    return list(InspeccionArchivada.objects.values('anio').annotate(total=Count('id')).order_by('anio'))
+
@@ -0,0 +1,153 @@
+"""
+Búsqueda de texto completo sobre observaciones y número de orden de las inspecciones.
+
+SQLite usa la tabla FTS5 inspecciones_busqueda (migración 0004) y PostgreSQL el índice
+GIN sobre to_tsvector. Con otros motores, o si SQLite no tiene FTS5, se recurre a icontains.
+El archivo histórico no tiene índice de texto (sus filas salen de la tabla FTS al
+archivarlas): buscar_archivadas lo recorre con icontains, solo si se pide (?historico=1).
+"""
+import re
+
+from django.db import connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import normalizar_numero_orden
+
+TABLA_FTS = 'inspecciones_busqueda'
+
+_fts_disponible = {}
+
+
+def fts_disponible(alias):
+    """True si la tabla FTS5 existe en la base de datos del alias (se comprueba una vez por proceso)"""
+    if alias not in _fts_disponible:
+        connection = connections[alias]
+        _fts_disponible[alias] = (
+            connection.vendor == 'sqlite' and TABLA_FTS in connection.introspection.table_names()
+        )
+    return _fts_disponible[alias]
+
+
+def consulta_fts(texto):
+    """
+    Convierte el texto del usuario en una consulta FTS5: cada palabra entre comillas
+    (sin sintaxis especial) y con búsqueda por prefijo; todas deben aparecer.
+    """
+    palabras = re.findall(r'\S+', texto)
+    return ' '.join('"{}"*'.format(palabra.replace('"', '""')) for palabra in palabras)
+
+
+class ResultadosBusqueda:
+    """
+    Resultados FTS5 ordenados por relevancia (bm25), aptos para Paginator.
+
+    Solo se consulta el índice para contar y para obtener los ids de la página pedida;
+    las inspecciones de la página se cargan después con el queryset recibido (que aporta
+    los filtros y el select_related), así el coste no depende del tamaño de la tabla.
+    """
+
+    def __init__(self, queryset, texto):
+        self.queryset = queryset
+        self.consulta = consulta_fts(texto)
+        self.connection = connections[queryset.db]
+        self._total = None
+
+    def _sql(self, columnas):
+        sql = f'SELECT {columnas} FROM {TABLA_FTS} WHERE {TABLA_FTS} MATCH %s'
+        params = [self.consulta]
+        if self.queryset.query.has_filters():
+            sub_sql, sub_params = self.queryset.order_by().values('pk').query.sql_with_params()
+            sql += f' AND rowid IN ({sub_sql})'
+            params.extend(sub_params)
+        return sql, params
+
+    def count(self):
+        if self._total is None:
+            sql, params = self._sql('COUNT(*)')
+            with self.connection.cursor() as cursor:
+                cursor.execute(sql, params)
+                self._total = cursor.fetchone()[0]
+        return self._total
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, indice):
+        if not isinstance(indice, slice):
+            return self[indice:indice + 1][0]
+        inicio = indice.start or 0
+        limite = (indice.stop - inicio) if indice.stop is not None else -1
+        sql, params = self._sql('rowid')
+        sql += f' ORDER BY bm25({TABLA_FTS}), rowid DESC LIMIT %s OFFSET %s'
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql, params + [limite, inicio])
+            ids = [fila[0] for fila in cursor.fetchall()]
+        objetos = self.queryset.in_bulk(ids)
+        return [objetos[pk] for pk in ids if pk in objetos]
+
+
+def buscar_inspecciones(queryset, texto):
+    """
+    Filtra el queryset de inspecciones por el texto y lo ordena por relevancia.
+    Retorna un queryset (PostgreSQL, sin FTS) o un ResultadosBusqueda (SQLite con FTS5).
+    """
+    texto = texto.strip()
+    if not texto:
+        return queryset
+
+    if fts_disponible(queryset.db):
+        return ResultadosBusqueda(queryset, texto)
+
+    if connections[queryset.db].vendor == 'postgresql':
+        from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+
+        vector = SearchVector('observaciones', 'numero_orden', config='spanish')
+        busqueda = SearchQuery(texto, config='spanish')
+        return queryset.annotate(
+            documento=vector,
+            relevancia=SearchRank(vector, busqueda)
+        ).filter(documento=busqueda).order_by('-relevancia', '-fecha_inspeccion', '-pk')
+
+    return queryset.filter(Q(observaciones__icontains=texto) | Q(numero_orden__icontains=texto))
+
+
+def filtrar_por_texto(queryset, texto):
+    """
+    Como buscar_inspecciones pero sin ordenar por relevancia: retorna siempre un queryset,
+    para combinarlo con values(), otros filtros u otra ordenación (API, exportaciones).
+    """
+    texto = texto.strip()
+    if not texto:
+        return queryset
+
+    if fts_disponible(queryset.db):
+        return queryset.filter(pk__in=RawSQL(
+            f'SELECT rowid FROM {TABLA_FTS} WHERE {TABLA_FTS} MATCH %s', [consulta_fts(texto)]
+        ))
+
+    if connections[queryset.db].vendor == 'postgresql':
+        from django.contrib.postgres.search import SearchQuery, SearchVector
+
+        return queryset.annotate(
+            documento=SearchVector('observaciones', 'numero_orden', config='spanish')
+        ).filter(documento=SearchQuery(texto, config='spanish'))
+
+    return queryset.filter(Q(observaciones__icontains=texto) | Q(numero_orden__icontains=texto))
+
+
+def buscar_archivadas(queryset, texto):
+    """
+    Filtra un queryset de inspecciones archivadas por el texto (observaciones o número de
+    orden), de la más reciente a la más antigua. El número de orden se compara también
+    normalizado, como en la trazabilidad.
+    """
+    texto = texto.strip()
+    if not texto:
+        return queryset.none()
+
+    condicion = Q(observaciones__icontains=texto) | Q(numero_orden__icontains=texto)
+    referencia = normalizar_numero_orden(texto)
+    if referencia:
+        condicion |= Q(numero_orden_normalizado__startswith=referencia)
+    return queryset.filter(condicion).order_by('-fecha_inspeccion', '-pk')
@@ -0,0 +1,62 @@
+"""
+Datos comunes de los tests que registran inspecciones: configuración de 180 días
+laborables, la asignación de Ana López a Pulido (auditoría Visual, auditor Luis) y un
+atajo para crear inspecciones en el periodo vigente.
+"""
+from datetime import timedelta
+
+from django.utils import timezone
+
+from apps.asignaciones.models import OperarioCertificacion
+from apps.auditores.models import Auditor
+from apps.auditorias.models import AuditoriaProducto
+from apps.certificaciones.models import Certificacion
+from apps.operarios.models import Operario
+
+from .models import ConfiguracionInspecciones, InspeccionProducto
+
+
+class DatosInspeccionMixin:
+    """
+    Se mezcla con TestCase. Cada clase ajusta con atributos las piezas requeridas por
+    periodo, los días transcurridos desde la asignación y la fecha de hoy (por defecto, la real).
+    """
+
+    piezas_requeridas = 29
+    dias_asignacion = 10
+    hoy = None
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.hoy = cls.hoy or timezone.now().date()
+        ConfiguracionInspecciones.objects.create(
+            numero_dias_laborales_req=180, inspecciones_minimas=cls.piezas_requeridas
+        )
+        cls.operario = Operario.objects.create(nombre='Ana', apellidos='López')
+        cls.certificacion = Certificacion.objects.create(nombre='Pulido')
+        cls.auditoria = AuditoriaProducto.objects.create(certificacion=cls.certificacion, nombre='Visual')
+        cls.auditor = Auditor.objects.create(nombre='Luis')
+        cls.asignacion = OperarioCertificacion.objects.create(
+            operario=cls.operario,
+            certificacion=cls.certificacion,
+            fecha_asignacion=cls.hoy - timedelta(days=cls.dias_asignacion)
+        )
+
+    def setUp(self):
+        super().setUp()
+        ConfiguracionInspecciones.invalidar_cache()
+        self.periodo = self.asignacion.periodos.get(esta_vigente=True)
+
+    def inspeccion(self, piezas, periodo=None, fecha=None, **extra):
+        """Inspección OK de `piezas` en el periodo vigente (u otro) con fecha de hoy (u otra)"""
+        return InspeccionProducto.objects.create(
+            operario_certificacion=self.asignacion,
+            periodo_validacion=periodo or self.periodo,
+            auditoria_producto=self.auditoria,
+            auditor=self.auditor,
+            fecha_inspeccion=fecha or self.hoy,
+            piezas_auditadas=piezas,
+            resultado_inspeccion='OK',
+            **extra
+        )
@@ -1,12 +1,38 @@
 from django import forms
-from .models import InspeccionProducto, PeriodoValidacionCertificacion
-from apps.asignaciones.models import OperarioCertificacion
+from django.core.exceptions import ValidationError
+from .models import InspeccionProducto
+from .utils import AsignacionesOperario
 from apps.auditorias.models import AuditoriaProducto
 from apps.auditores.models import Auditor
 from apps.operarios.models import Operario
 from apps.certificaciones.models import Certificacion
 
 
+class ModelChoiceFieldPrecargado(forms.ModelChoiceField):
+    """
+    ModelChoiceField que, si se le asignan objetos ya cargados (diccionario id -> objeto),
+    valida la selección contra ellos en memoria en lugar de consultar la base de datos.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.objetos = None
+
+    def to_python(self, value):
+        if self.objetos is None:
+            return super().to_python(value)
+        if value in self.empty_values:
+            return None
+        try:
+            return self.objetos[int(value)]
+        except (KeyError, ValueError, TypeError):
+            raise ValidationError(
+                self.error_messages['invalid_choice'],
+                code='invalid_choice',
+                params={'value': value},
+            )
+
+
 class InspeccionProductoForm(forms.ModelForm):
     operario = forms.ModelChoiceField(
         queryset=Operario.objects.filter(activo=True).order_by('nombre', 'apellidos'),
@@ -18,7 +44,7 @@ class InspeccionProductoForm(forms.ModelForm):
         required=True
     )
     
-    certificacion = forms.ModelChoiceField(
+    certificacion = ModelChoiceFieldPrecargado(
         queryset=Certificacion.objects.none(),
         widget=forms.Select(attrs={
             'class': 'mt-1 block w-full rounded-md border-gray-300 shadow-sm focus:border-blue-500 focus:ring-blue-500',
@@ -28,6 +54,13 @@ class InspeccionProductoForm(forms.ModelForm):
         required=True
     )
     
+    auditoria_producto = ModelChoiceFieldPrecargado(
+        queryset=AuditoriaProducto.objects.none(),
+        widget=forms.Select(attrs={'class': 'mt-1 block w-full rounded-md border-gray-300 shadow-sm focus:border-blue-500 focus:ring-blue-500'}),
+        label='Auditoría de Producto',
+        required=True
+    )
+    
     class Meta:
         model = InspeccionProducto
         fields = [
@@ -44,7 +77,6 @@ class InspeccionProductoForm(forms.ModelForm):
         # porque son campos adicionales solo para la UI
         widgets = {
             'operario_certificacion': forms.HiddenInput(),
-            'auditoria_producto': forms.Select(attrs={'class': 'mt-1 block w-full rounded-md border-gray-300 shadow-sm focus:border-blue-500 focus:ring-blue-500'}),
             'auditor': forms.Select(attrs={'class': 'mt-1 block w-full rounded-md border-gray-300 shadow-sm focus:border-blue-500 focus:ring-blue-500'}),
             'fecha_inspeccion': forms.DateInput(attrs={'type': 'date', 'class': 'mt-1 block w-full rounded-md border-gray-300 shadow-sm focus:border-blue-500 focus:ring-blue-500'}),
             'piezas_auditadas': forms.NumberInput(attrs={'class': 'mt-1 block w-full rounded-md border-gray-300 shadow-sm focus:border-blue-500 focus:ring-blue-500', 'min': 1}),
@@ -54,7 +86,6 @@ class InspeccionProductoForm(forms.ModelForm):
         }
         labels = {
             'operario_certificacion': 'Operario - Certificación',
-            'auditoria_producto': 'Auditoría de Producto',
             'auditor': 'Auditor',
             'fecha_inspeccion': 'Fecha de inspección',
             'piezas_auditadas': 'Piezas auditadas',
@@ -69,65 +100,50 @@ class InspeccionProductoForm(forms.ModelForm):
         # Hacer que operario_certificacion no sea requerido (se establece en clean())
         self.fields['operario_certificacion'].required = False
         
-        # Configurar queryset de operarios
-        self.fields['operario'].queryset = Operario.objects.filter(activo=True).order_by('nombre', 'apellidos')
+        # Asignaciones del operario (con periodo vigente y auditorías) cargadas una sola vez
+        # y compartidas por __init__, clean(), la vista y el signal de guardado
+        self.asignaciones_operario = None
+        operario_id = certificacion_id = None
         
         # Si hay instancia (nueva o existente) con asignación, establecer valores iniciales
         if self.instance and getattr(self.instance, 'operario_certificacion', None):
-            operario_asignado = self.instance.operario_certificacion.operario
-            certificacion_asignada = self.instance.operario_certificacion.certificacion
-            
-            self.fields['operario'].initial = operario_asignado
+            asignacion = self.instance.operario_certificacion
+            operario_id = asignacion.operario_id
+            certificacion_id = asignacion.certificacion_id
             
-            certificaciones_ids = OperarioCertificacion.objects.filter(
-                operario=operario_asignado,
-                esta_activa=True
-            ).values_list('certificacion_id', flat=True)
-            self.fields['certificacion'].queryset = Certificacion.objects.filter(
-                id__in=certificaciones_ids,
-                activa=True
-            ).order_by('nombre')
-            self.fields['certificacion'].initial = certificacion_asignada
+            self.fields['operario'].initial = asignacion.operario_id
+            self.fields['certificacion'].initial = certificacion_id
             # Marcar certificación preseleccionada para el JS
-            self.fields['certificacion'].widget.attrs['data-selected'] = str(certificacion_asignada.id)
-            
-            # Cargar auditorías disponibles de la certificación seleccionada
-            self.fields['auditoria_producto'].queryset = AuditoriaProducto.objects.filter(
-                certificacion=certificacion_asignada,
-                activa=True
-            ).order_by('nombre')
+            self.fields['certificacion'].widget.attrs['data-selected'] = str(certificacion_id)
         
         # Si hay datos POST, filtrar certificaciones según el operario seleccionado
+        # (sustituye al de la instancia: las asignaciones se cargan una sola vez)
         if self.data and 'operario' in self.data:
             try:
                 operario_id = int(self.data['operario'])
-                certificaciones_ids = OperarioCertificacion.objects.filter(
-                    operario_id=operario_id,
-                    esta_activa=True
-                ).values_list('certificacion_id', flat=True)
-                self.fields['certificacion'].queryset = Certificacion.objects.filter(
-                    id__in=certificaciones_ids,
-                    activa=True
-                ).order_by('nombre')
-                
-                # Si hay certificación seleccionada, filtrar auditorías
-                if 'certificacion' in self.data and self.data['certificacion']:
-                    try:
-                        certificacion_id = int(self.data['certificacion'])
-                        self.fields['auditoria_producto'].queryset = AuditoriaProducto.objects.filter(
-                            certificacion_id=certificacion_id,
-                            activa=True
-                        ).order_by('nombre')
-                    except (ValueError,):
-                        self.fields['auditoria_producto'].queryset = AuditoriaProducto.objects.none()
-                else:
-                    self.fields['auditoria_producto'].queryset = AuditoriaProducto.objects.none()
+                certificacion_id = int(self.data['certificacion']) if self.data.get('certificacion') else None
             except (ValueError,):
-                self.fields['certificacion'].queryset = Certificacion.objects.none()
-                self.fields['auditoria_producto'].queryset = AuditoriaProducto.objects.none()
+                operario_id = certificacion_id = None
+        
+        if operario_id is not None:
+            self.asignaciones_operario = AsignacionesOperario(operario_id)
+        
+        if self.asignaciones_operario is not None:
+            certificaciones = self.asignaciones_operario.certificaciones()
+            self.fields['certificacion'].objetos = {c.id: c for c in certificaciones}
+            self.fields['certificacion'].queryset = Certificacion.objects.filter(
+                id__in=[c.id for c in certificaciones]
+            ).order_by('nombre')
+            
+            # Cargar auditorías disponibles de la certificación seleccionada
+            auditorias = self.asignaciones_operario.auditorias(certificacion_id) if certificacion_id else []
+            self.fields['auditoria_producto'].objetos = {a.id: a for a in auditorias}
+            self.fields['auditoria_producto'].queryset = AuditoriaProducto.objects.filter(
+                id__in=[a.id for a in auditorias]
+            ).order_by('nombre')
         else:
-            self.fields['certificacion'].queryset = Certificacion.objects.none()
-            self.fields['auditoria_producto'].queryset = AuditoriaProducto.objects.none()
+            self.fields['certificacion'].objetos = {}
+            self.fields['auditoria_producto'].objetos = {}
         
         self.fields['auditor'].queryset = Auditor.objects.filter(activo=True).order_by('nombre', 'apellidos')
 
@@ -144,34 +160,29 @@ class InspeccionProductoForm(forms.ModelForm):
             raise forms.ValidationError({'certificacion': 'Debe seleccionar una certificación'})
         
         if operario and certificacion:
-            # Buscar la asignación OperarioCertificacion correspondiente
-            try:
-                operario_certificacion = OperarioCertificacion.objects.get(
-                    operario=operario,
-                    certificacion=certificacion,
-                    esta_activa=True
-                )
-                # Asignar la operario_certificacion al campo hidden
-                cleaned_data['operario_certificacion'] = operario_certificacion
-                self.instance.operario_certificacion = operario_certificacion
-                
-                # Obtener el periodo vigente
-                periodo_vigente = PeriodoValidacionCertificacion.objects.filter(
-                    operario_certificacion=operario_certificacion,
-                    esta_vigente=True
-                ).first()
-                
-                if not periodo_vigente:
-                    raise forms.ValidationError('No hay un periodo vigente para esta asignación')
-                
-                # Asignar el periodo vigente
-                self.instance.periodo_validacion = periodo_vigente
-                
-                # Validar auditoría de producto
-                auditoria_producto = cleaned_data.get('auditoria_producto')
-                if auditoria_producto and auditoria_producto.certificacion != certificacion:
-                    raise forms.ValidationError({'auditoria_producto': 'La auditoría de producto debe pertenecer a la misma certificación'})
-            except OperarioCertificacion.DoesNotExist:
+            # Buscar la asignación OperarioCertificacion correspondiente (ya cargada en __init__)
+            operario_certificacion = None
+            if self.asignaciones_operario is not None and self.asignaciones_operario.operario_id == operario.id:
+                operario_certificacion = self.asignaciones_operario.asignacion(certificacion.id)
+            if operario_certificacion is None:
                 raise forms.ValidationError('No existe una asignación activa para este operario y certificación')
+            
+            # Asignar la operario_certificacion al campo hidden
+            cleaned_data['operario_certificacion'] = operario_certificacion
+            self.instance.operario_certificacion = operario_certificacion
+            
+            # Obtener el periodo vigente
+            periodo_vigente = self.asignaciones_operario.periodo_vigente(certificacion.id)
+            
+            if not periodo_vigente:
+                raise forms.ValidationError('No hay un periodo vigente para esta asignación')
+            
+            # Asignar el periodo vigente
+            self.instance.periodo_validacion = periodo_vigente
+            
+            # Validar auditoría de producto
+            auditoria_producto = cleaned_data.get('auditoria_producto')
+            if auditoria_producto and auditoria_producto.certificacion_id != certificacion.id:
+                raise forms.ValidationError({'auditoria_producto': 'La auditoría de producto debe pertenecer a la misma certificación'})
         
         return cleaned_data
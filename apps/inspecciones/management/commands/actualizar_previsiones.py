@@ -0,0 +1,28 @@
+"""
+Comando de gestión para recalcular las previsiones de finalización de los periodos vigentes.
+Uso: python manage.py actualizar_previsiones
+
+Los signals ya recalculan la asignación de cada inspección guardada o eliminada, pero el
+ritmo de las asignaciones sin actividad también cambia con los días (las ventanas avanzan):
+conviene ejecutarlo una vez al día, p. ej. desde cron.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.inspecciones.models import PrevisionPeriodo
+from apps.inspecciones.prevision import actualizar_previsiones
+
+
+class Command(BaseCommand):
+    help = 'Recalcula la previsión de finalización de todos los periodos vigentes pendientes'
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        total = actualizar_previsiones()
+        segundos = time.perf_counter() - inicio
+
+        en_riesgo = PrevisionPeriodo.objects.filter(en_riesgo=True).count()
+        self.stdout.write(self.style.SUCCESS(
+            f'{total} previsiones calculadas en {segundos:.2f} s ({en_riesgo} con retraso previsto)'
+        ))
@@ -0,0 +1,106 @@
+"""
+Comando de gestión para revisar el plan de ejecución de las consultas más frecuentes.
+Uso: python manage.py analizar_indices [--todas]
+
+Ejecuta EXPLAIN QUERY PLAN (SQLite) sobre un catálogo de consultas reales de la
+aplicación, construidas con el ORM igual que en las vistas y signals, y marca las que
+recorren una tabla completa (SCAN sin índice). Termina con error si encuentra alguna,
+para poder usarlo en integración continua.
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from apps.asignaciones.models import OperarioCertificacion
+from apps.operarios.models import Operario
+from apps.inspecciones.models import InspeccionProducto, PeriodoValidacionCertificacion
+
+
+def catalogo_consultas():
+    """(nombre, queryset) de las consultas a analizar; los ids son ilustrativos"""
+    hoy = timezone.now().date()
+    inicio_mes = hoy.replace(day=1)
+    inicio_mes_siguiente = (inicio_mes + timedelta(days=32)).replace(day=1)
+
+    return [
+        ('Caducidades pendientes (verificar_caducidades_pendientes)',
+         PeriodoValidacionCertificacion.objects.filter(
+             esta_vigente=True, esta_completado=False, fecha_fin_periodo__lt=hoy
+         ).select_related('operario_certificacion')),
+        ('Periodos pendientes del dashboard (home_view)',
+         PeriodoValidacionCertificacion.objects.filter(
+             esta_vigente=True, esta_completado=False
+         ).select_related(
+             'operario_certificacion__operario', 'operario_certificacion__certificacion'
+         ).order_by('fecha_fin_periodo')),
+        ('Inspecciones del mes (home_view)',
+         InspeccionProducto.objects.filter(
+             fecha_inspeccion__gte=inicio_mes, fecha_inspeccion__lt=inicio_mes_siguiente
+         ).order_by()),
+        ('Asignaciones activas de un operario (AJAX del formulario)',
+         OperarioCertificacion.objects.filter(operario_id=1, esta_activa=True).order_by()),
+        ('Periodo vigente de una asignación',
+         PeriodoValidacionCertificacion.objects.filter(operario_certificacion_id=1, esta_vigente=True)),
+        ('Listado de inspecciones (lista_inspecciones)',
+         InspeccionProducto.objects.order_by('-fecha_inspeccion', '-fecha_creacion')[:50]),
+        ('Inspecciones de un operario (lista_inspecciones filtrada)',
+         InspeccionProducto.objects.filter(
+             operario_certificacion__operario_id=1
+         ).order_by('-fecha_inspeccion', '-fecha_creacion')[:50]),
+        ('Inspecciones de un periodo',
+         InspeccionProducto.objects.filter(periodo_validacion_id=1)),
+        ('Operario por código (lista_operarios)',
+         Operario.objects.filter(codigo='OP001').order_by()),
+        ('Listado de operarios con resumen (lista_operarios)',
+         Operario.con_resumen().order_by('nombre', 'apellidos', 'pk')[:25]),
+        ('Trazabilidad por número de orden (exacta)',
+         InspeccionProducto.objects.filter(numero_orden_normalizado__in=['OF1', 'OF2']).order_by()),
+        ('Trazabilidad por número de orden (prefijo)',
+         InspeccionProducto.objects.filter(
+             numero_orden_normalizado__gte='OF1', numero_orden_normalizado__lt='OF2'
+         ).order_by()),
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Muestra el plan de ejecución de las consultas frecuentes y marca los recorridos completos de tabla'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--todas', action='store_true', help='Muestra también el plan de las consultas sin problemas')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('analizar_indices usa EXPLAIN QUERY PLAN de SQLite')
+
+        recorridos = 0
+        for nombre, queryset in catalogo_consultas():
+            plan = self.plan(queryset)
+            completos = [detalle for detalle in plan if self.es_recorrido_completo(detalle)]
+            recorridos += len(completos)
+
+            if completos:
+                self.stdout.write(self.style.WARNING(f'✗ {nombre}'))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'✓ {nombre}'))
+            if completos or options['todas']:
+                for detalle in plan:
+                    marca = '  <-- recorrido completo' if detalle in completos else ''
+                    self.stdout.write(f'    {detalle}{marca}')
+
+        if recorridos:
+            raise CommandError(f'{recorridos} recorrido(s) completo(s) de tabla')
+        self.stdout.write(self.style.SUCCESS('Todas las consultas usan índices'))
+
+    def plan(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            # Filas: (id, parent, notused, detail)
+            return [fila[-1] for fila in cursor.fetchall()]
+
+    @staticmethod
+    def es_recorrido_completo(detalle):
+        # "SCAN tabla" sin índice; "SCAN tabla USING [COVERING] INDEX" recorre el índice, no la tabla
+        return detalle.startswith('SCAN ') and ' USING ' not in detalle
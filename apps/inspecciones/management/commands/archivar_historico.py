@@ -0,0 +1,66 @@
+"""
+Comando de gestión para trasladar al archivo histórico los periodos cerrados antiguos.
+Uso: python manage.py archivar_historico [--anios 2 | --antes-de AAAA-MM-DD] [--lote 500] [--simular]
+
+Mueve los periodos no vigentes que terminaron antes del horizonte, con todas sus
+inspecciones, a las tablas de archivo (ver apps/inspecciones/archivo.py). Cada lote va en
+su propia transacción, así que puede interrumpirse y volver a lanzarse. Con --simular
+solo informa de lo que archivaría, por año.
+"""
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.inspecciones.archivo import (
+    LOTE_POR_DEFECTO, anios_archivados, archivar, fecha_corte, resumen_archivables,
+)
+
+
+class Command(BaseCommand):
+    help = 'Archiva los periodos cerrados antiguos y sus inspecciones fuera de las tablas principales'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--anios', type=int, help='Años de histórico que se mantienen en las tablas principales (INSPECCIONES_ARCHIVO_ANIOS, 2 por defecto)')
+        parser.add_argument('--antes-de', help='Archiva los periodos terminados antes de esta fecha (AAAA-MM-DD) en lugar de usar --anios')
+        parser.add_argument('--lote', type=int, default=LOTE_POR_DEFECTO, help=f'Periodos por transacción ({LOTE_POR_DEFECTO} por defecto)')
+        parser.add_argument('--simular', action='store_true', help='Solo informa de lo que se archivaría')
+
+    def handle(self, *args, **options):
+        if options['antes_de']:
+            try:
+                corte = date.fromisoformat(options['antes_de'])
+            except ValueError:
+                raise CommandError(f"'{options['antes_de']}' no es una fecha AAAA-MM-DD")
+        else:
+            if options['anios'] is not None and options['anios'] < 1:
+                # Las estadísticas del último año solo leen las tablas principales
+                raise CommandError('--anios debe ser al menos 1')
+            corte = fecha_corte(anios=options['anios'])
+        if options['lote'] < 1:
+            raise CommandError('--lote debe ser mayor que 0')
+
+        resumen = resumen_archivables(corte)
+        self.stdout.write(f'Periodos cerrados antes del {corte:%d/%m/%Y}:')
+        for anio, (periodos, inspecciones) in resumen.items():
+            self.stdout.write(f'  {anio}: {periodos} periodos, {inspecciones} inspecciones')
+        if not resumen:
+            self.stdout.write('  (ninguno)')
+
+        if options['simular']:
+            return
+
+        inicio = time.perf_counter()
+        total_periodos = total_inspecciones = 0
+        for periodos, inspecciones in archivar(corte, options['lote']):
+            total_periodos += periodos
+            total_inspecciones += inspecciones
+            self.stdout.write(f'  Archivados {total_periodos} periodos y {total_inspecciones} inspecciones...')
+        segundos = time.perf_counter() - inicio
+
+        self.stdout.write('Archivo por año:')
+        for fila in anios_archivados():
+            self.stdout.write(f"  {fila['anio']}: {fila['total']} inspecciones")
+        self.stdout.write(self.style.SUCCESS(
+            f'{total_periodos} periodos y {total_inspecciones} inspecciones archivados en {segundos:.2f} s'
+        ))
@@ -0,0 +1,101 @@
+"""
+Comando de gestión para comparar el rendimiento de las vistas AJAX servidas por WSGI y por ASGI.
+Uso: python manage.py benchmark_asgi_wsgi [--peticiones 2000] [--concurrencia 16]
+
+Lanza la misma carga (las peticiones de la cascada del formulario de inspección y de
+asignaciones) contra la pila WSGI, con un hilo por petición concurrente como haría un
+servidor con hilos, y contra la pila ASGI, con corrutinas en un único bucle de eventos.
+Se ejecuta en el propio proceso (sin servidor HTTP), así que mide el coste de Django
+y de la base de datos, no el de la red. Requiere datos (python manage.py crear_demo_data).
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import AsyncClient, Client
+from django.urls import reverse
+
+from apps.asignaciones.models import OperarioCertificacion
+
+
+class Command(BaseCommand):
+    help = 'Compara peticiones por segundo de los endpoints AJAX bajo WSGI (hilos) y ASGI (asyncio)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--peticiones', type=int, default=2000, help='Peticiones por escenario (2000 por defecto)')
+        parser.add_argument('--concurrencia', type=int, default=16, help='Peticiones simultáneas (16 por defecto)')
+
+    def handle(self, *args, **options):
+        usuario = User.objects.filter(is_active=True).first()
+        asignacion = OperarioCertificacion.objects.filter(esta_activa=True).first()
+        if not usuario or not asignacion:
+            raise CommandError('No hay datos: ejecute primero python manage.py crear_demo_data')
+
+        urls = self.urls(asignacion)
+        total = options['peticiones']
+        concurrencia = options['concurrencia']
+        peticiones = [urls[i % len(urls)] for i in range(total)]
+
+        resultados = [
+            ('WSGI', self.medir_wsgi(usuario, peticiones, concurrencia)),
+            ('ASGI', asyncio.run(self.medir_asgi(usuario, peticiones, concurrencia))),
+        ]
+        for nombre, (segundos, errores) in resultados:
+            self.stdout.write(
+                f'{nombre}: {total} peticiones en {segundos:.2f} s -> {total / segundos:.0f} peticiones/s'
+                f' ({errores} respuestas con error)'
+            )
+
+        wsgi, asgi = (total / segundos for _, (segundos, _) in resultados)
+        self.stdout.write(self.style.SUCCESS(f'ASGI / WSGI: x{asgi / wsgi:.2f}'))
+
+    def urls(self, asignacion):
+        operario = {'operario_id': asignacion.operario_id}
+        certificacion = {'certificacion_id': asignacion.certificacion_id}
+        return [
+            reverse('inspecciones:api_certificaciones') + '?' + urlencode(operario),
+            reverse('inspecciones:api_operarios') + '?' + urlencode(certificacion),
+            reverse('inspecciones:api_auditorias') + '?' + urlencode({**operario, **certificacion}),
+            reverse('asignaciones:api_certificaciones_disponibles') + '?' + urlencode(operario),
+        ]
+
+    def medir_wsgi(self, usuario, peticiones, concurrencia):
+        cliente = Client()
+        cliente.force_login(usuario)
+        cookies = cliente.cookies
+
+        def peticion(url):
+            c = Client()
+            c.cookies = cookies
+            return c.get(url).status_code
+
+        def trabajador(urls):
+            try:
+                return [peticion(url) for url in urls]
+            finally:
+                connections.close_all()
+
+        bloques = [peticiones[i::concurrencia] for i in range(concurrencia)]
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrencia) as ejecutor:
+            estados = [estado for bloque in ejecutor.map(trabajador, bloques) for estado in bloque]
+        segundos = time.perf_counter() - inicio
+        return segundos, sum(1 for estado in estados if estado != 200)
+
+    async def medir_asgi(self, usuario, peticiones, concurrencia):
+        cliente = AsyncClient()
+        await cliente.aforce_login(usuario)
+        semaforo = asyncio.Semaphore(concurrencia)
+
+        async def peticion(url):
+            async with semaforo:
+                return (await cliente.get(url)).status_code
+
+        inicio = time.perf_counter()
+        estados = await asyncio.gather(*(peticion(url) for url in peticiones))
+        segundos = time.perf_counter() - inicio
+        return segundos, sum(1 for estado in estados if estado != 200)
@@ -0,0 +1,142 @@
+"""
+Comando de gestión para medir el rendimiento de escrituras concurrentes en SQLite.
+Uso: python manage.py benchmark_escrituras_sqlite [--escritores 8] [--lectores 4] [--transacciones 200]
+
+Compara la configuración por defecto de Django (journal DELETE, transacciones diferidas)
+con el perfil de producción (PRAGMAS_PRODUCCION + BEGIN IMMEDIATE) sobre una base de datos
+temporal, con una carga similar al registro de inspecciones: leer el contador del periodo,
+insertar la inspección y actualizar el contador, mientras otros hilos leen el dashboard.
+"""
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+
+from inspecciones_zimvie.sqlite import PRAGMAS_PRODUCCION, TIMEOUT_PRODUCCION, aplicar_pragmas
+
+PERIODOS = 50
+
+ESCENARIOS = [
+    # (nombre, pragmas, sentencia de inicio de transacción, timeout de conexión en segundos)
+    ('Por defecto', {}, 'BEGIN', 5),
+    ('Producción', PRAGMAS_PRODUCCION, 'BEGIN IMMEDIATE', TIMEOUT_PRODUCCION),
+]
+
+
+class Command(BaseCommand):
+    help = 'Compara el rendimiento de escrituras concurrentes en SQLite con y sin el perfil de producción'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--escritores', type=int, default=8, help='Hilos que registran inspecciones (8 por defecto)')
+        parser.add_argument('--lectores', type=int, default=4, help='Hilos que leen el dashboard (4 por defecto)')
+        parser.add_argument('--transacciones', type=int, default=200, help='Transacciones por escritor (200 por defecto)')
+
+    def handle(self, *args, **options):
+        resultados = []
+        for nombre, pragmas, inicio, timeout in ESCENARIOS:
+            with tempfile.TemporaryDirectory() as directorio:
+                ruta = os.path.join(directorio, 'benchmark.sqlite3')
+                self.preparar_base_datos(ruta, pragmas)
+                resultado = self.ejecutar_escenario(
+                    ruta, pragmas, inicio, timeout,
+                    options['escritores'], options['lectores'], options['transacciones']
+                )
+            resultados.append((nombre, resultado))
+            self.stdout.write(
+                f"{nombre:<12} {resultado['confirmadas']:>6} transacciones en {resultado['segundos']:.2f} s "
+                f"-> {resultado['por_segundo']:.0f} tx/s, {resultado['bloqueos']} errores 'database is locked', "
+                f"{resultado['lecturas']} lecturas"
+            )
+
+        base = resultados[0][1]['por_segundo']
+        mejora = resultados[1][1]['por_segundo']
+        if base:
+            self.stdout.write(self.style.SUCCESS(f'Mejora de rendimiento en escritura: x{mejora / base:.2f}'))
+
+    def conectar(self, ruta, pragmas, timeout):
+        conexion = sqlite3.connect(ruta, timeout=timeout, isolation_level=None, check_same_thread=False)
+        aplicar_pragmas(conexion.cursor(), pragmas)
+        return conexion
+
+    def preparar_base_datos(self, ruta, pragmas):
+        conexion = self.conectar(ruta, pragmas, 5)
+        conexion.executescript("""
+            CREATE TABLE periodo (id INTEGER PRIMARY KEY, inspecciones_realizadas INTEGER NOT NULL DEFAULT 0);
+            CREATE TABLE inspeccion (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                periodo_id INTEGER NOT NULL REFERENCES periodo(id),
+                piezas_auditadas INTEGER NOT NULL,
+                observaciones TEXT
+            );
+            CREATE INDEX inspeccion_periodo ON inspeccion(periodo_id);
+        """)
+        conexion.executemany('INSERT INTO periodo (id) VALUES (?)', [(i,) for i in range(1, PERIODOS + 1)])
+        conexion.close()
+
+    def ejecutar_escenario(self, ruta, pragmas, inicio, timeout, escritores, lectores, transacciones):
+        contadores = {'confirmadas': 0, 'bloqueos': 0, 'lecturas': 0}
+        cerrojo = threading.Lock()
+        fin_escritura = threading.Event()
+
+        def escritor(indice):
+            conexion = self.conectar(ruta, pragmas, timeout)
+            confirmadas = bloqueos = 0
+            for n in range(transacciones):
+                periodo_id = (indice * transacciones + n) % PERIODOS + 1
+                try:
+                    conexion.execute(inicio)
+                    conexion.execute('SELECT inspecciones_realizadas FROM periodo WHERE id = ?', (periodo_id,)).fetchone()
+                    conexion.execute(
+                        'INSERT INTO inspeccion (periodo_id, piezas_auditadas, observaciones) VALUES (?, ?, ?)',
+                        (periodo_id, 3, 'benchmark')
+                    )
+                    conexion.execute(
+                        'UPDATE periodo SET inspecciones_realizadas = inspecciones_realizadas + 3 WHERE id = ?',
+                        (periodo_id,)
+                    )
+                    conexion.execute('COMMIT')
+                    confirmadas += 1
+                except sqlite3.OperationalError:
+                    bloqueos += 1
+                    if conexion.in_transaction:
+                        conexion.execute('ROLLBACK')
+            conexion.close()
+            with cerrojo:
+                contadores['confirmadas'] += confirmadas
+                contadores['bloqueos'] += bloqueos
+
+        def lector():
+            conexion = self.conectar(ruta, pragmas, timeout)
+            lecturas = 0
+            while not fin_escritura.is_set():
+                try:
+                    conexion.execute(
+                        'SELECT p.id, p.inspecciones_realizadas, COUNT(i.id) FROM periodo p '
+                        'LEFT JOIN inspeccion i ON i.periodo_id = p.id GROUP BY p.id'
+                    ).fetchall()
+                    lecturas += 1
+                except sqlite3.OperationalError:
+                    pass
+            conexion.close()
+            with cerrojo:
+                contadores['lecturas'] += lecturas
+
+        hilos_escritura = [threading.Thread(target=escritor, args=(i,)) for i in range(escritores)]
+        hilos_lectura = [threading.Thread(target=lector) for _ in range(lectores)]
+
+        inicio_tiempo = time.perf_counter()
+        for hilo in hilos_lectura + hilos_escritura:
+            hilo.start()
+        for hilo in hilos_escritura:
+            hilo.join()
+        segundos = time.perf_counter() - inicio_tiempo
+        fin_escritura.set()
+        for hilo in hilos_lectura:
+            hilo.join()
+
+        contadores['segundos'] = segundos
+        contadores['por_segundo'] = contadores['confirmadas'] / segundos if segundos else 0
+        return contadores
@@ -0,0 +1,156 @@
+"""
+Comando de gestión para medir el tiempo de renderizado de las plantillas principales.
+Uso: python manage.py benchmark_plantillas [--repeticiones 20] [--operario PK] [--limite-ms 0]
+
+Cada página se pide una vez a su vista real (con los datos actuales de la base de datos)
+para capturar el contexto con el que se renderiza la plantilla; después se vuelve a
+renderizar solo la plantilla con ese contexto, --repeticiones veces. Se informa de la
+compilación (la primera carga, sin la caché del cargador), los ms por renderizado
+(mediana y p95) y las consultas que lanza la propia plantilla en cada renderizado: en una
+plantilla sana son 0, porque las vistas ya traen los datos con select_related y
+prefetch_related. Un acceso como {{ periodo.inspecciones.all }} sin prefetch aparece
+aquí como consultas por renderizado. Con --limite-ms termina con error si alguna
+plantilla supera el límite (para usarlo en integración continua).
+"""
+import statistics
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Count
+from django.template import engines
+from django.template.backends.django import Template
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+
+from apps.operarios.models import Operario
+from inspecciones_zimvie.routers import ALIAS_ANALITICA, alias_analitica_disponible
+
+# (plantilla, nombre de la URL, ¿recibe el pk del operario?, parámetros GET)
+PAGINAS = [
+    ('home.html', 'home', False, {}),
+    ('operarios/detalle.html', 'operarios:detalle', True, {}),
+    ('consultas/detalle_operario.html', 'consultas:detalle_operario', True, {}),
+    ('consultas/detalle_operario.html', 'consultas:detalle_operario', True, {'historico': '1'}),
+    ('inspecciones/lista.html', 'inspecciones:lista', False, {}),
+    ('auditores/estadisticas.html', 'auditores:estadisticas', False, {}),
+    ('asignaciones/cobertura.html', 'asignaciones:cobertura', False, {}),
+]
+
+
+@contextmanager
+def capturar_contexto(nombre_plantilla):
+    """Guarda el contexto y la petición con los que la vista renderiza `nombre_plantilla`"""
+    capturado = {}
+    render_original = Template.render
+
+    def render(plantilla, context=None, request=None):
+        if plantilla.origin.template_name == nombre_plantilla and 'contexto' not in capturado:
+            capturado['contexto'] = context
+            capturado['request'] = request
+        return render_original(plantilla, context, request)
+
+    Template.render = render
+    try:
+        yield capturado
+    finally:
+        Template.render = render_original
+
+
+@contextmanager
+def contar_consultas():
+    """
+    Consultas lanzadas dentro del bloque en 'default' y, si la copia está disponible, en
+    'analitica' (capturar un alias abre su conexión, así que no se toca si no se usa)
+    """
+    alias = [DEFAULT_DB_ALIAS] + ([ALIAS_ANALITICA] if alias_analitica_disponible() else [])
+    with ExitStack() as pila:
+        capturas = [pila.enter_context(CaptureQueriesContext(connections[nombre])) for nombre in alias]
+        resultado = {}
+        yield resultado
+    resultado['total'] = sum(len(captura) for captura in capturas)
+
+
+class Command(BaseCommand):
+    help = 'Mide los ms por renderizado de las plantillas principales con el contexto real de sus vistas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticiones', type=int, default=20, help='Renderizados por plantilla (20 por defecto)')
+        parser.add_argument('--operario', type=int, help='Operario de las páginas de detalle (por defecto, el que más inspecciones tiene)')
+        parser.add_argument('--limite-ms', type=float, default=0, help='Termina con error si la mediana de alguna plantilla supera estos ms (0 = sin límite)')
+
+    def handle(self, *args, **options):
+        if options['repeticiones'] < 1:
+            raise CommandError('--repeticiones debe ser mayor que 0')
+        usuario = get_user_model().objects.filter(is_active=True).order_by('-is_superuser', 'pk').first()
+        if usuario is None:
+            raise CommandError('Hace falta al menos un usuario activo (p. ej. python manage.py crear_demo_data)')
+        operario_pk = options['operario'] or self.operario_con_mas_inspecciones()
+        if operario_pk is None:
+            raise CommandError('No hay operarios; cargue datos antes de medir (python manage.py crear_demo_data)')
+
+        self.stdout.write(f'Operario de las páginas de detalle: {operario_pk}; {options["repeticiones"]} renderizados por plantilla')
+        self.stdout.write(f'  {"Plantilla":<45} {"Compilar":>9} {"Mediana":>9} {"p95":>9} {"Consultas":>10}')
+        fabrica = RequestFactory()
+        excedidas = []
+        for nombre_plantilla, nombre_url, con_operario, parametros in PAGINAS:
+            ruta = reverse(nombre_url, args=[operario_pk] if con_operario else [])
+            request = fabrica.get(ruta, parametros)
+            request.user = usuario
+            contexto, request = self.contexto_de_vista(nombre_plantilla, request)
+
+            compilacion = self.medir_compilacion(nombre_plantilla)
+            plantilla = engines['django'].get_template(nombre_plantilla)
+            # Un renderizado de calentamiento: consultas perezosas que se cachean en los objetos
+            plantilla.render(contexto, request)
+
+            tiempos = []
+            with contar_consultas() as consultas:
+                for _ in range(options['repeticiones']):
+                    inicio = time.perf_counter()
+                    plantilla.render(contexto, request)
+                    tiempos.append((time.perf_counter() - inicio) * 1000)
+            mediana = statistics.median(tiempos)
+            p95 = sorted(tiempos)[max(int(len(tiempos) * 0.95) - 1, 0)]
+            por_render = consultas['total'] / options['repeticiones']
+
+            etiqueta = nombre_plantilla + (f' ?{request.GET.urlencode()}' if parametros else '')
+            linea = f'  {etiqueta:<45} {compilacion:>7.2f}ms {mediana:>7.2f}ms {p95:>7.2f}ms {por_render:>10.1f}'
+            if options['limite_ms'] and mediana > options['limite_ms']:
+                excedidas.append(etiqueta)
+                self.stdout.write(self.style.ERROR(linea))
+            elif por_render:
+                self.stdout.write(self.style.WARNING(linea))
+            else:
+                self.stdout.write(linea)
+
+        if excedidas:
+            raise CommandError(f"Superan {options['limite_ms']} ms por renderizado: {', '.join(excedidas)}")
+        self.stdout.write(self.style.SUCCESS('Benchmark de plantillas completado'))
+
+    def operario_con_mas_inspecciones(self):
+        return Operario.objects.annotate(
+            total=Count('certificaciones__inspecciones')
+        ).order_by('-total', 'pk').values_list('pk', flat=True).first()
+
+    def contexto_de_vista(self, nombre_plantilla, request):
+        """Ejecuta la vista de la petición y retorna el contexto con el que renderiza la plantilla"""
+        coincidencia = resolve(request.path_info)
+        with capturar_contexto(nombre_plantilla) as capturado:
+            respuesta = coincidencia.func(request, *coincidencia.args, **coincidencia.kwargs)
+        if 'contexto' not in capturado:
+            raise CommandError(f'{request.path_info} no renderiza {nombre_plantilla} (respuesta {respuesta.status_code})')
+        return capturado['contexto'], capturado['request'] or request
+
+    def medir_compilacion(self, nombre_plantilla):
+        """ms de cargar y compilar la plantilla con la caché del cargador vacía"""
+        motor = engines['django'].engine
+        for cargador in motor.template_loaders:
+            if hasattr(cargador, 'reset'):
+                cargador.reset()
+        inicio = time.perf_counter()
+        motor.get_template(nombre_plantilla)
+        return (time.perf_counter() - inicio) * 1000
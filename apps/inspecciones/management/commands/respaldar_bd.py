@@ -0,0 +1,116 @@
+"""
+Comando de gestión para hacer una copia de seguridad de la base de datos en caliente.
+Uso: python manage.py respaldar_bd [--directorio respaldos/] [--conservar 7] [--paginas 1024] [--pausa 0.05]
+
+Copia 'default' con la API de copia en línea de SQLite, por bloques de páginas: entre un
+paso y el siguiente los escritores pueden seguir registrando inspecciones, así que no
+hace falta parar la aplicación (copiar el fichero a mano con escrituras en curso puede
+dejar una copia corrupta). En modo WAL (perfil de producción) la copia se hace sobre una
+transacción de lectura abierta durante todo el proceso: los lectores WAL no bloquean a
+los escritores y así la copia es una foto coherente que no vuelve a empezar cada vez que
+alguien escribe. En modo rollback no se puede mantener ese bloqueo sin frenar las
+escrituras, y la copia se reinicia si la base cambia entre dos pasos.
+
+La copia se escribe primero en un fichero .parcial, se comprueba con PRAGMA
+integrity_check y solo entonces se renombra a <base>-AAAAMMDD-HHMMSS.sqlite3. Después
+se borran las copias más antiguas que excedan --conservar.
+"""
+import os
+import sqlite3
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = 'Copia de seguridad en caliente de la base de datos SQLite, verificada y con rotación'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--directorio', help='Directorio de las copias (INSPECCIONES_RESPALDOS_DIR, respaldos/ por defecto)')
+        parser.add_argument('--conservar', type=int, help='Copias que se conservan (INSPECCIONES_RESPALDOS_CONSERVAR, 7 por defecto)')
+        parser.add_argument('--paginas', type=int, default=1024, help='Páginas copiadas por paso (1024 por defecto)')
+        parser.add_argument('--pausa', type=float, default=0.05, help='Segundos de espera entre pasos si la base está ocupada (0.05 por defecto)')
+
+    def handle(self, *args, **options):
+        origen = settings.DATABASES['default']
+        if not origen['ENGINE'].endswith('sqlite3'):
+            raise CommandError('respaldar_bd solo copia bases SQLite; con PostgreSQL use pg_dump o pg_basebackup')
+        conservar = options['conservar']
+        if conservar is None:
+            conservar = settings.INSPECCIONES_RESPALDOS_CONSERVAR
+        if conservar < 1:
+            raise CommandError('--conservar debe ser al menos 1')
+        if options['paginas'] < 1:
+            raise CommandError('--paginas debe ser mayor que 0')
+
+        ruta_origen = Path(origen['NAME'])
+        if not ruta_origen.exists():
+            raise CommandError(f'No existe la base de datos {ruta_origen}')
+        directorio = Path(options['directorio'] or settings.INSPECCIONES_RESPALDOS_DIR)
+        directorio.mkdir(parents=True, exist_ok=True)
+
+        marca = timezone.localtime().strftime('%Y%m%d-%H%M%S')
+        ruta_final = directorio / f'{ruta_origen.stem}-{marca}.sqlite3'
+        ruta_parcial = ruta_final.with_name(ruta_final.name + '.parcial')
+
+        try:
+            segundos, pasos = self.copiar(ruta_origen, ruta_parcial, options['paginas'], options['pausa'])
+            self.verificar(ruta_parcial)
+        except BaseException:
+            ruta_parcial.unlink(missing_ok=True)
+            raise
+        os.replace(ruta_parcial, ruta_final)
+
+        megas = ruta_final.stat().st_size / (1024 * 1024)
+        velocidad = megas / segundos if segundos > 0 else 0
+        self.stdout.write(f'  {megas:.1f} MB en {pasos} pasos, {segundos:.2f} s ({velocidad:.1f} MB/s); integrity_check: ok')
+
+        for antigua in self.rotar(directorio, ruta_origen.stem, conservar):
+            self.stdout.write(f'  Borrada la copia antigua {antigua.name}')
+        self.stdout.write(self.style.SUCCESS(f'Copia de seguridad creada: {ruta_final}'))
+
+    def copiar(self, ruta_origen, ruta_destino, paginas, pausa):
+        """Copia en línea por bloques de `paginas` páginas. Retorna (segundos, pasos)"""
+        pasos = 0
+
+        def progreso(estado, restantes, total):
+            nonlocal pasos
+            pasos += 1
+
+        inicio = time.perf_counter()
+        # Solo lectura: la copia nunca toma el bloqueo de escritura sobre la base de datos
+        origen = sqlite3.connect(f'{ruta_origen.resolve().as_uri()}?mode=ro', uri=True, isolation_level=None)
+        destino = sqlite3.connect(ruta_destino)
+        try:
+            wal = origen.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+            if wal:
+                # Fija la foto que se copia; los pasos de backup() la reutilizan
+                origen.execute('BEGIN')
+                origen.execute('SELECT count(*) FROM sqlite_master').fetchone()
+            origen.backup(destino, pages=paginas, progress=progreso, sleep=pausa)
+            if wal:
+                origen.execute('COMMIT')
+        finally:
+            destino.close()
+            origen.close()
+        return time.perf_counter() - inicio, pasos
+
+    def verificar(self, ruta):
+        conexion = sqlite3.connect(ruta)
+        try:
+            resultado = [fila[0] for fila in conexion.execute('PRAGMA integrity_check')]
+        finally:
+            conexion.close()
+        if resultado != ['ok']:
+            raise CommandError('La copia no supera PRAGMA integrity_check: ' + '; '.join(resultado[:5]))
+
+    def rotar(self, directorio, base, conservar):
+        """Borra las copias más antiguas de `base` por encima de `conservar`; retorna las borradas"""
+        # El nombre lleva la fecha en formato ordenable, así que basta con ordenarlos
+        copias = sorted(directorio.glob(f'{base}-????????-??????.sqlite3'), reverse=True)
+        for antigua in copias[conservar:]:
+            antigua.unlink()
+        return copias[conservar:]
@@ -0,0 +1,21 @@
+# Generated by Django 6.0 on 2026-10-19 10:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inspecciones', '0002_inspeccionproducto_numero_orden_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inspeccionproducto',
+            index=models.Index(fields=['fecha_inspeccion', 'fecha_creacion'], name='inspeccion_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='periodovalidacioncertificacion',
+            index=models.Index(condition=models.Q(('esta_completado', False), ('esta_vigente', True)), fields=['fecha_fin_periodo'], name='periodo_pendiente_fin_idx'),
+        ),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 6.0 on 2026-10-19 10:40
+
+from django.db import migrations
+
+# SQLite: tabla FTS5 de contenido externo sobre inspecciones_inspeccionproducto, mantenida
+# por triggers (también cubren update()/bulk_create y cambios hechos fuera del ORM).
+# Ojo: si una migración futura reconstruye la tabla de inspecciones en SQLite
+# (_remake_table), los triggers se pierden y hay que volver a crearlos.
+SQLITE_CREAR = [
+    """
+    CREATE VIRTUAL TABLE inspecciones_busqueda USING fts5(
+        observaciones,
+        numero_orden,
+        content='inspecciones_inspeccionproducto',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER inspecciones_busqueda_ai AFTER INSERT ON inspecciones_inspeccionproducto BEGIN
+        INSERT INTO inspecciones_busqueda(rowid, observaciones, numero_orden)
+        VALUES (new.id, new.observaciones, new.numero_orden);
+    END
+    """,
+    """
+    CREATE TRIGGER inspecciones_busqueda_ad AFTER DELETE ON inspecciones_inspeccionproducto BEGIN
+        INSERT INTO inspecciones_busqueda(inspecciones_busqueda, rowid, observaciones, numero_orden)
+        VALUES ('delete', old.id, old.observaciones, old.numero_orden);
+    END
+    """,
+    """
+    CREATE TRIGGER inspecciones_busqueda_au AFTER UPDATE OF observaciones, numero_orden
+    ON inspecciones_inspeccionproducto BEGIN
+        INSERT INTO inspecciones_busqueda(inspecciones_busqueda, rowid, observaciones, numero_orden)
+        VALUES ('delete', old.id, old.observaciones, old.numero_orden);
+        INSERT INTO inspecciones_busqueda(rowid, observaciones, numero_orden)
+        VALUES (new.id, new.observaciones, new.numero_orden);
+    END
+    """,
+    # Indexa las inspecciones existentes
+    "INSERT INTO inspecciones_busqueda(inspecciones_busqueda) VALUES ('rebuild')",
+]
+
+SQLITE_ELIMINAR = [
+    'DROP TRIGGER IF EXISTS inspecciones_busqueda_au',
+    'DROP TRIGGER IF EXISTS inspecciones_busqueda_ad',
+    'DROP TRIGGER IF EXISTS inspecciones_busqueda_ai',
+    'DROP TABLE IF EXISTS inspecciones_busqueda',
+]
+
+# PostgreSQL: índice GIN sobre la misma expresión que genera SearchVector en busqueda.py
+POSTGRES_CREAR = [
+    """
+    CREATE INDEX inspecciones_busqueda_gin ON inspecciones_inspeccionproducto
+    USING GIN (to_tsvector('spanish'::regconfig,
+        COALESCE(observaciones, '') || ' ' || COALESCE(numero_orden, '')))
+    """,
+]
+
+POSTGRES_ELIMINAR = ['DROP INDEX IF EXISTS inspecciones_busqueda_gin']
+
+
+def ejecutar(sentencias_por_motor):
+    def operacion(apps, schema_editor):
+        for sentencia in sentencias_por_motor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sentencia)
+    return operacion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inspecciones', '0003_indices_consultas'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            ejecutar({'sqlite': SQLITE_CREAR, 'postgresql': POSTGRES_CREAR}),
+            ejecutar({'sqlite': SQLITE_ELIMINAR, 'postgresql': POSTGRES_ELIMINAR}),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 6.0 on 2026-10-19 11:20
+
+import re
+
+from django.db import migrations, models
+
+
+def rellenar_numero_orden_normalizado(apps, schema_editor):
+    # Copia de normalizar_numero_orden (las migraciones no dependen del código de los modelos)
+    InspeccionProducto = apps.get_model('inspecciones', 'InspeccionProducto')
+
+    pendientes = []
+    for inspeccion in InspeccionProducto.objects.exclude(numero_orden=None).only('pk', 'numero_orden').iterator(chunk_size=2000):
+        inspeccion.numero_orden_normalizado = re.sub(r'[^0-9A-Z]', '', inspeccion.numero_orden.upper()) or None
+        pendientes.append(inspeccion)
+        if len(pendientes) >= 2000:
+            InspeccionProducto.objects.bulk_update(pendientes, ['numero_orden_normalizado'])
+            pendientes = []
+    if pendientes:
+        InspeccionProducto.objects.bulk_update(pendientes, ['numero_orden_normalizado'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inspecciones', '0004_busqueda_texto'),
+    ]
+
+    operations = [
+        # Nullable y sin default: en SQLite se añade con ALTER TABLE sin reconstruir la tabla,
+        # así se conservan los triggers de búsqueda de la migración 0004
+        migrations.AddField(
+            model_name='inspeccionproducto',
+            name='numero_orden_normalizado',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=100, null=True, verbose_name='Número de orden normalizado'),
+        ),
+        migrations.RunPython(rellenar_numero_orden_normalizado, migrations.RunPython.noop),
+    ]
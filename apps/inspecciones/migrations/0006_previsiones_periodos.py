@@ -0,0 +1,30 @@
+# Generated by Django 6.0 on 2026-10-19 16:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inspecciones', '0005_numero_orden_normalizado'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PrevisionPeriodo',
+            fields=[
+                ('periodo', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='prevision', serialize=False, to='inspecciones.periodovalidacioncertificacion', verbose_name='Periodo')),
+                ('ritmo_diario', models.FloatField(verbose_name='Ritmo (piezas por día laborable)')),
+                ('piezas_faltantes', models.IntegerField(verbose_name='Piezas faltantes')),
+                ('fecha_prevista', models.DateField(blank=True, help_text='Vacía si no hay actividad reciente con la que estimarla', null=True, verbose_name='Fecha prevista de finalización')),
+                ('dias_retraso', models.IntegerField(blank=True, help_text='Días entre el fin del periodo y la fecha prevista (positivo: termina tarde)', null=True, verbose_name='Días de retraso previstos')),
+                ('en_riesgo', models.BooleanField(default=False, help_text='Se prevé terminar después del fin del periodo (o no hay ritmo para terminarlo)', verbose_name='En riesgo')),
+                ('fecha_calculo', models.DateTimeField(verbose_name='Fecha de cálculo')),
+            ],
+            options={
+                'verbose_name': 'Previsión de Periodo',
+                'verbose_name_plural': 'Previsiones de Periodos',
+            },
+        ),
+    ]
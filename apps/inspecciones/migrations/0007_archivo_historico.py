@@ -0,0 +1,90 @@
+# Generated by Django 6.0 on 2026-10-19 18:05
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('asignaciones', '0004_estado_periodo_actual'),
+        ('auditores', '0002_auditor_capacidad_diaria'),
+        ('auditorias', '0001_initial'),
+        ('inspecciones', '0006_previsiones_periodos'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PeriodoArchivado',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False, verbose_name='Id original')),
+                ('anio', models.IntegerField(verbose_name='Año')),
+                ('numero_periodo', models.IntegerField(verbose_name='Número de periodo')),
+                ('fecha_inicio_periodo', models.DateField(verbose_name='Fecha inicio periodo')),
+                ('fecha_fin_periodo', models.DateField(verbose_name='Fecha fin periodo')),
+                ('numero_dias_laborales_req', models.IntegerField(verbose_name='Número de días laborables requeridos')),
+                ('inspecciones_requeridas', models.IntegerField(verbose_name='Piezas requeridas')),
+                ('inspecciones_realizadas', models.IntegerField(verbose_name='Piezas realizadas')),
+                ('esta_completado', models.BooleanField(verbose_name='Está completado')),
+                ('fecha_completado', models.DateField(blank=True, null=True, verbose_name='Fecha completado')),
+                ('fecha_creacion', models.DateTimeField(verbose_name='Fecha de creación')),
+                ('fecha_archivo', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha de archivo')),
+                ('operario_certificacion', models.ForeignKey(on_delete=django.db.models.deletion.RESTRICT, related_name='periodos_archivados', to='asignaciones.operariocertificacion', verbose_name='Asignación Operario-Certificación')),
+                ('usuario_creacion', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.RESTRICT, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Usuario creación')),
+            ],
+            options={
+                'verbose_name': 'Periodo Archivado',
+                'verbose_name_plural': 'Periodos Archivados',
+                'ordering': ['operario_certificacion', 'numero_periodo'],
+            },
+        ),
+        migrations.CreateModel(
+            name='InspeccionArchivada',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False, verbose_name='Id original')),
+                ('anio', models.IntegerField(verbose_name='Año')),
+                ('fecha_inspeccion', models.DateField(verbose_name='Fecha de inspección')),
+                ('piezas_auditadas', models.IntegerField(verbose_name='Piezas auditadas')),
+                ('resultado_inspeccion', models.CharField(blank=True, choices=[('OK', 'OK'), ('NO OK', 'NO OK')], max_length=10, null=True, verbose_name='Resultado inspección')),
+                ('observaciones', models.TextField(blank=True, null=True, verbose_name='Observaciones')),
+                ('numero_orden', models.CharField(blank=True, max_length=100, null=True, verbose_name='Número de orden')),
+                ('numero_orden_normalizado', models.CharField(blank=True, max_length=100, null=True, verbose_name='Número de orden normalizado')),
+                ('fecha_creacion', models.DateTimeField(verbose_name='Fecha de creación')),
+                ('fecha_actualizacion', models.DateTimeField(verbose_name='Fecha de actualización')),
+                ('fecha_archivo', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha de archivo')),
+                ('auditor', models.ForeignKey(on_delete=django.db.models.deletion.RESTRICT, related_name='inspecciones_archivadas', to='auditores.auditor', verbose_name='Auditor')),
+                ('auditoria_producto', models.ForeignKey(on_delete=django.db.models.deletion.RESTRICT, related_name='inspecciones_archivadas', to='auditorias.auditoriaproducto', verbose_name='Auditoría de producto')),
+                ('operario_certificacion', models.ForeignKey(on_delete=django.db.models.deletion.RESTRICT, related_name='inspecciones_archivadas', to='asignaciones.operariocertificacion', verbose_name='Asignación Operario-Certificación')),
+                ('usuario_creacion', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.RESTRICT, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Usuario creación')),
+                ('periodo_validacion', models.ForeignKey(on_delete=django.db.models.deletion.RESTRICT, related_name='inspecciones', to='inspecciones.periodoarchivado', verbose_name='Periodo de validación')),
+            ],
+            options={
+                'verbose_name': 'Inspección Archivada',
+                'verbose_name_plural': 'Inspecciones Archivadas',
+                'ordering': ['-fecha_inspeccion', '-fecha_creacion'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='periodoarchivado',
+            index=models.Index(fields=['anio', 'operario_certificacion'], name='periodo_archivado_anio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='periodoarchivado',
+            index=models.Index(fields=['operario_certificacion', 'numero_periodo'], name='periodo_archivado_asig_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inspeccionarchivada',
+            index=models.Index(fields=['anio', 'operario_certificacion'], name='inspeccion_archivada_anio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inspeccionarchivada',
+            index=models.Index(fields=['operario_certificacion', 'fecha_inspeccion'], name='inspeccion_archivada_asig_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inspeccionarchivada',
+            index=models.Index(fields=['auditor', 'fecha_inspeccion'], name='inspeccion_archivada_aud_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-19 19:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inspecciones', '0007_archivo_historico'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='previsionperiodo',
+            name='en_riesgo',
+            field=models.BooleanField(default=False, help_text='Se prevé terminar después del fin del periodo (sin fecha prevista no se marca)', verbose_name='En riesgo'),
+        ),
+        migrations.AlterField(
+            model_name='previsionperiodo',
+            name='fecha_prevista',
+            field=models.DateField(blank=True, help_text='Vacía si el periodo no tiene actividad reciente con la que estimarla', null=True, verbose_name='Fecha prevista de finalización'),
+        ),
+    ]
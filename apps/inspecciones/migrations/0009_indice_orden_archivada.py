@@ -0,0 +1,17 @@
+# Generated by Django 6.0 on 2026-10-19 20:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inspecciones', '0008_prevision_sin_estimacion'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inspeccionarchivada',
+            index=models.Index(fields=['numero_orden_normalizado'], name='inspeccion_archivada_orden_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-19 21:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inspecciones', '0009_indice_orden_archivada'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='previsionperiodo',
+            name='en_riesgo',
+            field=models.BooleanField(default=False, help_text='Se prevé terminar después del fin del periodo (sin actividad reciente no se marca)', verbose_name='En riesgo'),
+        ),
+        migrations.AlterField(
+            model_name='previsionperiodo',
+            name='fecha_prevista',
+            field=models.DateField(blank=True, help_text='Vacía si el periodo no tiene actividad reciente con la que estimarla o si a ese ritmo no se termina ni con margen', null=True, verbose_name='Fecha prevista de finalización'),
+        ),
+    ]
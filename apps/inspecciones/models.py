@@ -1,11 +1,51 @@
+import bisect
+import logging
+import re
+import uuid
 from django.db import models
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 from apps.asignaciones.models import OperarioCertificacion
 from apps.auditorias.models import AuditoriaProducto
 from apps.auditores.models import Auditor
 
+logger = logging.getLogger(__name__)
+
+# Clave en la caché compartida con la versión vigente de la configuración.
+# Cada proceso guarda su propia copia de la configuración junto con la versión
+# con la que la leyó; cuando la versión cambia (signal al guardar/borrar) se recarga.
+CONFIGURACION_VERSION_CACHE_KEY = 'inspecciones:configuracion:version'
+_configuracion_proceso = {'version': None}
+
+
+def _configuracion_cacheada():
+    """
+    Retorna el diccionario de configuración cacheado en el proceso, vaciándolo
+    si la versión de la caché compartida ha cambiado desde la última lectura.
+    """
+    global _configuracion_proceso
+
+    version = cache.get(CONFIGURACION_VERSION_CACHE_KEY)
+    if version is None:
+        cache.add(CONFIGURACION_VERSION_CACHE_KEY, uuid.uuid4().hex, None)
+        version = cache.get(CONFIGURACION_VERSION_CACHE_KEY)
+
+    if version is None or version != _configuracion_proceso['version']:
+        _configuracion_proceso = {'version': version}
+    return _configuracion_proceso
+
+
+def normalizar_numero_orden(numero_orden):
+    """
+    Referencia de orden normalizada para búsquedas: mayúsculas y solo letras y dígitos,
+    de modo que 'of-123', 'OF 123' y 'OF123' se traten como la misma orden.
+    """
+    if not numero_orden:
+        return None
+    return re.sub(r'[^0-9A-Z]', '', numero_orden.upper()) or None
+
 
 class ConfiguracionInspecciones(models.Model):
     """Configuración global para inspecciones"""
@@ -41,10 +81,92 @@ class ConfiguracionInspecciones(models.Model):
     def __str__(self):
         return f"Configuración: {self.inspecciones_minimas} inspecciones en {self.numero_dias_laborales_req} días"
 
+    def clean(self):
+        if self.fecha_inicio_vigencia and self.fecha_fin_vigencia:
+            if self.fecha_fin_vigencia < self.fecha_inicio_vigencia:
+                raise ValidationError("La fecha de fin de vigencia no puede ser anterior a la fecha de inicio")
+
+        otras = ConfiguracionInspecciones.objects.exclude(pk=self.pk) if self.pk else ConfiguracionInspecciones.objects.all()
+
+        if self.esta_activo and otras.filter(esta_activo=True).exists():
+            raise ValidationError(
+                "Ya existe una configuración activa. Desactívela antes de activar otra."
+            )
+
+        # Los intervalos de vigencia no pueden solaparse
+        if self.fecha_inicio_vigencia:
+            solapadas = otras.filter(fecha_inicio_vigencia__isnull=False).filter(
+                models.Q(fecha_fin_vigencia__isnull=True) | models.Q(fecha_fin_vigencia__gte=self.fecha_inicio_vigencia)
+            )
+            if self.fecha_fin_vigencia:
+                solapadas = solapadas.filter(fecha_inicio_vigencia__lte=self.fecha_fin_vigencia)
+            if solapadas.exists():
+                raise ValidationError("El intervalo de vigencia se solapa con el de otra configuración")
+
     @classmethod
     def get_activa(cls):
-        """Retorna la configuración activa"""
-        return cls.objects.filter(esta_activo=True).first()
+        """
+        Retorna la configuración activa, cacheada a nivel de proceso.
+        Solo consulta la base de datos cuando la versión de la caché compartida ha cambiado.
+        """
+        cacheada = _configuracion_cacheada()
+        if 'activa' not in cacheada:
+            cacheada['activa'] = cls.cargar_activa()
+        return cacheada['activa']
+
+    @classmethod
+    def get_para_fecha(cls, fecha):
+        """
+        Retorna la configuración en vigor en una fecha según su intervalo de vigencia
+        (fecha_inicio_vigencia / fecha_fin_vigencia, ambos inclusive).
+        Si ninguna configuración cubre la fecha, retorna la configuración activa.
+
+        Los intervalos se cargan una sola vez por versión de la caché y se resuelven
+        con búsqueda binaria, por lo que es apto para recálculos masivos.
+        """
+        if fecha is None:
+            return cls.get_activa()
+
+        cacheada = _configuracion_cacheada()
+        if 'vigencias' not in cacheada:
+            cacheada['vigencias'] = cls.cargar_vigencias()
+        inicios, configuraciones = cacheada['vigencias']
+
+        posicion = bisect.bisect_right(inicios, fecha) - 1
+        if posicion >= 0:
+            config = configuraciones[posicion]
+            if config.fecha_fin_vigencia is None or fecha <= config.fecha_fin_vigencia:
+                return config
+        return cls.get_activa()
+
+    @classmethod
+    def cargar_activa(cls):
+        """Lee de la base de datos la configuración activa (la más reciente si hay varias)"""
+        activas = list(cls.objects.filter(esta_activo=True).order_by('-fecha_creacion', '-pk')[:2])
+        if len(activas) > 1:
+            logger.warning(
+                "Hay más de una configuración de inspecciones activa; se usa la más reciente (id=%s)",
+                activas[0].pk
+            )
+        return activas[0] if activas else None
+
+    @classmethod
+    def cargar_vigencias(cls):
+        """
+        Lee las configuraciones con fecha de inicio de vigencia, ordenadas por inicio.
+        Retorna (lista de fechas de inicio, lista de configuraciones) para búsqueda binaria.
+        """
+        configuraciones = list(
+            cls.objects.filter(fecha_inicio_vigencia__isnull=False).order_by('fecha_inicio_vigencia', 'pk')
+        )
+        return [c.fecha_inicio_vigencia for c in configuraciones], configuraciones
+
+    @classmethod
+    def invalidar_cache(cls):
+        """Fuerza a todos los procesos a recargar la configuración en la siguiente lectura"""
+        global _configuracion_proceso
+        _configuracion_proceso = {'version': None}
+        cache.set(CONFIGURACION_VERSION_CACHE_KEY, uuid.uuid4().hex, None)
 
 
 class PeriodoValidacionCertificacion(models.Model):
@@ -95,6 +217,14 @@ class PeriodoValidacionCertificacion(models.Model):
                 name='periodo_vigente_unico'
             )
         ]
+        indexes = [
+            # Periodos pendientes por fecha de fin: caducidades y dashboard
+            models.Index(
+                fields=['fecha_fin_periodo'],
+                condition=models.Q(esta_vigente=True, esta_completado=False),
+                name='periodo_pendiente_fin_idx'
+            ),
+        ]
         ordering = ['operario_certificacion', 'numero_periodo']
 
     def __str__(self):
@@ -147,6 +277,8 @@ class InspeccionProducto(models.Model):
     observaciones = models.TextField(blank=True, null=True, verbose_name="Observaciones")
     numero_orden = models.CharField(max_length=100, blank=True, null=True, verbose_name="Número de orden",
                                     help_text="Número de orden que generó las piezas")
+    numero_orden_normalizado = models.CharField(max_length=100, blank=True, null=True, editable=False,
+                                                db_index=True, verbose_name="Número de orden normalizado")
     fecha_creacion = models.DateTimeField(default=timezone.now, verbose_name="Fecha de creación")
     usuario_creacion = models.ForeignKey(
         User,
@@ -173,19 +305,196 @@ class InspeccionProducto(models.Model):
         indexes = [
             models.Index(fields=['operario_certificacion', 'fecha_inspeccion']),
             models.Index(fields=['periodo_validacion', 'fecha_inspeccion']),
+            # Listado general (orden por defecto) y estadísticas por rango de fechas
+            models.Index(fields=['fecha_inspeccion', 'fecha_creacion'], name='inspeccion_fecha_idx'),
         ]
 
     def __str__(self):
         return f"Inspección {self.fecha_inspeccion} - {self.operario_certificacion}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.guardar_estado_original()
+        return instance
+
+    def save(self, *args, **kwargs):
+        self.numero_orden_normalizado = normalizar_numero_orden(self.numero_orden)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'numero_orden' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'numero_orden_normalizado'}
+        super().save(*args, **kwargs)
+
+    def guardar_estado_original(self):
+        """
+        Guarda las piezas, el periodo y la fecha tal y como están en la base de datos,
+        para que los signals apliquen solo la diferencia al contador del periodo
+        (y al contador de inspecciones del mes del dashboard).
+        """
+        self._piezas_originales = self.__dict__.get('piezas_auditadas')
+        self._periodo_original_id = self.__dict__.get('periodo_validacion_id')
+        self._fecha_original = self.__dict__.get('fecha_inspeccion')
+
     def clean(self):
         # Validar que la fecha de inspección esté dentro del periodo
-        if self.periodo_validacion:
+        if self.periodo_validacion_id and self.fecha_inspeccion:
             if self.fecha_inspeccion < self.periodo_validacion.fecha_inicio_periodo:
                 raise ValidationError("La fecha de inspección no puede ser anterior al inicio del periodo")
             if self.fecha_inspeccion > self.periodo_validacion.fecha_fin_periodo:
                 raise ValidationError("La fecha de inspección no puede ser posterior al fin del periodo")
         
         # Validar que el periodo esté vigente
-        if self.periodo_validacion and not self.periodo_validacion.esta_vigente:
+        if self.periodo_validacion_id and not self.periodo_validacion.esta_vigente:
             raise ValidationError("No se pueden registrar inspecciones en periodos no vigentes")
+
+
+class PrevisionPeriodo(models.Model):
+    """
+    Previsión de finalización de un periodo vigente, precalculada por apps.inspecciones.prevision
+    a partir del ritmo reciente de piezas de la asignación. Se actualiza al guardar o eliminar
+    inspecciones de la asignación y cada noche con el comando actualizar_previsiones.
+    """
+    periodo = models.OneToOneField(
+        PeriodoValidacionCertificacion,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='prevision',
+        verbose_name="Periodo"
+    )
+    ritmo_diario = models.FloatField(verbose_name="Ritmo (piezas por día laborable)")
+    piezas_faltantes = models.IntegerField(verbose_name="Piezas faltantes")
+    fecha_prevista = models.DateField(blank=True, null=True, verbose_name="Fecha prevista de finalización",
+                                      help_text="Vacía si el periodo no tiene actividad reciente con la que estimarla o si a ese ritmo no se termina ni con margen")
+    dias_retraso = models.IntegerField(blank=True, null=True, verbose_name="Días de retraso previstos",
+                                       help_text="Días entre el fin del periodo y la fecha prevista (positivo: termina tarde)")
+    en_riesgo = models.BooleanField(default=False, verbose_name="En riesgo",
+                                    help_text="Se prevé terminar después del fin del periodo (sin actividad reciente no se marca)")
+    fecha_calculo = models.DateTimeField(verbose_name="Fecha de cálculo")
+
+    class Meta:
+        verbose_name = "Previsión de Periodo"
+        verbose_name_plural = "Previsiones de Periodos"
+
+    def __str__(self):
+        return f"Previsión {self.periodo}: {self.fecha_prevista or 'sin estimación'}"
+
+
+class PeriodoArchivado(models.Model):
+    """
+    Periodo cerrado (no vigente) trasladado fuera de la tabla de periodos por el comando
+    archivar_historico, junto con sus inspecciones. Conserva el id original; el año de la
+    fecha de fin (anio) es la clave de partición del archivo.
+    """
+    id = models.IntegerField(primary_key=True, verbose_name="Id original")
+    anio = models.IntegerField(verbose_name="Año")
+    operario_certificacion = models.ForeignKey(
+        OperarioCertificacion,
+        on_delete=models.RESTRICT,
+        related_name='periodos_archivados',
+        verbose_name="Asignación Operario-Certificación"
+    )
+    numero_periodo = models.IntegerField(verbose_name="Número de periodo")
+    fecha_inicio_periodo = models.DateField(verbose_name="Fecha inicio periodo")
+    fecha_fin_periodo = models.DateField(verbose_name="Fecha fin periodo")
+    numero_dias_laborales_req = models.IntegerField(verbose_name="Número de días laborables requeridos")
+    inspecciones_requeridas = models.IntegerField(verbose_name="Piezas requeridas")
+    inspecciones_realizadas = models.IntegerField(verbose_name="Piezas realizadas")
+    esta_completado = models.BooleanField(verbose_name="Está completado")
+    fecha_completado = models.DateField(blank=True, null=True, verbose_name="Fecha completado")
+    fecha_creacion = models.DateTimeField(verbose_name="Fecha de creación")
+    usuario_creacion = models.ForeignKey(
+        User,
+        on_delete=models.RESTRICT,
+        related_name='+',
+        null=True,
+        blank=True,
+        verbose_name="Usuario creación"
+    )
+    fecha_archivo = models.DateTimeField(default=timezone.now, verbose_name="Fecha de archivo")
+
+    # Un periodo archivado nunca es el vigente (para mostrarlo junto a los de la tabla principal)
+    esta_vigente = False
+    archivado = True
+
+    class Meta:
+        verbose_name = "Periodo Archivado"
+        verbose_name_plural = "Periodos Archivados"
+        indexes = [
+            models.Index(fields=['anio', 'operario_certificacion'], name='periodo_archivado_anio_idx'),
+            models.Index(fields=['operario_certificacion', 'numero_periodo'], name='periodo_archivado_asig_idx'),
+        ]
+        ordering = ['operario_certificacion', 'numero_periodo']
+
+    def __str__(self):
+        return f"Periodo {self.numero_periodo} (archivado) - {self.operario_certificacion_id} ({self.fecha_inicio_periodo} a {self.fecha_fin_periodo})"
+
+
+class InspeccionArchivada(models.Model):
+    """
+    Inspección de un periodo archivado (ver PeriodoArchivado). Conserva el id original;
+    el año de la inspección (anio) es la clave de partición del archivo.
+    """
+    id = models.IntegerField(primary_key=True, verbose_name="Id original")
+    anio = models.IntegerField(verbose_name="Año")
+    operario_certificacion = models.ForeignKey(
+        OperarioCertificacion,
+        on_delete=models.RESTRICT,
+        related_name='inspecciones_archivadas',
+        verbose_name="Asignación Operario-Certificación"
+    )
+    periodo_validacion = models.ForeignKey(
+        PeriodoArchivado,
+        on_delete=models.RESTRICT,
+        related_name='inspecciones',
+        verbose_name="Periodo de validación"
+    )
+    auditoria_producto = models.ForeignKey(
+        AuditoriaProducto,
+        on_delete=models.RESTRICT,
+        related_name='inspecciones_archivadas',
+        verbose_name="Auditoría de producto"
+    )
+    auditor = models.ForeignKey(
+        Auditor,
+        on_delete=models.RESTRICT,
+        related_name='inspecciones_archivadas',
+        verbose_name="Auditor"
+    )
+    fecha_inspeccion = models.DateField(verbose_name="Fecha de inspección")
+    piezas_auditadas = models.IntegerField(verbose_name="Piezas auditadas")
+    resultado_inspeccion = models.CharField(
+        max_length=10,
+        choices=InspeccionProducto.RESULTADO_CHOICES,
+        blank=True,
+        null=True,
+        verbose_name="Resultado inspección"
+    )
+    observaciones = models.TextField(blank=True, null=True, verbose_name="Observaciones")
+    numero_orden = models.CharField(max_length=100, blank=True, null=True, verbose_name="Número de orden")
+    numero_orden_normalizado = models.CharField(max_length=100, blank=True, null=True, verbose_name="Número de orden normalizado")
+    fecha_creacion = models.DateTimeField(verbose_name="Fecha de creación")
+    usuario_creacion = models.ForeignKey(
+        User,
+        on_delete=models.RESTRICT,
+        related_name='+',
+        null=True,
+        blank=True,
+        verbose_name="Usuario creación"
+    )
+    fecha_actualizacion = models.DateTimeField(verbose_name="Fecha de actualización")
+    fecha_archivo = models.DateTimeField(default=timezone.now, verbose_name="Fecha de archivo")
+
+    class Meta:
+        verbose_name = "Inspección Archivada"
+        verbose_name_plural = "Inspecciones Archivadas"
+        ordering = ['-fecha_inspeccion', '-fecha_creacion']
+        indexes = [
+            models.Index(fields=['anio', 'operario_certificacion'], name='inspeccion_archivada_anio_idx'),
+            models.Index(fields=['operario_certificacion', 'fecha_inspeccion'], name='inspeccion_archivada_asig_idx'),
+            models.Index(fields=['auditor', 'fecha_inspeccion'], name='inspeccion_archivada_aud_idx'),
+            # Trazabilidad por número de orden con ?historico=1 (búsqueda exacta y por prefijo)
+            models.Index(fields=['numero_orden_normalizado'], name='inspeccion_archivada_orden_idx'),
+        ]
+
+    def __str__(self):
+        return f"Inspección {self.fecha_inspeccion} (archivada) - {self.operario_certificacion_id}"
@@ -0,0 +1,161 @@
+"""
+Previsión de finalización de los periodos vigentes.
+
+El ritmo de cada periodo (piezas por día laborable) se estima con dos ventanas móviles
+sobre sus inspecciones recientes: la corta reacciona a cambios de ritmo y la larga suaviza
+semanas sueltas; se usa la media de ambas. Ninguna ventana empieza antes que el periodo, así
+que un periodo que empezó la semana pasada se mide sobre esa semana y no sobre 30 o 90 días.
+Las sumas de todos los periodos salen de una única consulta agrupada con agregados
+condicionales, y a partir de ellas se proyecta en días laborables la fecha en que se
+alcanzarán las piezas requeridas. Un periodo sin piezas en las ventanas queda sin estimación
+(sin fecha prevista y sin marcar en riesgo). Si al ritmo actual hacen falta más días laborables
+de los que quedan en el periodo más MARGEN_PROYECCION, se marca en riesgo sin fecha prevista:
+no se recorre el calendario hasta una fecha sin sentido (con ritmos ínfimos, siglos después).
+
+Los resultados se guardan en PrevisionPeriodo: el dashboard los lee ya calculados. Los signals
+de inspecciones recalculan solo la asignación afectada al confirmarse la transacción y el
+comando actualizar_previsiones lo recalcula todo (p. ej. cada noche, porque el ritmo baja
+también con los días sin actividad).
+"""
+import math
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from apps.asignaciones.utils import calcular_fecha_fin_periodo, dias_laborables_entre, siguiente_dia_laborable
+
+# Ventanas móviles en días naturales hacia atrás desde hoy
+VENTANA_CORTA = 30
+VENTANA_LARGA = 90
+
+# Días laborables más allá del fin del periodo hasta los que se proyecta una fecha prevista
+MARGEN_PROYECCION = 60
+
+
+def piezas_por_ventana(periodo_ids, hoy):
+    """
+    Piezas auditadas de cada periodo en cada ventana, en una sola consulta agrupada:
+    {periodo_id: (piezas_ventana_corta, piezas_ventana_larga)}
+    """
+    from .models import InspeccionProducto
+
+    inicio_corta = hoy - timedelta(days=VENTANA_CORTA - 1)
+    inicio_larga = hoy - timedelta(days=VENTANA_LARGA - 1)
+    filas = InspeccionProducto.objects.filter(
+        periodo_validacion_id__in=periodo_ids,
+        fecha_inspeccion__gte=inicio_larga,
+        fecha_inspeccion__lte=hoy
+    ).order_by().values('periodo_validacion_id').annotate(
+        corta=Sum('piezas_auditadas', filter=Q(fecha_inspeccion__gte=inicio_corta)),
+        larga=Sum('piezas_auditadas'),
+    )
+    return {fila['periodo_validacion_id']: (fila['corta'] or 0, fila['larga'] or 0) for fila in filas}
+
+
+def ritmo_diario(piezas_corta, piezas_larga, hoy, inicio_periodo):
+    """
+    Media de los ritmos (piezas por día laborable) de las dos ventanas. Cada ventana empieza
+    como pronto en `inicio_periodo`; una ventana sin días laborables aporta ritmo 0.
+    """
+    ritmos = []
+    for ventana, piezas in ((VENTANA_CORTA, piezas_corta), (VENTANA_LARGA, piezas_larga)):
+        inicio = max(hoy - timedelta(days=ventana - 1), inicio_periodo)
+        laborables = dias_laborables_entre(inicio, hoy)
+        ritmos.append(piezas / laborables if laborables else 0)
+    return sum(ritmos) / len(ritmos)
+
+
+def proyectar(periodo, ritmo, hoy):
+    """
+    Valores de PrevisionPeriodo para el periodo con el ritmo dado:
+    fecha en la que, a ese ritmo, se completarían las piezas que faltan.
+    """
+    faltantes = max(periodo.inspecciones_requeridas - periodo.inspecciones_realizadas, 0)
+    fuera_de_plazo = False
+    if faltantes == 0:
+        fecha_prevista = hoy
+    elif ritmo > 0:
+        dias = math.ceil(faltantes / ritmo)
+        inicio = siguiente_dia_laborable(hoy)
+        if dias > dias_laborables_entre(inicio, periodo.fecha_fin_periodo) + MARGEN_PROYECCION:
+            fecha_prevista = None
+            fuera_de_plazo = True
+        else:
+            fecha_prevista = calcular_fecha_fin_periodo(inicio, dias)
+    else:
+        fecha_prevista = None
+
+    if fecha_prevista is None:
+        # Sin actividad con la que estimar no se marca como retraso previsto; a un ritmo que no
+        # termina ni con el margen, sí, aunque no se calcule la fecha
+        dias_retraso = None
+        en_riesgo = fuera_de_plazo
+    else:
+        dias_retraso = (fecha_prevista - periodo.fecha_fin_periodo).days
+        en_riesgo = dias_retraso > 0
+
+    return {
+        'ritmo_diario': round(ritmo, 3),
+        'piezas_faltantes': faltantes,
+        'fecha_prevista': fecha_prevista,
+        'dias_retraso': dias_retraso,
+        'en_riesgo': en_riesgo,
+    }
+
+
+def calcular_previsiones(periodos, hoy=None):
+    """Previsiones (sin guardar) de los periodos dados, con una consulta para todos ellos"""
+    from .models import PrevisionPeriodo
+
+    hoy = hoy or timezone.now().date()
+    ahora = timezone.now()
+    piezas = piezas_por_ventana([periodo.pk for periodo in periodos], hoy)
+    return [
+        PrevisionPeriodo(
+            periodo=periodo,
+            fecha_calculo=ahora,
+            **proyectar(
+                periodo,
+                ritmo_diario(*piezas.get(periodo.pk, (0, 0)), hoy, periodo.fecha_inicio_periodo),
+                hoy
+            )
+        )
+        for periodo in periodos
+    ]
+
+
+def guardar_previsiones(previsiones):
+    """Inserta o actualiza las previsiones en bloque"""
+    from .models import PrevisionPeriodo
+
+    campos = ['ritmo_diario', 'piezas_faltantes', 'fecha_prevista', 'dias_retraso', 'en_riesgo', 'fecha_calculo']
+    PrevisionPeriodo.objects.bulk_create(
+        previsiones, update_conflicts=True, unique_fields=['periodo'], update_fields=campos
+    )
+
+
+def actualizar_previsiones(asignacion_ids=None):
+    """
+    Recalcula las previsiones de los periodos vigentes pendientes (de las asignaciones dadas,
+    o de todas) y elimina las de periodos que ya no lo están. Retorna el número calculado.
+    """
+    from .models import PeriodoValidacionCertificacion, PrevisionPeriodo
+
+    pendientes = PeriodoValidacionCertificacion.objects.filter(esta_vigente=True, esta_completado=False)
+    obsoletas = PrevisionPeriodo.objects.exclude(periodo__esta_vigente=True, periodo__esta_completado=False)
+    if asignacion_ids is not None:
+        pendientes = pendientes.filter(operario_certificacion_id__in=asignacion_ids)
+        obsoletas = obsoletas.filter(periodo__operario_certificacion_id__in=asignacion_ids)
+
+    with transaction.atomic():
+        obsoletas.delete()
+        previsiones = calcular_previsiones(list(pendientes))
+        guardar_previsiones(previsiones)
+    return len(previsiones)
+
+
+def programar_actualizacion(asignacion_id):
+    """Recalcula la previsión de la asignación cuando se confirme la transacción en curso"""
+    transaction.on_commit(lambda: actualizar_previsiones([asignacion_id]))
@@ -1,68 +1,224 @@
-from django.db.models.signals import post_save
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.db import transaction
 from django.utils import timezone
 from .models import InspeccionProducto, PeriodoValidacionCertificacion, ConfiguracionInspecciones
+from apps.asignaciones.cobertura import cambia_celda
+from apps.asignaciones.models import CAMPOS_ESTADO_PERIODO, OperarioCertificacion
 from apps.asignaciones.utils import calcular_fecha_fin_periodo, siguiente_dia_laborable
+from apps.auditores.estadisticas import invalidar_estadisticas
+from apps.usuarios.dashboard import notificar_inspeccion, notificar_periodo
+from .prevision import programar_actualizacion
 
 
 @receiver(post_save, sender=InspeccionProducto)
 def actualizar_periodo_y_crear_siguiente(sender, instance, created, **kwargs):
     """
-    Al registrar una inspección:
-    1. Suma las piezas auditadas al contador del periodo (no cuenta inspecciones, sino piezas)
-    2. Si llega a 29 piezas: marca periodo como completado y crea nuevo periodo
-    3. Verifica si el periodo ha vencido sin completarse
+    Al registrar o editar una inspección:
+    1. Aplica al contador del periodo la diferencia de piezas auditadas (no cuenta inspecciones, sino piezas)
+    2. Si llega a las piezas requeridas del periodo: lo marca como completado y crea el siguiente
+    3. Si baja de las piezas requeridas en un periodo completado: lo reabre
+    4. Verifica si el periodo ha vencido sin completarse
+    5. Avisa al dashboard en directo de los periodos e inspecciones del mes que cambian
+    6. Recalcula la previsión de finalización de la asignación (al confirmarse la transacción,
+       antes de publicar los avisos del dashboard, que ya la incluyen)
+    7. Descarta las series mensuales por auditor cacheadas si la inspección es (o era) de un mes cerrado
     """
+    fecha_original = None if created else getattr(instance, '_fecha_original', None)
+    programar_actualizacion(instance.operario_certificacion_id)
+    invalidar_estadisticas(instance.fecha_inspeccion, fecha_original)
     if created:
-        with transaction.atomic():
-            periodo = instance.periodo_validacion
-            
-            # Sumar las piezas auditadas de esta inspección al contador total
-            # El contador almacena el total de piezas auditadas, no el número de inspecciones
-            periodo.inspecciones_realizadas += instance.piezas_auditadas
-            periodo.save(update_fields=['inspecciones_realizadas', 'fecha_actualizacion'])
-            
-            config = ConfiguracionInspecciones.get_activa()
-            piezas_requeridas = config.inspecciones_minimas if config else 29
-            
-            # Si se alcanza el número requerido de piezas (29)
-            # Solo crear nuevo periodo cuando el actual está vigente (evita disparar
-            # periodos adicionales al poblar históricos no vigentes en datos de demo)
-            if periodo.esta_vigente and periodo.inspecciones_realizadas >= piezas_requeridas:
-                # Marcar periodo como completado
-                periodo.esta_completado = True
-                periodo.esta_vigente = False
-                periodo.fecha_completado = instance.fecha_inspeccion
-                periodo.save(update_fields=['esta_completado', 'esta_vigente', 'fecha_completado', 'fecha_actualizacion'])
-                
-                # Crear nuevo periodo
-                dias_laborables = config.numero_dias_laborales_req if config else 180
-                fecha_inicio_nuevo = siguiente_dia_laborable(instance.fecha_inspeccion)
-                fecha_fin_nuevo = calcular_fecha_fin_periodo(fecha_inicio_nuevo, dias_laborables)
-                
-                # Obtener el siguiente número de periodo
-                ultimo_periodo = PeriodoValidacionCertificacion.objects.filter(
-                    operario_certificacion=periodo.operario_certificacion
-                ).order_by('-numero_periodo').first()
-                
-                nuevo_numero = ultimo_periodo.numero_periodo + 1 if ultimo_periodo else 2
-                
-                PeriodoValidacionCertificacion.objects.create(
-                    operario_certificacion=periodo.operario_certificacion,
-                    numero_periodo=nuevo_numero,
-                    fecha_inicio_periodo=fecha_inicio_nuevo,
-                    fecha_fin_periodo=fecha_fin_nuevo,
-                    numero_dias_laborales_req=dias_laborables,
-                    inspecciones_requeridas=piezas_requeridas,
-                    inspecciones_realizadas=0,
-                    esta_completado=False,
-                    esta_vigente=True,
-                    usuario_creacion=instance.usuario_creacion
+        deltas = {instance.periodo_validacion_id: instance.piezas_auditadas}
+        notificar_inspeccion(instance.fecha_inspeccion, 1)
+    else:
+        if fecha_original and fecha_original.replace(day=1) != instance.fecha_inspeccion.replace(day=1):
+            notificar_inspeccion(fecha_original, -1)
+            notificar_inspeccion(instance.fecha_inspeccion, 1)
+
+        piezas_originales, periodo_original_id = _estado_original(instance)
+        if periodo_original_id == instance.periodo_validacion_id:
+            deltas = {instance.periodo_validacion_id: instance.piezas_auditadas - piezas_originales}
+        else:
+            # La inspección se ha movido de periodo: se descuenta de uno y se suma al otro
+            deltas = {
+                periodo_original_id: -piezas_originales,
+                instance.periodo_validacion_id: instance.piezas_auditadas,
+            }
+
+    with transaction.atomic():
+        for periodo_id, delta in deltas.items():
+            if delta:
+                periodo = aplicar_delta_piezas(
+                    periodo_id, delta, instance.fecha_inspeccion, instance.usuario_creacion,
+                    periodo=_periodo_cacheado(instance)
                 )
-            
-            # Verificar si el periodo ha vencido sin completarse
-            verificar_caducidad_periodo(periodo)
+                if periodo_id == instance.periodo_validacion_id:
+                    # Verificar si el periodo ha vencido sin completarse
+                    verificar_caducidad_periodo(periodo)
+
+    instance.guardar_estado_original()
+
+
+@receiver(post_delete, sender=InspeccionProducto)
+def descontar_piezas_inspeccion_eliminada(sender, instance, **kwargs):
+    """
+    Al eliminar una inspección se restan sus piezas del contador del periodo,
+    reabriendo el periodo si deja de alcanzar las piezas requeridas.
+    """
+    programar_actualizacion(instance.operario_certificacion_id)
+    invalidar_estadisticas(instance.fecha_inspeccion, getattr(instance, '_fecha_original', None))
+    notificar_inspeccion(instance.fecha_inspeccion, -1)
+    piezas_originales, periodo_original_id = _estado_original(instance)
+    if piezas_originales:
+        with transaction.atomic():
+            aplicar_delta_piezas(periodo_original_id, -piezas_originales, instance.fecha_inspeccion)
+
+
+def _estado_original(instance):
+    """
+    Retorna (piezas, periodo_id) de la inspección tal y como estaba guardada.
+    Si la instancia no se cargó desde la base de datos se usan sus valores actuales.
+    """
+    piezas = getattr(instance, '_piezas_originales', None)
+    periodo_id = getattr(instance, '_periodo_original_id', None)
+    if piezas is None:
+        piezas = instance.piezas_auditadas
+    if periodo_id is None:
+        periodo_id = instance.periodo_validacion_id
+    return piezas, periodo_id
+
+
+def _periodo_cacheado(instance):
+    """Periodo ya cargado en la inspección (p. ej. por el formulario), o None"""
+    if InspeccionProducto.periodo_validacion.is_cached(instance):
+        return instance.periodo_validacion
+    return None
+
+
+def aplicar_delta_piezas(periodo_id, delta, fecha_referencia, usuario=None, periodo=None):
+    """
+    Suma (o resta, si delta es negativo) piezas al contador del periodo con un UPDATE
+    atómico sobre F(), y aplica las transiciones de estado que correspondan:
+    completar y crear el siguiente periodo, o reabrir un periodo completado.
+    Si se recibe el periodo ya cargado, solo se releen sus campos de estado.
+    Retorna el periodo actualizado.
+    """
+    PeriodoValidacionCertificacion.objects.filter(pk=periodo_id).update(
+        inspecciones_realizadas=F('inspecciones_realizadas') + delta,
+        fecha_actualizacion=timezone.now()
+    )
+    if periodo is not None and periodo.pk == periodo_id:
+        estado = PeriodoValidacionCertificacion.objects.select_for_update().filter(pk=periodo_id).values(
+            'inspecciones_realizadas', 'esta_completado', 'esta_vigente', 'fecha_completado'
+        ).get()
+        for campo, valor in estado.items():
+            setattr(periodo, campo, valor)
+    else:
+        periodo = PeriodoValidacionCertificacion.objects.select_for_update().select_related(
+            'operario_certificacion'
+        ).get(pk=periodo_id)
+
+    # Umbral guardado en el periodo al crearlo (configuración en vigor en su inicio), el
+    # mismo que usan la previsión, el plan de inspecciones y la matriz de cobertura
+    piezas_requeridas = periodo.inspecciones_requeridas
+
+    if delta > 0 and periodo.esta_vigente and periodo.inspecciones_realizadas >= piezas_requeridas:
+        # Si se alcanza el número requerido de piezas
+        # Solo crear nuevo periodo cuando el actual está vigente (evita disparar
+        # periodos adicionales al poblar históricos no vigentes en datos de demo)
+        completar_periodo_y_crear_siguiente(periodo, fecha_referencia, usuario)
+    elif delta < 0 and periodo.esta_completado and periodo.inspecciones_realizadas < piezas_requeridas:
+        reabrir_periodo(periodo)
+    elif periodo.esta_vigente:
+        # Sin cambio de periodo: solo cambia el contador del resumen de la asignación, y la
+        # matriz de cobertura solo si cambia la celda
+        OperarioCertificacion.guardar_estado_periodo(
+            periodo.operario_certificacion_id, periodo, invalidar=cambia_celda(periodo, delta)
+        )
+
+    notificar_periodo(periodo_id)
+    return periodo
+
+
+def completar_periodo_y_crear_siguiente(periodo, fecha_completado, usuario=None):
+    """
+    Marca el periodo como completado y crea el siguiente periodo vigente,
+    con los valores de la configuración en vigor en su fecha de inicio.
+    """
+    # Marcar periodo como completado
+    periodo.esta_completado = True
+    periodo.esta_vigente = False
+    periodo.fecha_completado = fecha_completado
+    periodo.save(update_fields=['esta_completado', 'esta_vigente', 'fecha_completado', 'fecha_actualizacion'])
+
+    # Crear nuevo periodo
+    fecha_inicio_nuevo = siguiente_dia_laborable(fecha_completado)
+    config = ConfiguracionInspecciones.get_para_fecha(fecha_inicio_nuevo)
+    dias_laborables = config.numero_dias_laborales_req if config else 180
+    piezas_requeridas = config.inspecciones_minimas if config else 29
+    fecha_fin_nuevo = calcular_fecha_fin_periodo(fecha_inicio_nuevo, dias_laborables)
+
+    # Reservar el siguiente número de periodo en la secuencia de la asignación
+    nuevo_numero = periodo.operario_certificacion.reservar_numero_periodo()
+
+    nuevo = PeriodoValidacionCertificacion.objects.create(
+        operario_certificacion=periodo.operario_certificacion,
+        numero_periodo=nuevo_numero,
+        fecha_inicio_periodo=fecha_inicio_nuevo,
+        fecha_fin_periodo=fecha_fin_nuevo,
+        numero_dias_laborales_req=dias_laborables,
+        inspecciones_requeridas=piezas_requeridas,
+        inspecciones_realizadas=0,
+        esta_completado=False,
+        esta_vigente=True,
+        usuario_creacion=usuario
+    )
+    OperarioCertificacion.guardar_estado_periodo(nuevo.operario_certificacion_id, nuevo)
+    notificar_periodo(nuevo.pk)
+    return nuevo
+
+
+def reabrir_periodo(periodo):
+    """
+    Reabre un periodo completado que ha dejado de alcanzar las piezas requeridas.
+    Solo es posible si el periodo que se creó automáticamente a continuación sigue
+    vigente y sin inspecciones: en ese caso se elimina y el periodo vuelve a ser el vigente.
+    """
+    siguiente = PeriodoValidacionCertificacion.objects.filter(
+        operario_certificacion_id=periodo.operario_certificacion_id,
+        numero_periodo=periodo.numero_periodo + 1,
+        esta_vigente=True,
+        inspecciones__isnull=True
+    ).first()
+
+    if siguiente is None:
+        # El siguiente periodo ya tiene actividad (o no existe): el periodo queda cerrado
+        return False
+
+    # Eliminar primero el siguiente para respetar la restricción de un único periodo vigente
+    siguiente_id = siguiente.pk
+    siguiente.delete()
+    notificar_periodo(siguiente_id)
+    # Liberar su número en la secuencia si era el último reservado
+    OperarioCertificacion.objects.filter(
+        pk=periodo.operario_certificacion_id,
+        ultimo_numero_periodo=siguiente.numero_periodo
+    ).update(ultimo_numero_periodo=F('ultimo_numero_periodo') - 1)
+
+    periodo.esta_completado = False
+    periodo.esta_vigente = True
+    periodo.fecha_completado = None
+    periodo.save(update_fields=['esta_completado', 'esta_vigente', 'fecha_completado', 'fecha_actualizacion'])
+    OperarioCertificacion.guardar_estado_periodo(periodo.operario_certificacion_id, periodo)
+    return True
+
+
+@receiver(post_save, sender=ConfiguracionInspecciones)
+@receiver(post_delete, sender=ConfiguracionInspecciones)
+def invalidar_cache_configuracion(sender, **kwargs):
+    """Invalida la configuración cacheada en todos los procesos al cambiarla"""
+    transaction.on_commit(ConfiguracionInspecciones.invalidar_cache)
 
 
 def verificar_caducidad_periodo(periodo):
@@ -78,11 +234,18 @@ def verificar_caducidad_periodo(periodo):
             asignacion = periodo.operario_certificacion
             asignacion.esta_activa = False
             asignacion.fecha_caducidad = periodo.fecha_fin_periodo
-            asignacion.save(update_fields=['esta_activa', 'fecha_caducidad', 'fecha_actualizacion'])
+            # La asignación se queda sin periodo vigente: se vacía su resumen en el mismo UPDATE
+            for campo, valor in OperarioCertificacion.estado_periodo(None).items():
+                setattr(asignacion, campo, valor)
+            asignacion.save(update_fields=[
+                'esta_activa', 'fecha_caducidad', 'fecha_actualizacion', *CAMPOS_ESTADO_PERIODO
+            ])
             
             # Marcar periodo como no vigente
             periodo.esta_vigente = False
             periodo.save(update_fields=['esta_vigente', 'fecha_actualizacion'])
+            programar_actualizacion(asignacion.pk)
+            notificar_periodo(periodo.pk)
 
 
 def verificar_caducidades_pendientes():
@@ -1,3 +1,361 @@
+import tempfile
+from datetime import date, timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.db.models.signals import post_delete
 from django.test import TestCase
+from django.urls import reverse
+from apps.auditorias.models import AuditoriaProducto
+from apps.certificaciones.models import Certificacion
+from apps.operarios.models import Operario
+from .archivo import archivar_lote
+from .busqueda import TABLA_FTS, fts_disponible
+from .datos_prueba import DatosInspeccionMixin
+from .forms import InspeccionProductoForm
+from .models import (
+    ConfiguracionInspecciones, InspeccionArchivada, InspeccionProducto, PeriodoArchivado, PeriodoValidacionCertificacion,
+)
+from .prevision import calcular_previsiones, proyectar, ritmo_diario
+from .utils import trazabilidad_ordenes
 
-# Create your tests here.
+
+class CrearInspeccionTests(DatosInspeccionMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.usuario = User.objects.create_user(username='auditor', password='clave')
+
+    def setUp(self):
+        super().setUp()
+        # La configuración se cachea por proceso: se carga antes de medir consultas
+        ConfiguracionInspecciones.get_para_fecha(self.hoy)
+        self.client.force_login(self.usuario)
+
+    def datos_inspeccion(self, **extra):
+        datos = {
+            'operario': self.operario.pk,
+            'certificacion': self.certificacion.pk,
+            'auditoria_producto': self.auditoria.pk,
+            'auditor': self.auditor.pk,
+            'fecha_inspeccion': self.hoy.isoformat(),
+            'piezas_auditadas': 3,
+            'resultado_inspeccion': 'OK',
+            'observaciones': '',
+            'numero_orden': 'OF-1',
+        }
+        datos.update(extra)
+        return datos
+
+    def test_consultas_por_inspeccion_registrada(self):
+        # sesión y usuario (2), asignaciones del operario con periodos y auditorías (3),
+        # operario y auditor (2), claves ajenas validadas por el modelo (3), insert (1),
+        # contador del periodo (2), resumen del periodo en la asignación (1)
+        # y savepoints de las transacciones (4)
+        with self.assertNumQueries(18):
+            response = self.client.post(reverse('inspecciones:crear'), self.datos_inspeccion())
+
+        self.assertRedirects(response, reverse('inspecciones:lista'), fetch_redirect_response=False)
+        self.periodo.refresh_from_db()
+        self.assertEqual(self.periodo.inspecciones_realizadas, 3)
+        self.asignacion.refresh_from_db()
+        self.assertEqual(self.asignacion.periodo_actual_id, self.periodo.pk)
+        self.assertEqual(self.asignacion.periodo_actual_piezas_realizadas, 3)
+
+    def test_formulario_de_edicion_carga_las_asignaciones_una_vez(self):
+        self.client.post(reverse('inspecciones:crear'), self.datos_inspeccion())
+        inspeccion = InspeccionProducto.objects.select_related('operario_certificacion').get()
+
+        # Solo las asignaciones del operario del POST, con sus dos prefetch
+        with self.assertNumQueries(3):
+            form = InspeccionProductoForm(self.datos_inspeccion(piezas_auditadas=5), instance=inspeccion)
+        self.assertEqual(form.asignaciones_operario.operario_id, self.operario.pk)
+
+    def test_fecha_fuera_de_periodo(self):
+        response = self.client.post(
+            reverse('inspecciones:crear'),
+            self.datos_inspeccion(fecha_inspeccion=(self.hoy - timedelta(days=30)).isoformat())
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(InspeccionProducto.objects.exists())
+
+    def test_auditoria_de_otra_certificacion(self):
+        otra = Certificacion.objects.create(nombre='Torneado')
+        auditoria_otra = AuditoriaProducto.objects.create(certificacion=otra, nombre='Dimensional')
+
+        response = self.client.post(
+            reverse('inspecciones:crear'),
+            self.datos_inspeccion(auditoria_producto=auditoria_otra.pk)
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(InspeccionProducto.objects.exists())
+
+
+class ContadorPiezasTests(DatosInspeccionMixin, TestCase):
+    """Diferencias de piezas al editar y borrar inspecciones, y reapertura de periodos"""
+
+    def completar_periodo(self):
+        """Completa el periodo con dos inspecciones (20 + 10) y retorna la segunda y el siguiente periodo"""
+        self.inspeccion(20)
+        segunda = self.inspeccion(10)
+        self.periodo.refresh_from_db()
+        self.assertTrue(self.periodo.esta_completado)
+        return segunda, self.asignacion.periodos.get(esta_vigente=True)
+
+    def test_editar_aplica_la_diferencia(self):
+        inspeccion = self.inspeccion(5)
+        inspeccion.piezas_auditadas = 8
+        inspeccion.save()
+        self.periodo.refresh_from_db()
+        self.assertEqual(self.periodo.inspecciones_realizadas, 8)
+
+        inspeccion.piezas_auditadas = 2
+        inspeccion.save()
+        self.periodo.refresh_from_db()
+        self.assertEqual(self.periodo.inspecciones_realizadas, 2)
+        self.asignacion.refresh_from_db()
+        self.assertEqual(self.asignacion.periodo_actual_piezas_realizadas, 2)
+
+    def test_borrar_descuenta_las_piezas(self):
+        primera = self.inspeccion(5)
+        self.inspeccion(4)
+        primera.delete()
+
+        self.periodo.refresh_from_db()
+        self.assertEqual(self.periodo.inspecciones_realizadas, 4)
+        self.assertTrue(self.periodo.esta_vigente)
+
+    def test_reabrir_elimina_el_siguiente_periodo_vacio(self):
+        segunda, siguiente = self.completar_periodo()
+        self.asignacion.refresh_from_db()
+        self.assertEqual(self.asignacion.ultimo_numero_periodo, siguiente.numero_periodo)
+
+        segunda.delete()
+
+        self.periodo.refresh_from_db()
+        self.assertEqual(self.periodo.inspecciones_realizadas, 20)
+        self.assertTrue(self.periodo.esta_vigente)
+        self.assertFalse(self.periodo.esta_completado)
+        self.assertIsNone(self.periodo.fecha_completado)
+        self.assertFalse(self.asignacion.periodos.filter(pk=siguiente.pk).exists())
+        self.asignacion.refresh_from_db()
+        # El número del periodo eliminado se libera y el resumen vuelve al periodo reabierto
+        self.assertEqual(self.asignacion.ultimo_numero_periodo, self.periodo.numero_periodo)
+        self.assertEqual(self.asignacion.periodo_actual_id, self.periodo.pk)
+        self.assertEqual(self.asignacion.periodo_actual_piezas_realizadas, 20)
+
+    def test_reabrir_al_editar_a_la_baja(self):
+        segunda, siguiente = self.completar_periodo()
+        segunda.piezas_auditadas = 1
+        segunda.save()
+
+        self.periodo.refresh_from_db()
+        self.assertEqual(self.periodo.inspecciones_realizadas, 21)
+        self.assertTrue(self.periodo.esta_vigente)
+        self.assertFalse(self.asignacion.periodos.filter(pk=siguiente.pk).exists())
+
+    def test_no_reabre_si_el_siguiente_periodo_tiene_actividad(self):
+        segunda, siguiente = self.completar_periodo()
+        self.inspeccion(3, periodo=siguiente, fecha=siguiente.fecha_inicio_periodo)
+
+        segunda.delete()
+
+        self.periodo.refresh_from_db()
+        self.assertEqual(self.periodo.inspecciones_realizadas, 20)
+        self.assertTrue(self.periodo.esta_completado)
+        self.assertFalse(self.periodo.esta_vigente)
+        siguiente.refresh_from_db()
+        self.assertTrue(siguiente.esta_vigente)
+        self.assertEqual(siguiente.inspecciones_realizadas, 3)
+        self.asignacion.refresh_from_db()
+        self.assertEqual(self.asignacion.ultimo_numero_periodo, siguiente.numero_periodo)
+        self.assertEqual(self.asignacion.periodo_actual_id, siguiente.pk)
+
+    def test_umbral_del_periodo_y_no_de_la_configuracion_posterior(self):
+        # Una configuración con vigencia desde hoy no cambia el umbral de un periodo ya creado
+        ConfiguracionInspecciones.objects.create(
+            numero_dias_laborales_req=180, inspecciones_minimas=10, esta_activo=False,
+            fecha_inicio_vigencia=self.hoy
+        )
+        ConfiguracionInspecciones.invalidar_cache()
+        self.inspeccion(12)
+
+        self.periodo.refresh_from_db()
+        self.assertEqual(self.periodo.inspecciones_requeridas, 29)
+        self.assertTrue(self.periodo.esta_vigente)
+        self.assertFalse(self.periodo.esta_completado)
+
+
+class PrevisionTests(DatosInspeccionMixin, TestCase):
+    """Ritmo y fecha prevista de un periodo que empezó hace pocos días"""
+
+    # Lunes: el periodo empezó el lunes anterior y lleva 6 días laborables
+    hoy = date(2026, 10, 19)
+    dias_asignacion = 7
+
+    def test_las_ventanas_empiezan_en_el_inicio_del_periodo(self):
+        self.assertEqual(ritmo_diario(12, 12, self.hoy, self.periodo.fecha_inicio_periodo), 2)
+
+    def test_periodo_con_actividad(self):
+        self.inspeccion(12)
+        self.periodo.refresh_from_db()
+
+        prevision, = calcular_previsiones([self.periodo], self.hoy)
+        self.assertEqual(prevision.ritmo_diario, 2)
+        self.assertEqual(prevision.piezas_faltantes, 17)
+        # 9 días laborables a partir del martes 20
+        self.assertEqual(prevision.fecha_prevista, date(2026, 10, 30))
+        self.assertFalse(prevision.en_riesgo)
+
+    def test_ritmo_infimo_queda_en_riesgo_sin_fecha(self):
+        # 29 piezas a 0,0001 por día: 290000 días laborables, muy por encima del plazo
+        valores = proyectar(self.periodo, 0.0001, self.hoy)
+        self.assertIsNone(valores['fecha_prevista'])
+        self.assertIsNone(valores['dias_retraso'])
+        self.assertTrue(valores['en_riesgo'])
+
+    def test_periodo_sin_actividad_queda_sin_estimacion(self):
+        prevision, = calcular_previsiones([self.periodo], self.hoy)
+        self.assertEqual(prevision.ritmo_diario, 0)
+        self.assertIsNone(prevision.fecha_prevista)
+        self.assertIsNone(prevision.dias_retraso)
+        self.assertFalse(prevision.en_riesgo)
+
+
+class TrazabilidadPeticionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user(username='calidad', password='clave')
+
+    def setUp(self):
+        self.client.force_login(self.usuario)
+
+    def test_cuerpo_json_con_forma_incorrecta(self):
+        for cuerpo in ('[1, 2]', '"OF-1"', '{"ordenes": 5}', '{"ordenes": [{"a": 1}]}', '{no es json'):
+            for nombre in ('inspecciones:trazabilidad', 'inspecciones:api_trazabilidad'):
+                with self.subTest(cuerpo=cuerpo, vista=nombre):
+                    response = self.client.post(reverse(nombre), cuerpo, content_type='application/json')
+                    self.assertEqual(response.status_code, 400)
+                    self.assertIn('error', response.json())
+
+    def test_cuerpo_json_valido(self):
+        for ordenes in (['OF-1', 123], 'OF-1, OF-2'):
+            with self.subTest(ordenes=ordenes):
+                response = self.client.post(
+                    reverse('inspecciones:api_trazabilidad'), {'ordenes': ordenes}, content_type='application/json'
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.json()['ordenes']), 2)
+
+
+class ArchivoHistoricoTests(DatosInspeccionMixin, TestCase):
+    """Traslado de un periodo cerrado al archivo y su lectura con ?historico=1"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.usuario = User.objects.create_user(username='calidad', password='clave')
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.usuario)
+        # Periodo 1 completado con dos inspecciones (20 + 10); el 2 queda vigente.
+        # archivar_lote no mira la antigüedad (eso lo filtra archivar), solo que no sea vigente
+        self.inspecciones = [
+            self.inspeccion(piezas, numero_orden=numero_orden, observaciones='rebaba en el borde')
+            for piezas, numero_orden in ((20, 'OF-100'), (10, 'OF-101'))
+        ]
+        self.periodo.refresh_from_db()
+        self.siguiente = self.asignacion.periodos.get(esta_vigente=True)
+
+    def archivar(self):
+        avisos = []
+
+        def anotar(sender, **kwargs):
+            avisos.append(sender)
+
+        for modelo in (InspeccionProducto, PeriodoValidacionCertificacion):
+            post_delete.connect(anotar, sender=modelo, dispatch_uid='test-archivo')
+        try:
+            resultado = archivar_lote([self.periodo.pk])
+        finally:
+            for modelo in (InspeccionProducto, PeriodoValidacionCertificacion):
+                post_delete.disconnect(sender=modelo, dispatch_uid='test-archivo')
+        return resultado, avisos
+
+    def test_archivar_conserva_contadores_sin_signals(self):
+        resultado, avisos = self.archivar()
+
+        self.assertEqual(resultado, (1, 2))
+        self.assertEqual(avisos, [])
+        archivado = PeriodoArchivado.objects.get(pk=self.periodo.pk)
+        self.assertEqual(archivado.inspecciones_realizadas, 30)
+        self.assertTrue(archivado.esta_completado)
+        self.assertEqual(
+            sum(InspeccionArchivada.objects.filter(periodo_validacion=archivado).values_list('piezas_auditadas', flat=True)),
+            30
+        )
+        self.assertFalse(PeriodoValidacionCertificacion.objects.filter(pk=self.periodo.pk).exists())
+        # El periodo siguiente no se toca ni se reabre el archivado
+        self.siguiente.refresh_from_db()
+        self.assertTrue(self.siguiente.esta_vigente)
+        self.assertEqual(self.siguiente.inspecciones_realizadas, 0)
+        self.asignacion.refresh_from_db()
+        self.assertEqual(self.asignacion.ultimo_numero_periodo, 2)
+        self.assertEqual(self.asignacion.periodo_actual_id, self.siguiente.pk)
+
+    def test_archivar_borra_las_filas_de_busqueda(self):
+        if not fts_disponible(connection.alias):
+            self.skipTest('SQLite sin FTS5')
+        ids = [inspeccion.pk for inspeccion in self.inspecciones]
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM {TABLA_FTS} WHERE rowid IN (%s, %s)', ids)
+            self.assertEqual(cursor.fetchone()[0], 2)
+            self.archivar()
+            cursor.execute(f'SELECT COUNT(*) FROM {TABLA_FTS} WHERE rowid IN (%s, %s)', ids)
+            self.assertEqual(cursor.fetchone()[0], 0)
+
+    def test_trazabilidad_y_busqueda_con_historico(self):
+        self.archivar()
+
+        self.assertEqual(trazabilidad_ordenes(['of100'])['OF100'], [])
+        filas = trazabilidad_ordenes(['of100', 'OF 101'], historico=True)
+        self.assertEqual([fila['id'] for fila in filas['OF100']], [self.inspecciones[0].pk])
+        self.assertTrue(filas['OF101'][0]['archivada'])
+
+        respuesta = self.client.get(reverse('inspecciones:api_trazabilidad'), {'ordenes': 'OF-1', 'prefijo': '1', 'historico': '1'})
+        periodos = respuesta.json()['ordenes'][0]['periodos']
+        self.assertEqual([(p['id'], p['archivado']) for p in periodos], [(self.periodo.pk, True)])
+        respuesta = self.client.post(reverse('inspecciones:trazabilidad'), {'ordenes': 'OF-100', 'historico': '1'})
+        self.assertContains(respuesta, '(archivada)')
+
+        respuesta = self.client.get(reverse('inspecciones:lista'), {'q': 'rebaba', 'historico': '1'})
+        self.assertEqual(len(respuesta.context['inspecciones'].object_list), 0)
+        self.assertEqual(respuesta.context['total_archivadas'], 2)
+
+
+class BenchmarkPlantillasTests(TestCase):
+    """El benchmark no abre el alias 'analitica' si la copia no existe"""
+
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.create_user(username='calidad', password='clave')
+        Operario.objects.create(nombre='Ana', apellidos='López')
+
+    def test_sin_copia_analitica(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        ruta = Path(directorio.name) / 'copia.sqlite3'
+        salida = StringIO()
+
+        with mock.patch.dict(settings.DATABASES['analitica'], {'NAME': ruta.resolve().as_uri() + '?mode=ro'}):
+            call_command('benchmark_plantillas', repeticiones=1, stdout=salida)
+
+        self.assertIn('Benchmark de plantillas completado', salida.getvalue())
+        self.assertFalse(ruta.exists())
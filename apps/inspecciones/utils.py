@@ -0,0 +1,143 @@
+import re
+from django.db import connections
+from django.db.models import F, Prefetch, Q, Value
+from apps.asignaciones.models import OperarioCertificacion
+from apps.auditorias.models import AuditoriaProducto
+from .models import InspeccionArchivada, InspeccionProducto, PeriodoValidacionCertificacion, normalizar_numero_orden
+
+# Máximo de órdenes por petición de trazabilidad
+MAX_ORDENES_TRAZABILIDAD = 10000
+
+CAMPOS_TRAZABILIDAD = {
+    'operario_id': F('operario_certificacion__operario_id'),
+    'operario_codigo': F('operario_certificacion__operario__codigo'),
+    'operario_nombre': F('operario_certificacion__operario__nombre'),
+    'operario_apellidos': F('operario_certificacion__operario__apellidos'),
+    'certificacion': F('operario_certificacion__certificacion__nombre'),
+    'periodo_numero': F('periodo_validacion__numero_periodo'),
+    'periodo_inicio': F('periodo_validacion__fecha_inicio_periodo'),
+    'periodo_fin': F('periodo_validacion__fecha_fin_periodo'),
+    'periodo_completado': F('periodo_validacion__esta_completado'),
+    'auditoria': F('auditoria_producto__nombre'),
+    'auditor_nombre': F('auditor__nombre'),
+    'auditor_apellidos': F('auditor__apellidos'),
+}
+
+
+class AsignacionesOperario:
+    """
+    Asignaciones activas de un operario con su periodo vigente y sus auditorías de
+    producto activas, cargadas en una sola pasada (una consulta y dos prefetch).
+
+    Se comparte entre el formulario de inspección (__init__ y clean), la vista y el
+    signal de guardado para no repetir las mismas consultas en cada paso.
+    """
+
+    def __init__(self, operario_id):
+        self.operario_id = operario_id
+        self.asignaciones = list(
+            OperarioCertificacion.objects.filter(
+                operario_id=operario_id,
+                esta_activa=True,
+                certificacion__activa=True
+            ).select_related('operario', 'certificacion').prefetch_related(
+                Prefetch(
+                    'certificacion__auditorias',
+                    queryset=AuditoriaProducto.objects.filter(activa=True).order_by('nombre'),
+                    to_attr='auditorias_activas'
+                ),
+                Prefetch(
+                    'periodos',
+                    queryset=PeriodoValidacionCertificacion.objects.filter(esta_vigente=True).order_by(),
+                    to_attr='periodos_vigentes'
+                )
+            ).order_by('certificacion__nombre')
+        )
+        self._por_certificacion = {a.certificacion_id: a for a in self.asignaciones}
+
+    def certificaciones(self):
+        """Certificaciones con asignación activa, ordenadas por nombre"""
+        return [a.certificacion for a in self.asignaciones]
+
+    def asignacion(self, certificacion_id):
+        """Asignación activa para la certificación, o None"""
+        return self._por_certificacion.get(certificacion_id)
+
+    def periodo_vigente(self, certificacion_id):
+        """Periodo vigente de la asignación de la certificación, o None"""
+        asignacion = self.asignacion(certificacion_id)
+        if asignacion and asignacion.periodos_vigentes:
+            return asignacion.periodos_vigentes[0]
+        return None
+
+    def auditorias(self, certificacion_id):
+        """Auditorías de producto activas de la certificación (si el operario la tiene asignada)"""
+        asignacion = self.asignacion(certificacion_id)
+        return asignacion.certificacion.auditorias_activas if asignacion else []
+
+
+def separar_ordenes(texto):
+    """Lista de números de orden escritos separados por saltos de línea, espacios, comas o punto y coma"""
+    return [orden for orden in re.split(r'[\s,;]+', texto or '') if orden]
+
+
+def _rango_prefijo(prefijo):
+    """Rango [desde, hasta) que cubre las referencias que empiezan por el prefijo (usa el índice)"""
+    return prefijo, prefijo[:-1] + chr(ord(prefijo[-1]) + 1)
+
+
+def trazabilidad_ordenes(ordenes, prefijo=False, historico=False):
+    """
+    Inspecciones de las órdenes indicadas con su periodo, operario, certificación, auditoría
+    y auditor, agrupadas por referencia normalizada (en el orden de la petición).
+
+    Con prefijo=True cada valor se trata como prefijo de la referencia. Se hace una sola
+    consulta (values con los JOIN necesarios) por bloque de órdenes; los bloques respetan
+    el límite de parámetros del motor, así un lote de miles de órdenes son pocas consultas.
+    Con historico=True se consulta también el archivo histórico, con las mismas consultas
+    por bloque; cada fila indica si está archivada.
+    """
+    referencias = list(dict.fromkeys(filter(None, map(normalizar_numero_orden, ordenes))))
+    resultado = {referencia: [] for referencia in referencias}
+    if not referencias:
+        return resultado
+
+    modelos = [InspeccionProducto, InspeccionArchivada] if historico else [InspeccionProducto]
+    for modelo in modelos:
+        _anadir_trazabilidad(resultado, modelo, referencias, prefijo)
+    if historico:
+        for filas in resultado.values():
+            filas.sort(key=lambda fila: (fila['numero_orden_normalizado'], fila['fecha_inspeccion'], fila['id']))
+    return resultado
+
+
+def _anadir_trazabilidad(resultado, modelo, referencias, prefijo):
+    """Añade al resultado las inspecciones de `modelo` de las referencias, por bloques"""
+    base = modelo.objects.values(
+        'id', 'numero_orden', 'numero_orden_normalizado', 'fecha_inspeccion',
+        'piezas_auditadas', 'resultado_inspeccion', 'periodo_validacion_id',
+        archivada=Value(modelo is InspeccionArchivada),
+        **CAMPOS_TRAZABILIDAD
+    ).order_by('numero_orden_normalizado', 'fecha_inspeccion', 'id')
+
+    max_parametros = connections[base.db].features.max_query_params or len(referencias)
+    tamano_bloque = max(1, (max_parametros - 10) // (2 if prefijo else 1))
+
+    for inicio in range(0, len(referencias), tamano_bloque):
+        bloque = referencias[inicio:inicio + tamano_bloque]
+        if prefijo:
+            condicion = Q()
+            for referencia in bloque:
+                desde, hasta = _rango_prefijo(referencia)
+                condicion |= Q(numero_orden_normalizado__gte=desde, numero_orden_normalizado__lt=hasta)
+            filas = base.filter(condicion)
+        else:
+            filas = base.filter(numero_orden_normalizado__in=bloque)
+
+        for fila in filas:
+            if prefijo:
+                for referencia in bloque:
+                    if fila['numero_orden_normalizado'].startswith(referencia):
+                        resultado[referencia].append(fila)
+            else:
+                resultado[fila['numero_orden_normalizado']].append(fila)
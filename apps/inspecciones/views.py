@@ -1,16 +1,22 @@
+import hashlib
 import json
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.core.paginator import Paginator, PageNotAnInteger, EmptyPage
 from django.db import transaction
-from .models import InspeccionProducto, PeriodoValidacionCertificacion
+from .busqueda import buscar_archivadas, buscar_inspecciones
+from .models import InspeccionArchivada, InspeccionProducto
 from .forms import InspeccionProductoForm
 from .signals import verificar_caducidades_pendientes
+from .utils import AsignacionesOperario, MAX_ORDENES_TRAZABILIDAD, separar_ordenes, trazabilidad_ordenes
 from apps.asignaciones.models import OperarioCertificacion
 from apps.certificaciones.models import Certificacion
 from apps.operarios.models import Operario
 
+# Inspecciones archivadas que se muestran bajo los resultados de una búsqueda con ?historico=1
+MAX_ARCHIVADAS_BUSQUEDA = 50
+
 
 @login_required
 def lista_inspecciones(request):
@@ -32,20 +38,40 @@ def lista_inspecciones(request):
     
     operario_filtro = None
     certificacion_filtro = None
+    filtros = {}
     
     if operario_id:
         try:
             operario_filtro = int(operario_id)
-            inspecciones = inspecciones.filter(operario_certificacion__operario_id=operario_filtro)
+            filtros['operario_certificacion__operario_id'] = operario_filtro
         except (ValueError, TypeError):
             operario_filtro = None
     
     if certificacion_id:
         try:
             certificacion_filtro = int(certificacion_id)
-            inspecciones = inspecciones.filter(operario_certificacion__certificacion_id=certificacion_filtro)
+            filtros['operario_certificacion__certificacion_id'] = certificacion_filtro
         except (ValueError, TypeError):
             certificacion_filtro = None
+    inspecciones = inspecciones.filter(**filtros)
+    
+    # Búsqueda de texto en observaciones y número de orden (ordenada por relevancia)
+    busqueda = request.GET.get('q', '').strip()
+    if busqueda:
+        inspecciones = buscar_inspecciones(inspecciones, busqueda)
+    
+    # ?historico=1: la búsqueda incluye también las inspecciones archivadas (archivar_historico)
+    historico = request.GET.get('historico') == '1'
+    archivadas = total_archivadas = None
+    if busqueda and historico:
+        encontradas = buscar_archivadas(InspeccionArchivada.objects.filter(**filtros).select_related(
+            'operario_certificacion__operario',
+            'operario_certificacion__certificacion',
+            'auditoria_producto',
+            'auditor'
+        ), busqueda)
+        archivadas = list(encontradas[:MAX_ARCHIVADAS_BUSQUEDA])
+        total_archivadas = len(archivadas) if len(archivadas) < MAX_ARCHIVADAS_BUSQUEDA else encontradas.count()
     
     # Listados para los selects
     operarios_qs = Operario.objects.filter(activo=True).order_by('nombre', 'apellidos')
@@ -91,6 +117,10 @@ def lista_inspecciones(request):
         'certificaciones': certificaciones,
         'operario_filtro': operario_filtro,
         'certificacion_filtro': certificacion_filtro,
+        'busqueda': busqueda,
+        'historico': historico,
+        'archivadas': archivadas,
+        'total_archivadas': total_archivadas,
         'query_string': query_string,
         'certificaciones_json': json.dumps([
             {'id': c.id, 'nombre': c.nombre} for c in Certificacion.objects.filter(activa=True).order_by('nombre')
@@ -111,19 +141,12 @@ def crear_inspeccion(request):
     # Pre-cargar datos cuando se llega desde el dashboard
     if asignacion_id and request.method == 'GET':
         try:
-            asignacion = OperarioCertificacion.objects.select_related('operario', 'certificacion').get(
+            asignacion = OperarioCertificacion.objects.get(
                 pk=asignacion_id,
                 esta_activa=True
             )
-            periodo_vigente = PeriodoValidacionCertificacion.objects.filter(
-                operario_certificacion=asignacion,
-                esta_vigente=True
-            ).first()
-            
-            preloaded_instance = InspeccionProducto(
-                operario_certificacion=asignacion,
-                periodo_validacion=periodo_vigente
-            )
+            # El formulario resuelve certificaciones, auditorías y periodo vigente del operario
+            preloaded_instance = InspeccionProducto(operario_certificacion=asignacion)
         except OperarioCertificacion.DoesNotExist:
             messages.error(request, 'La asignación indicada no está activa o no existe.')
         except Exception as e:
@@ -135,24 +158,12 @@ def crear_inspeccion(request):
             inspeccion = form.save(commit=False)
             inspeccion.usuario_creacion = request.user
             
-            # Validar que la fecha esté dentro del periodo
-            periodo = inspeccion.periodo_validacion
-            if not periodo:
+            # El formulario ya ha resuelto el periodo vigente y el modelo ha validado
+            # que la fecha de inspección esté dentro de él (InspeccionProducto.clean)
+            if not inspeccion.periodo_validacion_id:
                 messages.error(request, 'No se pudo determinar el periodo de validación')
                 return render(request, 'inspecciones/form.html', {'form': form, 'titulo': 'Crear Inspección'})
             
-            if inspeccion.fecha_inspeccion < periodo.fecha_inicio_periodo:
-                messages.error(request, 'La fecha de inspección no puede ser anterior al inicio del periodo')
-                return render(request, 'inspecciones/form.html', {'form': form, 'titulo': 'Crear Inspección'})
-            
-            if inspeccion.fecha_inspeccion > periodo.fecha_fin_periodo:
-                messages.error(request, 'La fecha de inspección no puede ser posterior al fin del periodo')
-                return render(request, 'inspecciones/form.html', {'form': form, 'titulo': 'Crear Inspección'})
-            
-            if not periodo.esta_vigente:
-                messages.error(request, 'No se pueden registrar inspecciones en periodos no vigentes')
-                return render(request, 'inspecciones/form.html', {'form': form, 'titulo': 'Crear Inspección'})
-            
             try:
                 inspeccion.save()
                 # El contador y la lógica de periodos se manejan mediante signal
@@ -164,7 +175,10 @@ def crear_inspeccion(request):
             # Mostrar errores del formulario
             for field, errors in form.errors.items():
                 for error in errors:
-                    messages.error(request, f'{field}: {error}')
+                    if field == '__all__':
+                        messages.error(request, error)
+                    else:
+                        messages.error(request, f'{field}: {error}')
     else:
         form = InspeccionProductoForm(instance=preloaded_instance)
     
@@ -189,8 +203,8 @@ def detalle_inspeccion(request, pk):
 
 
 @login_required
-def obtener_certificaciones_por_operario(request):
-    """Vista AJAX para obtener certificaciones según el operario seleccionado"""
+async def obtener_certificaciones_por_operario(request):
+    """Vista AJAX (asíncrona) para obtener certificaciones según el operario seleccionado"""
     from django.http import JsonResponse
     from apps.asignaciones.models import OperarioCertificacion
     from apps.certificaciones.models import Certificacion
@@ -209,12 +223,10 @@ def obtener_certificaciones_por_operario(request):
         certificaciones = Certificacion.objects.filter(
             id__in=certificaciones_ids,
             activa=True
-        ).order_by('nombre')
+        ).order_by('nombre').values('id', 'nombre')
         
         data = {
-            'certificaciones': [
-                {'id': c.id, 'nombre': c.nombre} for c in certificaciones
-            ]
+            'certificaciones': [c async for c in certificaciones]
         }
         
         return JsonResponse(data)
@@ -223,8 +235,8 @@ def obtener_certificaciones_por_operario(request):
 
 
 @login_required
-def obtener_operarios_por_certificacion(request):
-    """Vista AJAX para obtener operarios según la certificación seleccionada"""
+async def obtener_operarios_por_certificacion(request):
+    """Vista AJAX (asíncrona) para obtener operarios según la certificación seleccionada"""
     from django.http import JsonResponse
     from apps.asignaciones.models import OperarioCertificacion
     
@@ -242,11 +254,11 @@ def obtener_operarios_por_certificacion(request):
         operarios = Operario.objects.filter(
             id__in=operarios_ids,
             activo=True
-        ).order_by('nombre', 'apellidos')
+        ).order_by('nombre', 'apellidos').only('id', 'nombre', 'apellidos')
         
         data = {
             'operarios': [
-                {'id': o.id, 'nombre': o.nombre_completo} for o in operarios
+                {'id': o.id, 'nombre': o.nombre_completo} async for o in operarios
             ]
         }
         
@@ -256,8 +268,8 @@ def obtener_operarios_por_certificacion(request):
 
 
 @login_required
-def obtener_auditorias_por_certificacion(request):
-    """Vista AJAX para obtener auditorías según la certificación seleccionada"""
+async def obtener_auditorias_por_certificacion(request):
+    """Vista AJAX (asíncrona) para obtener auditorías según la certificación seleccionada"""
     from django.http import JsonResponse
     from apps.asignaciones.models import OperarioCertificacion
     from apps.auditorias.models import AuditoriaProducto
@@ -270,39 +282,199 @@ def obtener_auditorias_por_certificacion(request):
     
     try:
         # Buscar la asignación
-        asignacion = OperarioCertificacion.objects.get(
+        asignacion = await OperarioCertificacion.objects.aget(
             operario_id=operario_id,
             certificacion_id=certificacion_id,
             esta_activa=True
         )
         
         auditorias = AuditoriaProducto.objects.filter(
-            certificacion=asignacion.certificacion,
+            certificacion_id=asignacion.certificacion_id,
             activa=True
-        ).order_by('nombre')
-        
-        # Obtener también el periodo vigente
-        periodo_vigente = PeriodoValidacionCertificacion.objects.filter(
-            operario_certificacion=asignacion,
-            esta_vigente=True
-        ).first()
+        ).order_by('nombre').values('id', 'nombre')
         
         data = {
-            'auditorias': [
-                {'id': a.id, 'nombre': a.nombre} for a in auditorias
-            ],
+            'auditorias': [a async for a in auditorias],
             'periodo': None
         }
         
-        if periodo_vigente:
+        # Periodo vigente: resumen guardado en la propia asignación (sin consultar periodos)
+        if asignacion.periodo_actual_id:
             data['periodo'] = {
-                'numero': periodo_vigente.numero_periodo,
-                'fecha_inicio': periodo_vigente.fecha_inicio_periodo.strftime('%Y-%m-%d'),
-                'fecha_fin': periodo_vigente.fecha_fin_periodo.strftime('%Y-%m-%d'),
-                'inspecciones_realizadas': periodo_vigente.inspecciones_realizadas,
-                'inspecciones_requeridas': periodo_vigente.inspecciones_requeridas,
+                'numero': asignacion.periodo_actual_numero,
+                'fecha_inicio': asignacion.periodo_actual_fecha_inicio.strftime('%Y-%m-%d'),
+                'fecha_fin': asignacion.periodo_actual_fecha_fin.strftime('%Y-%m-%d'),
+                'inspecciones_realizadas': asignacion.periodo_actual_piezas_realizadas,
+                'inspecciones_requeridas': asignacion.periodo_actual_piezas_requeridas,
             }
         
         return JsonResponse(data)
     except OperarioCertificacion.DoesNotExist:
         return JsonResponse({'error': 'Asignación no encontrada'}, status=404)
+
+
+@login_required
+def obtener_cascada_operario(request):
+    """
+    Vista AJAX que devuelve en una sola respuesta las certificaciones activas del operario
+    y, para cada una, sus auditorías de producto y el resumen del periodo vigente.
+    Sustituye la secuencia certificaciones -> auditorías/periodo del formulario de inspección.
+    """
+    from django.http import JsonResponse
+    from django.utils.cache import get_conditional_response, patch_cache_control
+    
+    operario_id = request.GET.get('operario_id')
+    
+    if not operario_id:
+        return JsonResponse({'error': 'ID de operario requerido'}, status=400)
+    
+    try:
+        operario_id = int(operario_id)
+    except (ValueError, TypeError):
+        return JsonResponse({'error': 'ID de operario no válido'}, status=400)
+    
+    asignaciones_operario = AsignacionesOperario(operario_id)
+    
+    certificaciones = []
+    for asignacion in asignaciones_operario.asignaciones:
+        periodo_vigente = asignaciones_operario.periodo_vigente(asignacion.certificacion_id)
+        certificaciones.append({
+            'id': asignacion.certificacion.id,
+            'nombre': asignacion.certificacion.nombre,
+            'asignacion_id': asignacion.id,
+            'auditorias': [
+                {'id': a.id, 'nombre': a.nombre} for a in asignaciones_operario.auditorias(asignacion.certificacion_id)
+            ],
+            'periodo': {
+                'numero': periodo_vigente.numero_periodo,
+                'fecha_inicio': periodo_vigente.fecha_inicio_periodo.strftime('%Y-%m-%d'),
+                'fecha_fin': periodo_vigente.fecha_fin_periodo.strftime('%Y-%m-%d'),
+                'inspecciones_realizadas': periodo_vigente.inspecciones_realizadas,
+                'inspecciones_requeridas': periodo_vigente.inspecciones_requeridas,
+            } if periodo_vigente else None,
+        })
+    
+    data = {'certificaciones': certificaciones}
+    
+    # ETag sobre el contenido: las selecciones repetidas se sirven desde la caché del navegador
+    # y, al caducar, se revalidan con un 304 sin cuerpo si nada ha cambiado
+    contenido = json.dumps(data, sort_keys=True, separators=(',', ':'))
+    etag = '"%s"' % hashlib.md5(contenido.encode('utf-8'), usedforsecurity=False).hexdigest()
+    
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = JsonResponse(data)
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, max_age=30)
+    return response
+
+
+def _leer_peticion_trazabilidad(request):
+    """
+    Órdenes, modo prefijo y si se incluye el archivo histórico en una petición de trazabilidad:
+    GET (?orden=A&orden=B u ?ordenes=A,B, con &historico=1), formulario POST (textarea 'ordenes')
+    o POST JSON {"ordenes": [...], "prefijo": false, "historico": false}.
+    Lanza ValueError con el motivo si el cuerpo JSON no tiene esa forma.
+    """
+    if request.method == 'POST' and request.content_type == 'application/json':
+        try:
+            datos = json.loads(request.body or b'{}')
+        except ValueError:
+            raise ValueError('El cuerpo de la petición no es JSON válido')
+        if not isinstance(datos, dict):
+            raise ValueError('El cuerpo JSON debe ser un objeto {"ordenes": [...], "prefijo": false}')
+        ordenes = datos.get('ordenes') or []
+        if isinstance(ordenes, str):
+            ordenes = separar_ordenes(ordenes)
+        elif not isinstance(ordenes, list) or not all(isinstance(orden, (str, int)) for orden in ordenes):
+            raise ValueError('"ordenes" debe ser una lista de números de orden o un texto separado por comas')
+        return [str(orden) for orden in ordenes], bool(datos.get('prefijo')), bool(datos.get('historico'))
+    
+    parametros = request.POST if request.method == 'POST' else request.GET
+    ordenes = parametros.getlist('orden') + separar_ordenes(parametros.get('ordenes', ''))
+    activado = ('1', 'true', 'on')
+    return ordenes, parametros.get('prefijo') in activado, parametros.get('historico') in activado
+
+
+def _resumen_trazabilidad(resultado):
+    """Para cada orden: sus inspecciones y los operarios y periodos implicados (sin repetir)"""
+    resumen = []
+    for referencia, filas in resultado.items():
+        operarios = {}
+        periodos = {}
+        for fila in filas:
+            operarios.setdefault(fila['operario_id'], {
+                'id': fila['operario_id'],
+                'codigo': fila['operario_codigo'],
+                'nombre': ' '.join(filter(None, [fila['operario_nombre'], fila['operario_apellidos']])),
+            })
+            periodos.setdefault(fila['periodo_validacion_id'], {
+                'id': fila['periodo_validacion_id'],
+                'certificacion': fila['certificacion'],
+                'numero': fila['periodo_numero'],
+                'fecha_inicio': fila['periodo_inicio'],
+                'fecha_fin': fila['periodo_fin'],
+                'completado': fila['periodo_completado'],
+                'archivado': fila['archivada'],
+            })
+        resumen.append({
+            'orden': referencia,
+            'inspecciones': filas,
+            'operarios': list(operarios.values()),
+            'periodos': list(periodos.values()),
+        })
+    return resumen
+
+
+@login_required
+def trazabilidad_orden(request):
+    """Trazabilidad de una o varias órdenes: inspecciones, periodos y operarios implicados"""
+    from django.http import JsonResponse
+    
+    try:
+        ordenes, prefijo, historico = _leer_peticion_trazabilidad(request)
+    except ValueError as e:
+        # Solo con cuerpo JSON: se responde en JSON, como la API
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    resultados = None
+    if ordenes:
+        if len(ordenes) > MAX_ORDENES_TRAZABILIDAD:
+            messages.error(request, f'Se pueden consultar como máximo {MAX_ORDENES_TRAZABILIDAD} órdenes a la vez')
+        else:
+            resultados = _resumen_trazabilidad(trazabilidad_ordenes(ordenes, prefijo=prefijo, historico=historico))
+    
+    return render(request, 'inspecciones/trazabilidad.html', {
+        'ordenes_texto': '\n'.join(ordenes),
+        'prefijo': prefijo,
+        'historico': historico,
+        'resultados': resultados,
+        'no_encontradas': [r['orden'] for r in resultados or [] if not r['inspecciones']],
+    })
+
+
+@login_required
+def obtener_trazabilidad_ordenes(request):
+    """
+    Vista AJAX/JSON de trazabilidad por número de orden.
+    Admite lotes de hasta MAX_ORDENES_TRAZABILIDAD órdenes (POST JSON para lotes grandes).
+    """
+    from django.http import JsonResponse
+    
+    try:
+        ordenes, prefijo, historico = _leer_peticion_trazabilidad(request)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    if not ordenes:
+        return JsonResponse({'error': 'Indique al menos un número de orden'}, status=400)
+    if len(ordenes) > MAX_ORDENES_TRAZABILIDAD:
+        return JsonResponse({'error': f'Máximo {MAX_ORDENES_TRAZABILIDAD} órdenes por petición'}, status=400)
+    
+    resultados = _resumen_trazabilidad(trazabilidad_ordenes(ordenes, prefijo=prefijo, historico=historico))
+    return JsonResponse({
+        'prefijo': prefijo,
+        'historico': historico,
+        'ordenes': resultados,
+        'no_encontradas': [r['orden'] for r in resultados if not r['inspecciones']],
+    })
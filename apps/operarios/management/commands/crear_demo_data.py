@@ -427,6 +427,9 @@ class Command(BaseCommand):
             periodo8 = asegurar_periodos_minimos(asignacion8, periodo8)
             self.stdout.write(f'  ✓ Asignación CRÍTICA creada: {asignacion8.operario.nombre_completo} - {asignacion8.certificacion.nombre} (se crearán 20 piezas, apenas 2 días restantes)')
 
+        # Los periodos históricos se han creado y renumerado a mano: alinear la secuencia de periodos
+        OperarioCertificacion.sincronizar_numeros_periodo()
+
         def crear_inspecciones_para_periodo(asignacion, periodo, piezas_objetivo, prefijo_orden, auditorias_cert, auditores, hoy, es_vigente=False):
             """
             Crea inspecciones distribuidas en un periodo y devuelve (inspecciones, piezas).
@@ -586,6 +589,9 @@ class Command(BaseCommand):
 
         self.stdout.write(f'  ✓ {total_inspecciones} inspecciones creadas (cubriendo historiales y vigentes)')
 
+        # Los periodos de demo se han modificado a mano: recalcular el resumen de las asignaciones
+        OperarioCertificacion.sincronizar_estado_periodo()
+
         # Resumen
         self.stdout.write(self.style.SUCCESS('\n=== Resumen de datos creados ==='))
         self.stdout.write(f'  Operarios: {Operario.objects.count()}')
@@ -0,0 +1,21 @@
+# Generated by Django 6.0 on 2026-10-19 15:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('operarios', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='operario',
+            index=models.Index(fields=['codigo'], name='operario_codigo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='operario',
+            index=models.Index(fields=['nombre', 'apellidos'], name='operario_nombre_idx'),
+        ),
+    ]
@@ -2,7 +2,8 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
 from datetime import timedelta
-from django.db.models import Count, Sum, Avg, Q, Max, Min
+from django.db.models import Count, Sum, Avg, Q, Max, Min, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
 from django.utils import timezone as tz
 
 
@@ -34,6 +35,11 @@ class Operario(models.Model):
         verbose_name = "Operario"
         verbose_name_plural = "Operarios"
         ordering = ['nombre', 'apellidos']
+        indexes = [
+            # Búsqueda por código (lectura de la tarjeta del operario) y listado paginado por nombre
+            models.Index(fields=['codigo'], name='operario_codigo_idx'),
+            models.Index(fields=['nombre', 'apellidos'], name='operario_nombre_idx'),
+        ]
 
     def __str__(self):
         if self.apellidos:
@@ -46,6 +52,54 @@ class Operario(models.Model):
             return f"{self.nombre} {self.apellidos}"
         return self.nombre
 
+    @classmethod
+    def con_resumen(cls, queryset=None):
+        """
+        Anota cada operario con su resumen en una sola consulta (una subconsulta correlacionada
+        por dato, que con la paginación solo se evalúa para las filas de la página):
+        certificaciones_activas, ultima_inspeccion, inspecciones_ok, inspecciones_con_resultado
+        y proximo_vencimiento (fecha fin del periodo vigente pendiente más cercano).
+        """
+        from apps.asignaciones.models import OperarioCertificacion
+        from apps.inspecciones.models import InspeccionProducto, PeriodoValidacionCertificacion
+
+        def contar(subconsulta, campo_operario):
+            return Coalesce(Subquery(
+                subconsulta.order_by().values(campo_operario).annotate(total=Count('pk')).values('total')
+            ), Value(0))
+
+        inspecciones = InspeccionProducto.objects.filter(operario_certificacion__operario=OuterRef('pk'))
+        operario_inspeccion = 'operario_certificacion__operario'
+
+        if queryset is None:
+            queryset = cls.objects.all()
+        return queryset.annotate(
+            certificaciones_activas=contar(
+                OperarioCertificacion.objects.filter(operario=OuterRef('pk'), esta_activa=True), 'operario'
+            ),
+            ultima_inspeccion_fecha=Subquery(
+                inspecciones.order_by('-fecha_inspeccion').values('fecha_inspeccion')[:1]
+            ),
+            inspecciones_ok_total=contar(inspecciones.filter(resultado_inspeccion='OK'), operario_inspeccion),
+            inspecciones_con_resultado=contar(
+                inspecciones.filter(resultado_inspeccion__in=['OK', 'NO OK']), operario_inspeccion
+            ),
+            proximo_vencimiento=Subquery(
+                PeriodoValidacionCertificacion.objects.filter(
+                    operario_certificacion__operario=OuterRef('pk'),
+                    esta_vigente=True,
+                    esta_completado=False
+                ).order_by('fecha_fin_periodo').values('fecha_fin_periodo')[:1]
+            ),
+        )
+
+    @property
+    def tasa_exito_resumen(self):
+        """Tasa de éxito calculada con las anotaciones de con_resumen (None sin inspecciones con resultado)"""
+        if not self.inspecciones_con_resultado:
+            return None
+        return round(self.inspecciones_ok_total / self.inspecciones_con_resultado * 100, 1)
+
     def obtener_inspecciones(self):
         """Obtiene todas las inspecciones del operario"""
         from apps.inspecciones.models import InspeccionProducto
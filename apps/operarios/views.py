@@ -2,15 +2,62 @@ import json
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.core.paginator import Paginator, PageNotAnInteger, EmptyPage
+from django.db.models import Q
+from django.utils import timezone
+from inspecciones_zimvie.routers import vista_analitica
+from apps.inspecciones.archivo import combinar_totales_operario, resumen_archivo_operario
 from .models import Operario
 from .forms import OperarioForm
 
 
+def buscar_operarios(queryset, texto):
+    """
+    Filtra operarios por código o nombre. Un código exacto (lo habitual al leer la tarjeta
+    del operario) se resuelve con operario_codigo_idx; si no, cada palabra debe aparecer en
+    el código, el nombre o los apellidos.
+    """
+    texto = texto.strip()
+    if not texto:
+        return queryset
+    por_codigo = queryset.filter(codigo=texto)
+    if por_codigo.exists():
+        return por_codigo
+    for palabra in texto.split():
+        queryset = queryset.filter(
+            Q(codigo__icontains=palabra) | Q(nombre__icontains=palabra) | Q(apellidos__icontains=palabra)
+        )
+    return queryset
+
+
 @login_required
 def lista_operarios(request):
-    """Lista de operarios"""
-    operarios = Operario.objects.all().order_by('nombre', 'apellidos')
-    return render(request, 'operarios/lista.html', {'operarios': operarios})
+    """Lista de operarios paginada, con búsqueda y el resumen de cada operario en una consulta"""
+    busqueda = request.GET.get('q', '').strip()
+    operarios = buscar_operarios(Operario.objects.all(), busqueda)
+    operarios = Operario.con_resumen(operarios).order_by('nombre', 'apellidos', 'pk')
+
+    paginator = Paginator(operarios, 25)  # 25 operarios por página
+    page = request.GET.get('page', 1)
+
+    try:
+        operarios_paginados = paginator.page(page)
+    except PageNotAnInteger:
+        operarios_paginados = paginator.page(1)
+    except EmptyPage:
+        operarios_paginados = paginator.page(paginator.num_pages)
+
+    # Construir query params para mantener la búsqueda en la paginación
+    query_params = request.GET.copy()
+    if 'page' in query_params:
+        del query_params['page']
+
+    return render(request, 'operarios/lista.html', {
+        'operarios': operarios_paginados,
+        'busqueda': busqueda,
+        'query_string': query_params.urlencode(),
+        'hoy': timezone.now().date(),
+    })
 
 
 @login_required
@@ -50,6 +97,7 @@ def editar_operario(request, pk):
 
 
 @login_required
+@vista_analitica
 def detalle_operario(request, pk):
     """Detalle de operario con estadísticas de inspecciones"""
     operario = get_object_or_404(Operario, pk=pk)
@@ -90,7 +138,13 @@ def detalle_operario(request, pk):
         'ultima_no_ok': operario.ultima_inspeccion_no_ok(),
     }
     
+    # ?historico=1 suma a los totales las inspecciones archivadas (archivar_historico)
+    historico = request.GET.get('historico') == '1'
+    if historico:
+        combinar_totales_operario(estadisticas, resumen_archivo_operario(operario))
+    
     return render(request, 'operarios/detalle.html', {
         'operario': operario,
-        'estadisticas': estadisticas
+        'estadisticas': estadisticas,
+        'historico': historico
     })
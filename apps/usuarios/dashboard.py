@@ -0,0 +1,228 @@
+"""
+Cálculos del dashboard y eventos de actualización en directo.
+
+El dashboard (home_view) se pinta una vez; después cada pantalla recibe por SSE solo lo
+que cambia. Los signals de inspecciones avisan con notificar_periodo/notificar_inspeccion;
+al confirmarse la transacción se calcula el evento una sola vez (la fila del periodo ya
+renderizada) y se publica en la caché, de donde lo leen todas las conexiones abiertas.
+
+Los eventos se guardan en la caché 'default' con un número de secuencia: para repartirlos
+entre varios procesos la caché debe ser compartida (Redis, ver INSPECCIONES_REDIS_URL).
+Cada evento se escribe con un número reservado antes de avanzar la secuencia visible, así
+que las pantallas no ven el número antes que el evento. Con dos publicadores a la vez el
+más rápido puede avanzar la secuencia mientras el otro aún escribe: ese hueco se espera
+un sondeo antes de darlo por caducado.
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+NIVELES = {'critico': 0, 'alto': 1, 'medio': 2, 'normal': 3}
+
+# Números reservados por los publicadores y eventos ya escritos (la secuencia visible)
+CLAVE_RESERVA = 'dashboard:eventos:reserva'
+CLAVE_SECUENCIA = 'dashboard:eventos:secuencia'
+CLAVE_EVENTO = 'dashboard:eventos:{}'
+# Segundos que se conserva cada evento; una pantalla desconectada más tiempo recarga la página
+RETENCION_EVENTOS = 300
+
+
+def escalar(nivel_actual, nivel_nuevo):
+    """Devuelve el nivel más severo entre actual y nuevo."""
+    return nivel_nuevo if NIVELES.get(nivel_nuevo, 3) < NIVELES.get(nivel_actual, 3) else nivel_actual
+
+
+def evaluar_criticidad(periodo, hoy):
+    """Retorna (es_critico, nivel_criticidad) de un periodo vigente"""
+    dias_restantes = (periodo.fecha_fin_periodo - hoy).days
+    dias_transcurridos = max((hoy - periodo.fecha_inicio_periodo).days, 0)
+    dias_totales = max((periodo.fecha_fin_periodo - periodo.fecha_inicio_periodo).days, 1)
+
+    porcentaje_piezas = (periodo.inspecciones_realizadas / periodo.inspecciones_requeridas * 100) if periodo.inspecciones_requeridas > 0 else 0
+    porcentaje_tiempo = (dias_transcurridos / dias_totales * 100)
+
+    nivel_criticidad = 'normal'
+    es_critico = False
+
+    # C0: periodo vencido pero marcado como vigente -> crítico duro
+    if dias_restantes <= 0:
+        return True, 'critico'
+
+    # C1: Vence en <=30 días
+    if dias_restantes <= 30:
+        es_critico = True
+        if dias_restantes <= 7:
+            nivel_criticidad = escalar(nivel_criticidad, 'critico')
+        elif dias_restantes <= 15:
+            nivel_criticidad = escalar(nivel_criticidad, 'alto')
+        else:
+            nivel_criticidad = escalar(nivel_criticidad, 'medio')
+
+    # C2: <50% piezas y >50% tiempo
+    if porcentaje_piezas < 50 and porcentaje_tiempo > 50:
+        es_critico = True
+        if porcentaje_piezas < 25:
+            nivel_criticidad = escalar(nivel_criticidad, 'critico')
+        elif porcentaje_piezas < 35:
+            nivel_criticidad = escalar(nivel_criticidad, 'alto')
+        else:
+            nivel_criticidad = escalar(nivel_criticidad, 'medio')
+
+    # C3: <10 piezas y <60 días restantes
+    if periodo.inspecciones_realizadas < 10 and dias_restantes < 60:
+        es_critico = True
+        nivel_criticidad = escalar(nivel_criticidad, 'alto')
+
+    # C4: <40% piezas y >40% tiempo
+    if porcentaje_piezas < 40 and porcentaje_tiempo > 40:
+        es_critico = True
+        if porcentaje_piezas < 20:
+            nivel_criticidad = escalar(nivel_criticidad, 'critico')
+        elif porcentaje_piezas < 30:
+            nivel_criticidad = escalar(nivel_criticidad, 'alto')
+        else:
+            nivel_criticidad = escalar(nivel_criticidad, 'medio')
+
+    # C5: <=90 días restantes y <60% piezas
+    if dias_restantes <= 90 and porcentaje_piezas < 60:
+        es_critico = True
+        if dias_restantes <= 30:
+            nivel_criticidad = escalar(nivel_criticidad, 'critico')
+        elif dias_restantes <= 60:
+            nivel_criticidad = escalar(nivel_criticidad, 'alto')
+        else:
+            nivel_criticidad = escalar(nivel_criticidad, 'medio')
+
+    return es_critico, nivel_criticidad
+
+
+def datos_periodo(periodo, hoy):
+    """Métricas y criticidad de un periodo vigente tal y como las muestra el dashboard"""
+    dias_restantes = (periodo.fecha_fin_periodo - hoy).days
+    dias_transcurridos = max((hoy - periodo.fecha_inicio_periodo).days, 0)
+    dias_totales = max((periodo.fecha_fin_periodo - periodo.fecha_inicio_periodo).days, 1)
+
+    porcentaje_piezas = (periodo.inspecciones_realizadas / periodo.inspecciones_requeridas * 100) if periodo.inspecciones_requeridas > 0 else 0
+    porcentaje_tiempo = (dias_transcurridos / dias_totales * 100)
+
+    es_critico, nivel_criticidad = evaluar_criticidad(periodo, hoy)
+
+    return {
+        'prevision': prevision_periodo(periodo),
+        'periodo': periodo,
+        'dias_restantes': dias_restantes,
+        'porcentaje_piezas': round(porcentaje_piezas, 1),
+        'porcentaje_tiempo': round(porcentaje_tiempo, 1),
+        'nivel_criticidad': nivel_criticidad,
+        'nivel_orden': NIVELES.get(nivel_criticidad, 3),
+        'es_critico': es_critico,
+        'piezas_faltantes': periodo.inspecciones_requeridas - periodo.inspecciones_realizadas
+    }
+
+
+def prevision_periodo(periodo):
+    """Previsión precalculada del periodo (cargada con select_related('prevision')), o None"""
+    from apps.inspecciones.models import PrevisionPeriodo
+
+    try:
+        return periodo.prevision
+    except PrevisionPeriodo.DoesNotExist:
+        return None
+
+
+def secuencia_actual():
+    """Número del último evento publicado (0 si no hay ninguno)"""
+    return cache.get(CLAVE_SECUENCIA, 0)
+
+
+async def asecuencia_actual():
+    """Versión asíncrona de secuencia_actual"""
+    return await cache.aget(CLAVE_SECUENCIA, 0)
+
+
+def publicar_evento(tipo, datos):
+    """Añade un evento al registro compartido y retorna su número de secuencia"""
+    cache.add(CLAVE_SECUENCIA, 0, None)
+    # La reserva continúa la secuencia visible si aún no existe (p. ej. tras vaciar la caché)
+    cache.add(CLAVE_RESERVA, cache.get(CLAVE_SECUENCIA, 0), None)
+    numero = cache.incr(CLAVE_RESERVA)
+    cache.set(CLAVE_EVENTO.format(numero), {'tipo': tipo, 'datos': datos}, RETENCION_EVENTOS)
+    # Solo ahora la ven las pantallas
+    cache.incr(CLAVE_SECUENCIA)
+    return numero
+
+
+def _contiguos(ultimo, actual, eventos):
+    """
+    (numero, evento) seguidos desde ultimo + 1 que ya están en `eventos` (dict por clave) y
+    el número del primero que falta, o None si están todos hasta `actual`.
+    """
+    contiguos = []
+    for numero in range(ultimo + 1, actual + 1):
+        evento = eventos.get(CLAVE_EVENTO.format(numero))
+        if evento is None:
+            return contiguos, numero
+        contiguos.append((numero, evento))
+    return contiguos, None
+
+
+def eventos_desde(ultimo, actual):
+    """
+    Eventos publicados después de `ultimo` hasta `actual`: retorna (eventos, hueco), con
+    eventos como lista de (numero, evento) hasta el primero que falta (hueco, o None).
+    Un hueco puede ser un evento que otro proceso aún está escribiendo o uno caducado;
+    quien sondea decide (ver siguiente_envio).
+    """
+    claves = [CLAVE_EVENTO.format(numero) for numero in range(ultimo + 1, actual + 1)]
+    return _contiguos(ultimo, actual, cache.get_many(claves))
+
+
+async def aeventos_desde(ultimo, actual):
+    """Versión asíncrona de eventos_desde"""
+    claves = [CLAVE_EVENTO.format(numero) for numero in range(ultimo + 1, actual + 1)]
+    return _contiguos(ultimo, actual, await cache.aget_many(claves))
+
+
+def siguiente_envio(ultimo, actual, eventos, hueco, hueco_anterior):
+    """
+    Decide qué enviar a una pantalla tras un sondeo. Retorna (eventos, recargar, ultimo, hueco):
+    si el mismo hueco sigue ahí un sondeo después, el evento caducó (o su publicador falló)
+    y la pantalla debe recargar; si es nuevo, se espera al siguiente sondeo.
+    """
+    if eventos:
+        ultimo = eventos[-1][0]
+    # El número 0 no existe nunca: un cursor -1 (caché vaciada) recarga sin esperar
+    if hueco is not None and (hueco == hueco_anterior or hueco < 1):
+        return eventos, True, actual, None
+    return eventos, False, ultimo, hueco
+
+
+def _publicar_periodo(periodo_id):
+    from apps.inspecciones.models import PeriodoValidacionCertificacion
+
+    periodo = PeriodoValidacionCertificacion.objects.filter(
+        pk=periodo_id, esta_vigente=True, esta_completado=False
+    ).select_related(
+        'operario_certificacion__operario',
+        'operario_certificacion__certificacion',
+        'prevision'
+    ).first()
+
+    html = None
+    if periodo is not None:
+        html = render_to_string('usuarios/_fila_periodo.html', {
+            'item': datos_periodo(periodo, timezone.now().date())
+        })
+    # Sin html: el periodo ya no está pendiente (completado, caducado o eliminado) y se quita
+    publicar_evento('periodo', {'id': periodo_id, 'html': html})
+
+
+def notificar_periodo(periodo_id):
+    """Publica el estado del periodo en el dashboard cuando se confirme la transacción"""
+    transaction.on_commit(lambda: _publicar_periodo(periodo_id))
+
+
+def notificar_inspeccion(fecha, delta):
+    """Publica el cambio en el número de inspecciones del mes de `fecha` (+1 alta, -1 baja)"""
+    transaction.on_commit(lambda: publicar_evento('inspecciones', {'mes': fecha.strftime('%Y-%m'), 'delta': delta}))
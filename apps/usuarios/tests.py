@@ -1,3 +1,48 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import SimpleTestCase
 
-# Create your tests here.
+from .dashboard import (
+    CLAVE_EVENTO, CLAVE_RESERVA, CLAVE_SECUENCIA, eventos_desde, publicar_evento, secuencia_actual,
+    siguiente_envio,
+)
+
+
+class EventosDashboardTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_la_secuencia_avanza_despues_de_escribir_el_evento(self):
+        numero = publicar_evento('inspecciones', {'mes': '2026-10', 'delta': 1})
+
+        self.assertEqual(secuencia_actual(), numero)
+        eventos, hueco = eventos_desde(0, secuencia_actual())
+        self.assertEqual([n for n, _ in eventos], [numero])
+        self.assertIsNone(hueco)
+
+    def test_hueco_de_un_publicador_en_curso(self):
+        # Otro proceso ha reservado el 1 y aún no lo ha escrito; el 2 ya está publicado
+        cache.set(CLAVE_RESERVA, 1, None)
+        cache.set(CLAVE_SECUENCIA, 0, None)
+        publicar_evento('inspecciones', {'mes': '2026-10', 'delta': 1})
+
+        eventos, recargar, ultimo, hueco = siguiente_envio(0, 1, *eventos_desde(0, 1), None)
+        self.assertEqual((eventos, recargar, ultimo, hueco), ([], False, 0, 1))
+
+        # En el siguiente sondeo el evento ya está: se envían los dos sin recargar
+        cache.set(CLAVE_EVENTO.format(1), {'tipo': 'inspecciones', 'datos': {}}, None)
+        cache.incr(CLAVE_SECUENCIA)
+        eventos, recargar, ultimo, hueco = siguiente_envio(0, 2, *eventos_desde(0, 2), hueco)
+        self.assertEqual([n for n, _ in eventos], [1, 2])
+        self.assertFalse(recargar)
+        self.assertEqual(ultimo, 2)
+
+    def test_hueco_que_persiste_recarga(self):
+        publicar_evento('inspecciones', {'mes': '2026-10', 'delta': 1})
+        publicar_evento('inspecciones', {'mes': '2026-10', 'delta': 1})
+        cache.delete(CLAVE_EVENTO.format(1))
+
+        _, recargar, _, hueco = siguiente_envio(0, 2, *eventos_desde(0, 2), None)
+        self.assertFalse(recargar)
+        _, recargar, ultimo, _ = siguiente_envio(0, 2, *eventos_desde(0, 2), hueco)
+        self.assertTrue(recargar)
+        self.assertEqual(ultimo, 2)
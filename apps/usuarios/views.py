@@ -1,11 +1,20 @@
+import asyncio
+import json
+import time
+
 from django.shortcuts import render, redirect
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
 from django.utils import timezone
 from datetime import timedelta
 from apps.inspecciones.models import PeriodoValidacionCertificacion
 from apps.inspecciones.signals import verificar_caducidades_pendientes
+from .dashboard import (
+    aeventos_desde, asecuencia_actual, datos_periodo, eventos_desde, secuencia_actual, siguiente_envio,
+)
 
 
 def login_view(request):
@@ -42,6 +51,9 @@ def home_view(request):
     # Verificar caducidades pendientes
     verificar_caducidades_pendientes()
     
+    # Los cambios posteriores a este número llegan por eventos_dashboard (SSE)
+    secuencia_eventos = secuencia_actual()
+    
     hoy = timezone.now().date()
     fecha_limite = hoy + timedelta(days=30)  # Próximos 30 días
     
@@ -51,114 +63,31 @@ def home_view(request):
         esta_completado=False
     ).select_related(
         'operario_certificacion__operario',
-        'operario_certificacion__certificacion'
+        'operario_certificacion__certificacion',
+        'prevision'  # previsión de finalización precalculada (apps/inspecciones/prevision.py)
     ).order_by('fecha_fin_periodo')
     
     periodos_vigentes_lista = []
     periodos_criticos_lista = []
-
-    niveles = {'critico': 0, 'alto': 1, 'medio': 2, 'normal': 3}
-
-    def escalar(nivel_actual, nivel_nuevo):
-        """Devuelve el nivel más severo entre actual y nuevo."""
-        return nivel_nuevo if niveles.get(nivel_nuevo, 3) < niveles.get(nivel_actual, 3) else nivel_actual
-
-    def evaluar_criticidad(periodo):
-        dias_restantes = (periodo.fecha_fin_periodo - hoy).days
-        dias_transcurridos = max((hoy - periodo.fecha_inicio_periodo).days, 0)
-        dias_totales = max((periodo.fecha_fin_periodo - periodo.fecha_inicio_periodo).days, 1)
-
-        porcentaje_piezas = (periodo.inspecciones_realizadas / periodo.inspecciones_requeridas * 100) if periodo.inspecciones_requeridas > 0 else 0
-        porcentaje_tiempo = (dias_transcurridos / dias_totales * 100)
-
-        nivel_criticidad = 'normal'
-        es_critico = False
-
-        # C0: periodo vencido pero marcado como vigente -> crítico duro
-        if dias_restantes <= 0:
-            return True, 'critico'
-
-        # C1: Vence en <=30 días
-        if dias_restantes <= 30:
-            es_critico = True
-            if dias_restantes <= 7:
-                nivel_criticidad = escalar(nivel_criticidad, 'critico')
-            elif dias_restantes <= 15:
-                nivel_criticidad = escalar(nivel_criticidad, 'alto')
-            else:
-                nivel_criticidad = escalar(nivel_criticidad, 'medio')
-
-        # C2: <50% piezas y >50% tiempo
-        if porcentaje_piezas < 50 and porcentaje_tiempo > 50:
-            es_critico = True
-            if porcentaje_piezas < 25:
-                nivel_criticidad = escalar(nivel_criticidad, 'critico')
-            elif porcentaje_piezas < 35:
-                nivel_criticidad = escalar(nivel_criticidad, 'alto')
-            else:
-                nivel_criticidad = escalar(nivel_criticidad, 'medio')
-
-        # C3: <10 piezas y <60 días restantes
-        if periodo.inspecciones_realizadas < 10 and dias_restantes < 60:
-            es_critico = True
-            nivel_criticidad = escalar(nivel_criticidad, 'alto')
-
-        # C4: <40% piezas y >40% tiempo
-        if porcentaje_piezas < 40 and porcentaje_tiempo > 40:
-            es_critico = True
-            if porcentaje_piezas < 20:
-                nivel_criticidad = escalar(nivel_criticidad, 'critico')
-            elif porcentaje_piezas < 30:
-                nivel_criticidad = escalar(nivel_criticidad, 'alto')
-            else:
-                nivel_criticidad = escalar(nivel_criticidad, 'medio')
-
-        # C5: <=90 días restantes y <60% piezas
-        if dias_restantes <= 90 and porcentaje_piezas < 60:
-            es_critico = True
-            if dias_restantes <= 30:
-                nivel_criticidad = escalar(nivel_criticidad, 'critico')
-            elif dias_restantes <= 60:
-                nivel_criticidad = escalar(nivel_criticidad, 'alto')
-            else:
-                nivel_criticidad = escalar(nivel_criticidad, 'medio')
-
-        return es_critico, nivel_criticidad
     
     # Calcular criticidad y métricas por periodo
     for periodo in periodos_vigentes_qs:
-        dias_restantes = (periodo.fecha_fin_periodo - hoy).days
-        dias_transcurridos = max((hoy - periodo.fecha_inicio_periodo).days, 0)
-        dias_totales = max((periodo.fecha_fin_periodo - periodo.fecha_inicio_periodo).days, 1)
-
-        porcentaje_piezas = (periodo.inspecciones_realizadas / periodo.inspecciones_requeridas * 100) if periodo.inspecciones_requeridas > 0 else 0
-        porcentaje_tiempo = (dias_transcurridos / dias_totales * 100)
-
-        es_critico, nivel_criticidad = evaluar_criticidad(periodo)
-
-        periodo_data = {
-            'periodo': periodo,
-            'dias_restantes': dias_restantes,
-            'porcentaje_piezas': round(porcentaje_piezas, 1),
-            'porcentaje_tiempo': round(porcentaje_tiempo, 1),
-            'nivel_criticidad': nivel_criticidad,
-            'piezas_faltantes': periodo.inspecciones_requeridas - periodo.inspecciones_realizadas
-        }
+        periodo_data = datos_periodo(periodo, hoy)
         periodos_vigentes_lista.append(periodo_data)
 
-        if es_critico:
+        if periodo_data['es_critico']:
             periodos_criticos_lista.append(periodo_data)
     
     # Ordenar todos los vigentes por criticidad y distancia a completarse
     periodos_vigentes_lista.sort(key=lambda x: (
-        niveles.get(x['nivel_criticidad'], 3),
+        x['nivel_orden'],
         -x['piezas_faltantes'],  # más lejos de completar primero
         x['dias_restantes']
     ))
 
     # Ordenar críticos por severidad, avance y proximidad de vencimiento
     periodos_criticos_lista.sort(key=lambda x: (
-        niveles.get(x['nivel_criticidad'], 3),
+        x['nivel_orden'],
         x['porcentaje_piezas'],  # menos avance primero
         x['dias_restantes']
     ))
@@ -171,20 +100,103 @@ def home_view(request):
     from django.db.models import Count, Q
     from datetime import datetime
     
+    inicio_mes = hoy.replace(day=1)
+    inicio_mes_siguiente = (inicio_mes + timedelta(days=32)).replace(day=1)
+    
     stats = {
         'operarios_activos': Operario.objects.filter(activo=True).count(),
         'certificaciones_activas': Certificacion.objects.filter(activa=True).count(),
         'asignaciones_activas': OperarioCertificacion.objects.filter(esta_activa=True).count(),
         'periodos_vigentes': PeriodoValidacionCertificacion.objects.filter(esta_vigente=True).count(),
+        # Rango de fechas en lugar de __year/__month para que use inspeccion_fecha_idx
         'inspecciones_mes': InspeccionProducto.objects.filter(
-            fecha_inspeccion__year=hoy.year,
-            fecha_inspeccion__month=hoy.month
+            fecha_inspeccion__gte=inicio_mes,
+            fecha_inspeccion__lt=inicio_mes_siguiente
         ).count(),
         'periodos_criticos_count': len(periodos_criticos_lista),
+        'periodos_retraso_previsto': sum(
+            1 for item in periodos_vigentes_lista if item['prevision'] and item['prevision'].en_riesgo
+        ),
     }
     
     return render(request, 'home.html', {
         'periodos_criticos': periodos_criticos_lista[:10],  # Mostrar solo los 10 más críticos
         'periodos_vigentes': periodos_vigentes_lista,
-        'stats': stats
+        'stats': stats,
+        'secuencia_eventos': secuencia_eventos,
+        'mes_actual': hoy.strftime('%Y-%m'),
     })
+
+
+# Eventos del dashboard (SSE)
+INTERVALO_SONDEO = 1        # segundos entre consultas a la caché de eventos
+INTERVALO_LATIDO = 15       # comentario periódico para que proxies y navegador no corten la conexión
+DURACION_MAXIMA = 300       # se cierra el flujo y el navegador reconecta (libera el hilo en WSGI)
+
+
+def _trama(numero, tipo, datos):
+    return f'id: {numero}\nevent: {tipo}\ndata: {json.dumps(datos)}\n\n'
+
+
+def _tramas_eventos(eventos, recargar, actual):
+    tramas = [_trama(numero, evento['tipo'], evento['datos']) for numero, evento in eventos]
+    if recargar:
+        # Algún evento ya caducó: la pantalla no puede ponerse al día con deltas
+        tramas.append(_trama(actual, 'recargar', {}))
+    return ''.join(tramas)
+
+
+def _flujo_eventos(ultimo):
+    yield 'retry: 3000\n\n'
+    inicio = latido = time.monotonic()
+    hueco = None
+    while time.monotonic() - inicio < DURACION_MAXIMA:
+        actual = secuencia_actual()
+        if actual > ultimo:
+            eventos, recargar, ultimo, hueco = siguiente_envio(ultimo, actual, *eventos_desde(ultimo, actual), hueco)
+            if eventos or recargar:
+                yield _tramas_eventos(eventos, recargar, actual)
+                latido = time.monotonic()
+        elif time.monotonic() - latido >= INTERVALO_LATIDO:
+            yield ': latido\n\n'
+            latido = time.monotonic()
+        time.sleep(INTERVALO_SONDEO)
+
+
+async def _aflujo_eventos(ultimo):
+    yield 'retry: 3000\n\n'
+    inicio = latido = time.monotonic()
+    hueco = None
+    while time.monotonic() - inicio < DURACION_MAXIMA:
+        actual = await asecuencia_actual()
+        if actual > ultimo:
+            eventos, recargar, ultimo, hueco = siguiente_envio(ultimo, actual, *(await aeventos_desde(ultimo, actual)), hueco)
+            if eventos or recargar:
+                yield _tramas_eventos(eventos, recargar, actual)
+                latido = time.monotonic()
+        elif time.monotonic() - latido >= INTERVALO_LATIDO:
+            yield ': latido\n\n'
+            latido = time.monotonic()
+        await asyncio.sleep(INTERVALO_SONDEO)
+
+
+@login_required
+def eventos_dashboard(request):
+    """
+    Flujo SSE con los cambios del dashboard posteriores a ?desde (o a Last-Event-ID al
+    reconectar). Los eventos ya vienen calculados de los signals; aquí solo se reenvían.
+    Bajo ASGI cada conexión es una corrutina; bajo WSGI ocupa un hilo hasta DURACION_MAXIMA.
+    """
+    try:
+        ultimo = int(request.headers.get('Last-Event-ID') or request.GET.get('desde', 0))
+    except ValueError:
+        ultimo = 0
+    # Un cursor mayor que la secuencia indica que la caché se vació: se recarga la página
+    if ultimo > secuencia_actual():
+        ultimo = -1
+
+    flujo = _aflujo_eventos(ultimo) if isinstance(request, ASGIRequest) else _flujo_eventos(ultimo)
+    response = StreamingHttpResponse(flujo, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # nginx: no acumular el flujo
+    return response
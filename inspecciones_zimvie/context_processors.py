@@ -0,0 +1,8 @@
+from .routers import en_lectura_analitica, frescura_analitica
+
+
+def datos_analitica(request):
+    """Añade la frescura de la copia analítica cuando la vista lee de ella"""
+    if not en_lectura_analitica():
+        return {}
+    return {'frescura_analitica': frescura_analitica()}
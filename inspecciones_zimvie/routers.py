@@ -0,0 +1,188 @@
+"""
+Enrutado de lecturas analíticas a una copia de solo lectura de la base de datos.
+
+Las vistas de estadísticas y consultas agregan muchas inspecciones y, sobre SQLite,
+compiten con el registro de inspecciones por el mismo fichero. El alias 'analitica'
+apunta a una copia que se refresca periódicamente (comando `snapshot_db`, o una réplica
+de PostgreSQL). Las vistas eligen la copia de forma explícita con el decorador
+`vista_analitica` o el gestor de contexto `usar_analitica()`; el resto del código sigue
+leyendo y escribiendo en 'default'.
+
+En SQLite el alias abre la copia en modo solo lectura (URI file:...?mode=ro), así que
+conectarse nunca crea el fichero. Antes de leer de la copia se comprueba que no esté
+vacía y que tenga aplicadas las mismas migraciones que 'default' (una copia anterior al
+último migrate no tiene las columnas nuevas); si no, se lee de 'default'. La comprobación
+se repite solo cuando cambia el fichero.
+"""
+import os
+import sqlite3
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone as dt_timezone
+from functools import wraps
+from pathlib import Path
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils import timezone
+
+ALIAS_ANALITICA = 'analitica'
+
+_lectura_analitica = ContextVar('lectura_analitica', default=False)
+
+# (mtime, tamaño) de la copia SQLite -> resultado de validar_copia_analitica()
+_copias_validadas = {}
+
+
+def _es_sqlite(config):
+    return config['ENGINE'].endswith('sqlite3')
+
+
+def ruta_sqlite(config):
+    """Ruta del fichero de una base SQLite; NAME puede ser una ruta o una URI file:"""
+    nombre = str(config['NAME'])
+    if nombre.startswith('file:'):
+        return Path(url2pathname(urlparse(nombre).path))
+    return Path(nombre)
+
+
+def _migraciones_copia(ruta):
+    """Migraciones aplicadas en la copia, leídas con una conexión propia de solo lectura"""
+    conexion = sqlite3.connect(f'{ruta.resolve().as_uri()}?mode=ro', uri=True)
+    try:
+        return set(conexion.execute('SELECT app, name FROM django_migrations').fetchall())
+    finally:
+        conexion.close()
+
+
+def _migraciones_default():
+    with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+        cursor.execute('SELECT app, name FROM django_migrations')
+        return set(cursor.fetchall())
+
+
+def validar_copia_analitica():
+    """
+    Motivo por el que la copia SQLite no se puede usar, o None si es válida: no existe,
+    está vacía o no tiene las mismas migraciones que 'default'.
+    """
+    ruta = ruta_sqlite(settings.DATABASES[ALIAS_ANALITICA])
+    try:
+        estado = ruta.stat()
+    except OSError:
+        return f'no existe {ruta}'
+    if estado.st_size == 0:
+        return f'{ruta} está vacía'
+    try:
+        copia = _migraciones_copia(ruta)
+    except sqlite3.Error as e:
+        return f'no se puede leer {ruta}: {e}'
+    if copia != _migraciones_default():
+        return f'{ruta} no tiene las mismas migraciones que la base principal (ejecute snapshot_db)'
+    return None
+
+
+def alias_analitica_disponible():
+    """
+    True si el alias 'analitica' está configurado y (en SQLite) la copia existe y está al
+    día con las migraciones de 'default'
+    """
+    config = settings.DATABASES.get(ALIAS_ANALITICA)
+    if not config:
+        return False
+    if not _es_sqlite(config):
+        return True
+    try:
+        estado = ruta_sqlite(config).stat()
+    except OSError:
+        return False
+    clave = (estado.st_mtime_ns, estado.st_size)
+    if clave not in _copias_validadas:
+        _copias_validadas.clear()
+        _copias_validadas[clave] = validar_copia_analitica() is None
+    return _copias_validadas[clave]
+
+
+def en_lectura_analitica():
+    """True si las lecturas de la petición actual van a la copia analítica"""
+    return _lectura_analitica.get() and alias_analitica_disponible()
+
+
+@contextmanager
+def usar_analitica():
+    """Dirige a la copia analítica las lecturas del bloque"""
+    token = _lectura_analitica.set(True)
+    try:
+        yield
+    finally:
+        _lectura_analitica.reset(token)
+
+
+def vista_analitica(vista):
+    """Decorador: todas las lecturas de la vista (incluida la plantilla) van a la copia analítica"""
+    @wraps(vista)
+    def envoltura(request, *args, **kwargs):
+        with usar_analitica():
+            return vista(request, *args, **kwargs)
+    return envoltura
+
+
+def marca_copia_analitica():
+    """
+    Identifica la copia analítica que se está leyendo, para usarla en claves de caché: la
+    fecha de la última copia en SQLite. None si se lee de 'default' o de una réplica, que ya
+    están al día.
+    """
+    if not en_lectura_analitica() or not _es_sqlite(settings.DATABASES[ALIAS_ANALITICA]):
+        return None
+    return os.path.getmtime(ruta_sqlite(settings.DATABASES[ALIAS_ANALITICA]))
+
+
+def frescura_analitica():
+    """
+    Fecha de los datos de la copia analítica y su antigüedad en minutos, o None si no se usa.
+    En SQLite es la fecha de la última copia; en PostgreSQL, la última transacción reproducida.
+    """
+    if not alias_analitica_disponible():
+        return None
+    config = settings.DATABASES[ALIAS_ANALITICA]
+    ahora = timezone.now()
+    if _es_sqlite(config):
+        fecha = datetime.fromtimestamp(os.path.getmtime(ruta_sqlite(config)), tz=dt_timezone.utc)
+    else:
+        with connections[ALIAS_ANALITICA].cursor() as cursor:
+            cursor.execute('SELECT pg_last_xact_replay_timestamp()')
+            fecha = cursor.fetchone()[0] or ahora
+    return {
+        'fecha': fecha,
+        'minutos': max(0, int((ahora - fecha).total_seconds() // 60)),
+    }
+
+
+class RouterAnalitica:
+    """
+    Lecturas: a 'analitica' solo dentro de `usar_analitica()`; si no, decide Django (default).
+    Escrituras: siempre a 'default', también para objetos leídos de la copia.
+    Migraciones: nunca sobre la copia (se obtiene con el esquema ya migrado).
+    """
+
+    def db_for_read(self, model, **hints):
+        if en_lectura_analitica():
+            return ALIAS_ANALITICA
+        return None
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        alias = {DEFAULT_DB_ALIAS, ALIAS_ANALITICA}
+        if obj1._state.db in alias and obj2._state.db in alias:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == ALIAS_ANALITICA:
+            return False
+        return None
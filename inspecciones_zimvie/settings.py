@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -48,6 +51,7 @@ INSTALLED_APPS = [
     'apps.asignaciones.apps.AsignacionesConfig',
     'apps.inspecciones.apps.InspeccionesConfig',
     'apps.consultas.apps.ConsultasConfig',
+    'apps.api.apps.ApiConfig',
 ]
 
 MIDDLEWARE = [
@@ -66,12 +70,20 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Las plantillas se compilan una vez por proceso, con DEBUG o sin él; en desarrollo
+            # runserver vacía la caché al cambiar una plantilla (benchmark: benchmark_plantillas)
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'inspecciones_zimvie.context_processors.datos_analitica',
             ],
         },
     },
@@ -87,9 +99,82 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    },
+    # Copia de solo lectura para las vistas analíticas (ver inspecciones_zimvie/routers.py).
+    # Se refresca con `python manage.py snapshot_db` (también después de cada migrate);
+    # mientras no exista o no esté al día se lee de 'default'. Se abre con mode=ro para
+    # que conectarse nunca cree un fichero vacío.
+    # Con PostgreSQL basta con apuntar este alias a una réplica en streaming.
+    'analitica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': Path(os.environ.get('INSPECCIONES_DB_ANALITICA', BASE_DIR / 'db_analitica.sqlite3')).resolve().as_uri() + '?mode=ro',
+        'OPTIONS': {
+            'init_command': 'PRAGMA query_only = ON;',
+        },
+        'TEST': {
+            'MIRROR': 'default',
+        },
+    },
 }
 
+DATABASE_ROUTERS = ['inspecciones_zimvie.routers.RouterAnalitica']
+
+# Perfil de base de datos: 'desarrollo' (por defecto) o 'produccion'.
+# En producción se reutilizan las conexiones entre peticiones y cada conexión nueva
+# aplica los PRAGMAs de inspecciones_zimvie/sqlite.py (WAL, synchronous, ...).
+INSPECCIONES_DB_PERFIL = os.environ.get('INSPECCIONES_DB_PERFIL', 'desarrollo')
+
+if INSPECCIONES_DB_PERFIL == 'produccion':
+    from inspecciones_zimvie.sqlite import TIMEOUT_PRODUCCION
+
+    DATABASES['default'].update({
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # BEGIN IMMEDIATE: el bloqueo de escritura se toma al empezar la transacción,
+            # así dos escritores esperan su turno en lugar de fallar al promocionar el bloqueo
+            'transaction_mode': 'IMMEDIATE',
+            # Espera ante un bloqueo (sqlite3 lo aplica como busy_timeout)
+            'timeout': TIMEOUT_PRODUCCION,
+        },
+    })
+    DATABASES['analitica'].update({
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+    })
+
+# Años de histórico que se mantienen en las tablas principales; los periodos cerrados
+# anteriores se trasladan al archivo con `python manage.py archivar_historico`
+INSPECCIONES_ARCHIVO_ANIOS = int(os.environ.get('INSPECCIONES_ARCHIVO_ANIOS', 2))
+
+# Copias de seguridad en caliente (`python manage.py respaldar_bd`): directorio y número
+# de copias que se conservan
+INSPECCIONES_RESPALDOS_DIR = Path(os.environ.get('INSPECCIONES_RESPALDOS_DIR', BASE_DIR / 'respaldos'))
+INSPECCIONES_RESPALDOS_CONSERVAR = int(os.environ.get('INSPECCIONES_RESPALDOS_CONSERVAR', 7))
+
+# Caché compartida: los eventos en directo del dashboard (apps/usuarios/dashboard.py) y los
+# números de versión que invalidan la configuración de inspecciones y las cachés de
+# estadísticas y cobertura viven en la caché 'default'. Con un solo proceso basta la caché
+# en memoria; con varios procesos (gunicorn --workers N) todos deben ver la misma caché,
+# p. ej. Redis, o cada proceso seguiría usando la configuración antigua hasta reiniciarse.
+INSPECCIONES_REDIS_URL = os.environ.get('INSPECCIONES_REDIS_URL')
+
+# El perfil de producción exige la caché compartida, salvo que se declare un único proceso
+if (INSPECCIONES_DB_PERFIL == 'produccion' and not INSPECCIONES_REDIS_URL
+        and os.environ.get('INSPECCIONES_CACHE_LOCAL') != '1'):
+    raise ImproperlyConfigured(
+        'El perfil de producción necesita una caché compartida entre procesos: defina '
+        'INSPECCIONES_REDIS_URL (o INSPECCIONES_CACHE_LOCAL=1 si se sirve con un único proceso)'
+    )
+
+if INSPECCIONES_REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': INSPECCIONES_REDIS_URL,
+        }
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
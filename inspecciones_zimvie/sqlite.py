@@ -0,0 +1,53 @@
+"""
+Ajustes de conexión para SQLite en producción.
+
+Con el perfil de producción (INSPECCIONES_DB_PERFIL=produccion) cada conexión nueva
+aplica los PRAGMAs de PRAGMAS_PRODUCCION: WAL permite que los lectores no bloqueen al
+escritor, y el resto reduce E/S (synchronous=NORMAL es seguro con WAL) y mantiene más
+páginas en memoria.
+
+La espera ante un bloqueo (en lugar de fallar con "database is locked") no es un PRAGMA:
+es el timeout de la conexión, OPTIONS['timeout'] = TIMEOUT_PRODUCCION en settings, que
+sqlite3 aplica como busy_timeout. Un PRAGMA busy_timeout aquí lo sobrescribiría.
+"""
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+# Segundos que una conexión espera a que se libere el bloqueo de escritura
+TIMEOUT_PRODUCCION = 20
+
+PRAGMAS_PRODUCCION = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 268435456,         # 256 MB
+    'cache_size': -65536,           # negativo = KiB (64 MB)
+    'temp_store': 'MEMORY',
+}
+
+
+def pragmas_configurados():
+    """PRAGMAs a aplicar según el perfil (SQLITE_PRAGMAS en settings tiene prioridad)"""
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', None)
+    if pragmas is not None:
+        return pragmas
+    if getattr(settings, 'INSPECCIONES_DB_PERFIL', 'desarrollo') == 'produccion':
+        return PRAGMAS_PRODUCCION
+    return {}
+
+
+def aplicar_pragmas(cursor, pragmas):
+    """Ejecuta los PRAGMAs sobre un cursor DB-API de SQLite"""
+    for nombre, valor in pragmas.items():
+        cursor.execute(f'PRAGMA {nombre} = {valor}')
+
+
+@receiver(connection_created)
+def configurar_conexion_sqlite(sender, connection, **kwargs):
+    """Aplica los PRAGMAs del perfil a cada conexión SQLite nueva"""
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = pragmas_configurados()
+    if pragmas:
+        with connection.cursor() as cursor:
+            aplicar_pragmas(cursor, pragmas)
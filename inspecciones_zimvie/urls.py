@@ -29,4 +29,5 @@ urlpatterns = [
     path('asignaciones/', include('apps.asignaciones.urls')),
     path('inspecciones/', include('apps.inspecciones.urls')),
     path('consultas/', include('apps.consultas.urls')),
+    path('api/', include('apps.api.urls')),
 ]
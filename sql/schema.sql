@@ -20,6 +20,7 @@ CREATE TABLE auditores (
     apellidos                TEXT,
     codigo                   TEXT,
     activo                   INTEGER NOT NULL DEFAULT 1,
+    capacidad_diaria         INTEGER NOT NULL DEFAULT 10 CHECK (capacidad_diaria >= 0),
     fecha_creacion           TEXT NOT NULL DEFAULT (datetime('now')),
     usuario_creacion_id      INTEGER,
     fecha_actualizacion      TEXT NOT NULL DEFAULT (datetime('now')),
@@ -45,6 +46,12 @@ CREATE TABLE operarios (
     FOREIGN KEY (usuario_actualizacion_id) REFERENCES users(id) ON DELETE RESTRICT
 );
 
+-- Búsqueda por código y listado paginado por nombre
+CREATE INDEX idx_operarios_codigo
+    ON operarios(codigo);
+CREATE INDEX idx_operarios_nombre
+    ON operarios(nombre, apellidos);
+
 -- =========================================
 -- TABLA: certificaciones
 -- =========================================
@@ -91,6 +98,14 @@ CREATE TABLE operario_certificaciones (
     esta_activa              INTEGER NOT NULL DEFAULT 1,
     fecha_caducidad          TEXT,
     observaciones            TEXT,
+    ultimo_numero_periodo    INTEGER NOT NULL DEFAULT 0,  -- secuencia de periodos
+    -- Resumen del periodo vigente (desnormalizado, lo mantienen los signals de periodos)
+    periodo_actual_id                 INTEGER,
+    periodo_actual_numero             INTEGER,
+    periodo_actual_piezas_realizadas  INTEGER,
+    periodo_actual_piezas_requeridas  INTEGER,
+    periodo_actual_fecha_inicio       TEXT,
+    periodo_actual_fecha_fin          TEXT,
     fecha_creacion           TEXT NOT NULL DEFAULT (datetime('now')),
     usuario_creacion_id      INTEGER,
     fecha_actualizacion      TEXT NOT NULL DEFAULT (datetime('now')),
@@ -99,9 +114,14 @@ CREATE TABLE operario_certificaciones (
     FOREIGN KEY (certificacion_id)         REFERENCES certificaciones(id) ON DELETE RESTRICT,
     FOREIGN KEY (usuario_creacion_id)      REFERENCES users(id) ON DELETE RESTRICT,
     FOREIGN KEY (usuario_actualizacion_id) REFERENCES users(id) ON DELETE RESTRICT,
+    FOREIGN KEY (periodo_actual_id)        REFERENCES periodos_validacion_certificacion(id) ON DELETE SET NULL,
     UNIQUE(operario_id, certificacion_id, fecha_asignacion)
 );
 
+-- Asignaciones activas de un operario (formulario de inspección)
+CREATE INDEX idx_asignaciones_operario_activa
+    ON operario_certificaciones(operario_id, esta_activa);
+
 -- =========================================
 -- TABLA: configuracion_inspecciones (opcional, MVP)
 -- =========================================
@@ -150,6 +170,11 @@ CREATE UNIQUE INDEX idx_periodo_vigente_unico
 ON periodos_validacion_certificacion(operario_certificacion_id)
 WHERE esta_vigente = 1;
 
+-- Índice parcial: periodos pendientes por fecha de fin (caducidades y dashboard)
+CREATE INDEX idx_periodos_pendientes_fin
+ON periodos_validacion_certificacion(fecha_fin_periodo)
+WHERE esta_vigente = 1 AND esta_completado = 0;
+
 -- =========================================
 -- TABLA: inspecciones_producto
 -- =========================================
@@ -163,6 +188,8 @@ CREATE TABLE inspecciones_producto (
     piezas_auditadas             INTEGER NOT NULL,
     resultado_inspeccion         TEXT,
     observaciones                TEXT,
+    numero_orden                 TEXT,
+    numero_orden_normalizado     TEXT,               -- mayúsculas, solo letras y dígitos
     fecha_creacion               TEXT NOT NULL DEFAULT (datetime('now')),
     usuario_creacion_id          INTEGER,
     fecha_actualizacion          TEXT NOT NULL DEFAULT (datetime('now')),
@@ -181,3 +208,97 @@ CREATE INDEX idx_inspecciones_por_operario
 
 CREATE INDEX idx_inspecciones_por_periodo
     ON inspecciones_producto(periodo_validacion_id, fecha_inspeccion);
+
+-- Listado general y estadísticas por rango de fechas
+CREATE INDEX idx_inspecciones_por_fecha
+    ON inspecciones_producto(fecha_inspeccion, fecha_creacion);
+
+-- Trazabilidad por número de orden (búsqueda exacta y por prefijo)
+CREATE INDEX idx_inspecciones_por_orden
+    ON inspecciones_producto(numero_orden_normalizado);
+
+-- =========================================
+-- TABLA: previsiones_periodo
+-- Previsión de finalización de los periodos vigentes (precalculada)
+-- =========================================
+CREATE TABLE previsiones_periodo (
+    periodo_id          INTEGER PRIMARY KEY,
+    ritmo_diario        REAL NOT NULL,      -- piezas por día laborable (media de ventanas de 30 y 90 días)
+    piezas_faltantes    INTEGER NOT NULL,
+    fecha_prevista      TEXT,               -- NULL sin actividad reciente o si no termina ni con margen
+    dias_retraso        INTEGER,            -- fecha_prevista - fecha_fin_periodo
+    en_riesgo           INTEGER NOT NULL DEFAULT 0,
+    fecha_calculo       TEXT NOT NULL,
+    FOREIGN KEY (periodo_id) REFERENCES periodos_validacion_certificacion(id) ON DELETE CASCADE
+);
+
+-- =========================================
+-- TABLA: periodos_archivados
+-- Archivo histórico: periodos cerrados anteriores al horizonte (comando archivar_historico),
+-- con el mismo id que tenían en periodos_validacion_certificacion
+-- =========================================
+CREATE TABLE periodos_archivados (
+    id                           INTEGER PRIMARY KEY,
+    anio                         INTEGER NOT NULL,   -- año de fecha_fin_periodo (partición)
+    operario_certificacion_id    INTEGER NOT NULL,
+    numero_periodo               INTEGER NOT NULL,
+    fecha_inicio_periodo         TEXT NOT NULL,
+    fecha_fin_periodo            TEXT NOT NULL,
+    numero_dias_laborales_req    INTEGER NOT NULL,
+    inspecciones_requeridas      INTEGER NOT NULL,
+    inspecciones_realizadas      INTEGER NOT NULL,
+    esta_completado              INTEGER NOT NULL,
+    fecha_completado             TEXT,
+    fecha_creacion               TEXT NOT NULL,
+    usuario_creacion_id          INTEGER,
+    fecha_archivo                TEXT NOT NULL,
+    FOREIGN KEY (operario_certificacion_id) REFERENCES operario_certificaciones(id) ON DELETE RESTRICT,
+    FOREIGN KEY (usuario_creacion_id)      REFERENCES users(id) ON DELETE RESTRICT
+);
+
+CREATE INDEX idx_periodos_archivados_anio
+    ON periodos_archivados(anio, operario_certificacion_id);
+
+CREATE INDEX idx_periodos_archivados_asignacion
+    ON periodos_archivados(operario_certificacion_id, numero_periodo);
+
+-- =========================================
+-- TABLA: inspecciones_archivadas
+-- Inspecciones de los periodos archivados, con el mismo id que en inspecciones_producto
+-- =========================================
+CREATE TABLE inspecciones_archivadas (
+    id                           INTEGER PRIMARY KEY,
+    anio                         INTEGER NOT NULL,   -- año de fecha_inspeccion (partición)
+    operario_certificacion_id    INTEGER NOT NULL,
+    periodo_validacion_id        INTEGER NOT NULL,
+    auditoria_producto_id        INTEGER NOT NULL,
+    auditor_id                   INTEGER NOT NULL,
+    fecha_inspeccion             TEXT NOT NULL,
+    piezas_auditadas             INTEGER NOT NULL,
+    resultado_inspeccion         TEXT,
+    observaciones                TEXT,
+    numero_orden                 TEXT,
+    numero_orden_normalizado     TEXT,
+    fecha_creacion               TEXT NOT NULL,
+    usuario_creacion_id          INTEGER,
+    fecha_actualizacion          TEXT NOT NULL,
+    fecha_archivo                TEXT NOT NULL,
+    FOREIGN KEY (operario_certificacion_id) REFERENCES operario_certificaciones(id) ON DELETE RESTRICT,
+    FOREIGN KEY (periodo_validacion_id)     REFERENCES periodos_archivados(id) ON DELETE RESTRICT,
+    FOREIGN KEY (auditoria_producto_id)     REFERENCES auditorias_producto(id) ON DELETE RESTRICT,
+    FOREIGN KEY (auditor_id)                REFERENCES auditores(id) ON DELETE RESTRICT,
+    FOREIGN KEY (usuario_creacion_id)       REFERENCES users(id) ON DELETE RESTRICT
+);
+
+CREATE INDEX idx_inspecciones_archivadas_anio
+    ON inspecciones_archivadas(anio, operario_certificacion_id);
+
+CREATE INDEX idx_inspecciones_archivadas_operario
+    ON inspecciones_archivadas(operario_certificacion_id, fecha_inspeccion);
+
+CREATE INDEX idx_inspecciones_archivadas_auditor
+    ON inspecciones_archivadas(auditor_id, fecha_inspeccion);
+
+-- Trazabilidad por número de orden en el histórico
+CREATE INDEX idx_inspecciones_archivadas_orden
+    ON inspecciones_archivadas(numero_orden_normalizado);